@@ -5,9 +5,11 @@ import os
 import logging
 from dotenv import load_dotenv
 from .db import init_db
-from . import models
+from . import models, commands, querystats
 from .extensions import csrf, limiter
-from .routes import documents, ui, quizzes, results, auth, subjects, groups, events
+from .routes import documents, ui, quizzes, results, auth, subjects, groups, events, monitoring
+from .routes import search as search_routes
+from .routes import IdConverter
 from .routes.auth import login_manager
 
 load_dotenv()
@@ -21,6 +23,7 @@ def create_app():
         DAILY_QUIZ_LIMIT=int(os.getenv("DAILY_QUIZ_LIMIT", "10")),
         REGISTRATION_ENABLED=os.getenv("REGISTRATION_ENABLED", "True").lower() == "true",
         QUIZ_LIMIT_ENABLED=os.getenv("QUIZ_LIMIT_ENABLED", "False").lower() == "true",
+        SQL_STATS_HEADER=os.getenv("SQL_STATS_HEADER", "False").lower() == "true",
     )
 
     # --- Logging ---
@@ -38,6 +41,8 @@ def create_app():
 
     # --- Base de données ---
     init_db(app)
+    # Nombre et durée des requêtes SQL par requête HTTP (en-têtes en DEBUG, logs)
+    querystats.init_app(app)
 
     # --- Authentification ---
     login_manager.init_app(app)
@@ -74,6 +79,8 @@ def create_app():
         return render_template("errors/429.html"), 429
 
     # --- Blueprints ---
+    # Identifiants des URL validés par la route (<uuid:...>), gardés en str
+    app.url_map.converters["uuid"] = IdConverter
     app.register_blueprint(auth.bp)
     app.register_blueprint(documents.bp)
     app.register_blueprint(quizzes.bp)
@@ -82,6 +89,11 @@ def create_app():
     app.register_blueprint(groups.groups_bp)
     app.register_blueprint(events.events_bp)
     app.register_blueprint(ui.bp)
+    app.register_blueprint(monitoring.bp)
+    app.register_blueprint(search_routes.bp)
+
+    # --- Commandes CLI (maintenance) ---
+    commands.init_app(app)
 
     # --- Variables globales ---
     @app.context_processor
@@ -0,0 +1,193 @@
+# app/cache.py
+# Caches en mémoire, propres à chaque worker gunicorn.
+# Partagés entre les threads d'un worker : toutes les opérations prennent un verrou.
+#
+# Les modèles de lecture (cf. app/read_models.py) passent par LayeredCache : le cache mémoire
+# du worker, puis un tier partagé optionnel (CACHE_URL) commun à tous les workers, puis la base.
+# Une invalidation vide le tier partagé : les autres workers voient la nouvelle valeur dès
+# l'expiration de leur copie locale (CACHE_LOCAL_TTL secondes).
+
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.dialects.postgresql import insert
+from . import db, metrics
+from .models import CacheEntry
+
+logger = logging.getLogger("app.cache")
+
+
+class TTLCache:
+    """
+    Cache LRU borné dont les entrées expirent après `ttl` secondes.
+    Une entrée lue remonte en tête ; au-delà de `maxsize`, la moins récente est évincée.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class PostgresStore:
+    """Tier partagé dans la table UNLOGGED cache_entries (valeurs sérialisées par pickle)."""
+
+    def __init__(self, url):
+        self.engine = db.create_autocommit_engine(url)
+
+    def get(self, key):
+        with self.engine.connect() as conn:
+            value = conn.execute(
+                select(CacheEntry.value).where(CacheEntry.key == key, CacheEntry.expires_at > func.now())
+            ).scalar()
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl):
+        stmt = insert(CacheEntry).values(
+            key=key, value=pickle.dumps(value), expires_at=func.now() + timedelta(seconds=ttl)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheEntry.key],
+            set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+        )
+        with self.engine.connect() as conn:
+            conn.execute(stmt)
+
+    def delete(self, key):
+        with self.engine.connect() as conn:
+            conn.execute(delete(CacheEntry).where(CacheEntry.key == key))
+
+
+class RedisStore:
+    """Tier partagé dans Redis ou un serveur compatible (Valkey, KeyDB, ...)."""
+
+    def __init__(self, url):
+        import redis  # dépendance optionnelle : uniquement si CACHE_URL=redis://...
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self.client.get(key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, pickle.dumps(value), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+def shared_store(url):
+    """Tier partagé désigné par `url` (postgresql://... ou redis://...), None si vide."""
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    return PostgresStore(url)
+
+
+CACHE_URL = os.getenv("CACHE_URL", "")
+# Durée de vie des copies locales quand un tier partagé existe (retard maximal d'un worker
+# sur une invalidation faite par un autre)
+CACHE_LOCAL_TTL = int(os.getenv("CACHE_LOCAL_TTL", "5"))
+store = shared_store(CACHE_URL)
+
+
+class LayeredCache:
+    """
+    Cache d'un modèle de lecture, nommé `name` (clés du tier partagé : "<name>:<clé>").
+    Lecture : mémoire du worker, puis tier partagé (module `store`), puis `load()`.
+    Sans tier partagé, une invalidation n'atteint que le worker qui la fait : les autres
+    gardent leur copie jusqu'à `ttl` secondes.
+    """
+
+    def __init__(self, name, ttl, maxsize=1024):
+        self.name = name
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=min(ttl, CACHE_LOCAL_TTL) if store else ttl)
+
+    def _shared(self, operation, key, *args):
+        # Tier partagé indisponible : on continue avec la base, sans faire échouer la requête
+        try:
+            return getattr(store, operation)(f"{self.name}:{key}", *args)
+        except Exception as e:
+            logger.warning(f"Cache partagé indisponible ({operation} {self.name}) : {e}")
+            return None
+
+    def get_or_load(self, key, load):
+        """Valeur en cache pour `key`, sinon `load()` (mise en cache sauf si None)."""
+        value = self.local.get(key)
+        if value is not None:
+            metrics.CACHE_REQUESTS.inc(self.name, "local")
+            return value
+        if store:
+            value = self._shared("get", key)
+            if value is not None:
+                metrics.CACHE_REQUESTS.inc(self.name, "shared")
+                self.local.set(key, value)
+                return value
+        metrics.CACHE_REQUESTS.inc(self.name, "miss")
+        value = load()
+        if value is not None:
+            self.local.set(key, value)
+            if store:
+                self._shared("set", key, value, self.ttl)
+        return value
+
+    def invalidate(self, key, session=None):
+        """
+        Retire `key` des deux tiers. Avec `session`, recommence après son commit : une requête
+        concurrente a pu recharger l'ancienne valeur entre l'écriture et le commit.
+        """
+        self.local.pop(key)
+        if store:
+            self._shared("delete", key)
+        if session is not None:
+            event.listen(session, "after_commit", lambda _: self.invalidate(key), once=True)
+
+
+    def clear(self):
+        """Vide la mémoire de ce worker (le tier partagé expire de lui-même)."""
+        self.local.clear()
+
+
+def purge_expired(session):
+    """Supprime les entrées expirées de cache_entries. Retourne le nombre de lignes supprimées."""
+    return session.execute(delete(CacheEntry).where(CacheEntry.expires_at <= func.now())).rowcount
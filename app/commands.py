@@ -0,0 +1,73 @@
+# app/commands.py
+# Commandes Flask CLI de maintenance (à lancer via cron : flask --app run.py <commande>),
+# et processus de diffusion des flux SSE (flask --app run.py fanout).
+
+import asyncio
+import logging
+import click
+from flask import current_app
+from . import fanout
+from .cache import purge_expired
+from .counters import repair_counters
+from .db import SessionLocal
+from .quota import rollup_quotas
+from .ratelimit import purge_expired_limits
+
+logger = logging.getLogger("app.commands")
+
+
+@click.command("rollup-quotas")
+@click.option("--keep-days", default=90, show_default=True, help="Jours de compteurs journaliers conservés.")
+def rollup_quotas_command(keep_days):
+    """Cumule par mois les anciens compteurs de génération et les supprime."""
+    session = SessionLocal()
+    try:
+        rows = rollup_quotas(session, keep_days=keep_days)
+        session.commit()
+        logger.info(f"Quotas cumulés : {rows} ligne(s) mensuelle(s) mises à jour (> {keep_days} jours)")
+        click.echo(f"{rows} ligne(s) mensuelle(s) mises à jour")
+    finally:
+        session.close()
+
+
+@click.command("repair-counters")
+def repair_counters_command():
+    """Recalcule les compteurs dénormalisés (membres des groupes, cours des matières)."""
+    session = SessionLocal()
+    try:
+        fixed = repair_counters(session)
+        session.commit()
+        logger.info(f"Compteurs recalculés : {fixed['groups']} groupe(s), {fixed['subjects']} matière(s) corrigé(s)")
+        click.echo(f"{fixed['groups']} groupe(s), {fixed['subjects']} matière(s) corrigé(s)")
+    finally:
+        session.close()
+
+
+@click.command("purge-cache")
+def purge_cache_command():
+    """Supprime les entrées expirées du cache partagé et les compteurs de rate limiting échus."""
+    session = SessionLocal()
+    try:
+        rows = purge_expired(session)
+        limits = purge_expired_limits(session)
+        session.commit()
+        logger.info(f"Cache partagé : {rows} entrée(s) expirée(s), {limits} compteur(s) de limite échu(s) supprimé(s)")
+        click.echo(f"{rows} entrée(s) expirée(s), {limits} compteur(s) de limite échu(s) supprimé(s)")
+    finally:
+        session.close()
+
+
+@click.command("fanout")
+@click.option("--host", default="0.0.0.0", show_default=True)
+@click.option("--port", default=8001, show_default=True, type=int)
+def fanout_command(host, port):
+    """Processus de diffusion des flux SSE (classement en direct, générations ; cf. app/fanout.py)."""
+    asyncio.run(fanout.serve(current_app.secret_key, host, port))
+
+
+def init_app(app):
+    """Enregistre les commandes CLI sur l'application."""
+    app.cli.add_command(rollup_quotas_command)
+    app.cli.add_command(repair_counters_command)
+    app.cli.add_command(purge_cache_command)
+    app.cli.add_command(fanout_command)
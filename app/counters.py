@@ -0,0 +1,74 @@
+# app/counters.py
+# Compteurs dénormalisés : groups.member_count et subjects.document_count.
+# Ils sont mis à jour par des UPDATE atomiques (colonne = colonne + delta) dans la même
+# transaction que l'écriture qui les fait varier : adhésion/départ d'un groupe,
+# création/suppression/déplacement d'un cours. Les pages de liste les lisent directement
+# au lieu de compter les lignes groupe par groupe ou matière par matière.
+#
+# En cas de dérive (écriture hors de ces chemins, SQL manuel), la commande
+# `flask --app run.py repair-counters` les recalcule.
+
+from sqlalchemy import func, select, update
+from .models import Document, Group, GroupMember, Subject
+
+
+def adjust_member_count(session, group_id, delta):
+    """Ajoute `delta` au nombre de membres du groupe."""
+    session.execute(
+        update(Group)
+        .where(Group.id == group_id)
+        .values(member_count=Group.member_count + delta)
+    )
+
+
+def adjust_document_count(session, subject_id, delta):
+    """Ajoute `delta` au nombre de cours de la matière (sans effet pour un cours sans matière)."""
+    if subject_id is None:
+        return
+    session.execute(
+        update(Subject)
+        .where(Subject.id == subject_id)
+        .values(document_count=Subject.document_count + delta)
+    )
+
+
+def move_document(session, document, subject_id):
+    """Change la matière d'un cours et reporte le compteur de l'ancienne vers la nouvelle."""
+    if document.subject_id == subject_id:
+        return
+    adjust_document_count(session, document.subject_id, -1)
+    adjust_document_count(session, subject_id, 1)
+    document.subject_id = subject_id
+
+
+def repair_counters(session):
+    """
+    Recalcule les compteurs à partir des tables sources.
+    Seules les lignes dont le compteur est faux sont réécrites.
+    Retourne {"groups": n, "subjects": n} (nombre de lignes corrigées).
+    """
+    members = (
+        select(func.count())
+        .where(GroupMember.group_id == Group.id)
+        .correlate(Group)
+        .scalar_subquery()
+    )
+    documents = (
+        select(func.count())
+        .where(Document.subject_id == Subject.id)
+        .correlate(Subject)
+        .scalar_subquery()
+    )
+    groups = session.execute(
+        update(Group)
+        .where(Group.member_count != members)
+        .values(member_count=members)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    subjects = session.execute(
+        update(Subject)
+        .where(Subject.document_count != documents)
+        .values(document_count=documents)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return {"groups": groups, "subjects": subjects}
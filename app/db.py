@@ -1,8 +1,20 @@
 import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, declarative_base
+import random
+import re
+import time
+from contextlib import contextmanager
+from functools import wraps
+import logging
+from flask import g, has_request_context, session as user_session
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
+import psycopg
 from dotenv import load_dotenv
 
+from . import metrics
+
 # Récupère l'URL de la base depuis l'environnement (PostgreSQL)
 load_dotenv()
 
@@ -13,22 +25,340 @@ if not DATABASE_URL:
         "Vérifie ton fichier .env ou tes variables d'environnement."
     )
 
-# Crée l'engine SQLAlchemy
-engine = create_engine(DATABASE_URL, echo=False, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def psycopg_url(url):
+    """
+    URL forcée sur le pilote psycopg 3 (seul pilote installé), quel que soit le schéma
+    fourni : postgres://, postgresql:// ou postgresql+psycopg2:// (hébergeurs, .env existants).
+    """
+    return re.sub(r"^postgres(ql)?(\+\w+)?://", "postgresql+psycopg://", url)
+
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    return value.lower() == "true" if value else default
+
+
+# --- Profil de l'engine (variables d'environnement) ---
+# Chaque worker gunicorn a son propre pool ; un thread utilise au plus une connexion.
+WEB_CONCURRENCY = _env_int("WEB_CONCURRENCY", 2)
+GUNICORN_THREADS = _env_int("GUNICORN_THREADS", 4)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", GUNICORN_THREADS)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", max(1, GUNICORN_THREADS // 2))
+# Plafond global de connexions côté Postgres, réparti entre les workers (0 = pas de plafond)
+DB_MAX_CONNECTIONS = _env_int("DB_MAX_CONNECTIONS", 0)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", 30000)
+# PgBouncer en mode transaction : pas de pool local ni de paramètres de session
+DB_PGBOUNCER = _env_bool("DB_PGBOUNCER", False)
+# Requêtes préparées côté serveur (psycopg 3) : une requête exécutée DB_PREPARE_THRESHOLD fois
+# sur une connexion y est préparée (plan réutilisé). Désactivé derrière PgBouncer en mode
+# transaction (une requête préparée vit sur une connexion serveur) sauf valeur explicite
+# (PgBouncer >= 1.21 avec max_prepared_statements) ; une valeur négative désactive.
+DB_PREPARE_THRESHOLD = _env_int("DB_PREPARE_THRESHOLD", -1 if DB_PGBOUNCER else 5)
+# Connexion directe à Postgres pour les migrations (verrou consultatif de session,
+# incompatible avec PgBouncer en mode transaction). Par défaut : DATABASE_URL.
+MIGRATION_DATABASE_URL = psycopg_url(os.getenv("MIGRATION_DATABASE_URL") or DATABASE_URL)
+DATABASE_URL = psycopg_url(DATABASE_URL)
+# Réplicas en lecture (optionnels, séparés par des virgules) : les SELECT des routes
+# @read_only y sont envoyés. Après une écriture, les lectures de l'utilisateur restent
+# sur le primaire pendant DB_READ_YOUR_WRITES_SECONDS (retard de réplication).
+DATABASE_REPLICA_URLS = [psycopg_url(u.strip()) for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+DB_READ_YOUR_WRITES_SECONDS = _env_int("DB_READ_YOUR_WRITES_SECONDS", 5)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool qui mesure le temps d'attente d'une connexion (métriques)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            metrics.POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+
+
+def engine_options():
+    """Arguments de create_engine() déduits des variables d'environnement."""
+    connect_args = {"prepare_threshold": DB_PREPARE_THRESHOLD if DB_PREPARE_THRESHOLD >= 0 else None}
+    if DB_PGBOUNCER:
+        # PgBouncer mutualise déjà les connexions : chaque session SQLAlchemy
+        # ouvre puis rend sa connexion client.
+        return {"echo": False, "future": True, "poolclass": NullPool, "connect_args": connect_args}
+
+    pool_size, max_overflow = DB_POOL_SIZE, DB_MAX_OVERFLOW
+    if DB_MAX_CONNECTIONS:
+        budget = max(1, DB_MAX_CONNECTIONS // WEB_CONCURRENCY)
+        pool_size = min(pool_size, budget)
+        max_overflow = min(max_overflow, budget - pool_size)
+
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    return {
+        "echo": False,
+        "future": True,
+        "poolclass": TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+def _set_statement_timeout(conn):
+    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
+
+
+def _create_engine(url):
+    new_engine = create_engine(url, **ENGINE_OPTIONS)
+    if DB_PGBOUNCER and DB_STATEMENT_TIMEOUT_MS:
+        # Les paramètres de démarrage (options=-c ...) ne traversent pas PgBouncer :
+        # on fixe le timeout au début de chaque transaction.
+        event.listen(new_engine, "begin", _set_statement_timeout)
+    return new_engine
+
+
+# Crée l'engine SQLAlchemy (primaire) et ceux des réplicas (un pool chacun)
+ENGINE_OPTIONS = engine_options()
+engine = _create_engine(DATABASE_URL)
+replica_engines = [_create_engine(url) for url in DATABASE_REPLICA_URLS]
+
+# Clé de la session Flask (cookie) : lectures sur le primaire jusqu'à cet horodatage
+PRIMARY_UNTIL_KEY = "db_primary_until"
+
+
+def _is_plain_select(clause):
+    """SELECT sans verrou (FOR UPDATE/SHARE) : seul type de requête servi par un réplica."""
+    return getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(Session):
+    """
+    Session qui choisit sa base requête par requête : les SELECT d'une session marquée
+    en lecture seule (info["read_only"], cf. read_only) vont sur un réplica, tirée une fois
+    par session ; le reste (flush, INSERT/UPDATE/DELETE, texte SQL, SELECT FOR UPDATE)
+    va sur le primaire et marque la session comme ayant écrit.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or (clause is not None and not _is_plain_select(clause)):
+            self.info["wrote"] = True
+        elif self.info.get("read_only") and replica_engines:
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(replica_engines)
+            metrics.REPLICA_QUERIES.inc()
+            return self.info["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    """Après une écriture validée : lectures de l'utilisateur sur le primaire pendant un délai."""
+    if session.info.pop("wrote", False) and replica_engines and has_request_context():
+        user_session[PRIMARY_UNTIL_KEY] = time.time() + DB_READ_YOUR_WRITES_SECONDS
+
+
+# expire_on_commit=False : la session vit toute la requête (cf. get_db), les objets
+# déjà chargés (dont current_user) restent utilisables après un commit sans être relus.
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, expire_on_commit=False, bind=engine,
+)
 Base = declarative_base()
 
+
+def _pool_stat(read):
+    """Lecture d'une statistique du pool (None si le pool n'en a pas, ex. NullPool)."""
+    def wrapper():
+        pool = engine.pool
+        return read(pool) if isinstance(pool, QueuePool) else None
+    return wrapper
+
+
+metrics.Gauge("revisia_db_pool_size", "Taille du pool de connexions", _pool_stat(lambda p: p.size()))
+metrics.Gauge("revisia_db_pool_checked_out", "Connexions actuellement empruntées", _pool_stat(lambda p: p.checkedout()))
+metrics.Gauge("revisia_db_pool_overflow", "Connexions ouvertes au-delà de pool_size", _pool_stat(lambda p: max(0, p.overflow())))
+metrics.Gauge(
+    "revisia_db_pool_utilization",
+    "Part des connexions disponibles actuellement empruntées (0 à 1)",
+    _pool_stat(lambda p: round(p.checkedout() / (p.size() + ENGINE_OPTIONS["max_overflow"]), 3)),
+)
+
+# Fichier de configuration Alembic (racine du projet)
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# Révision correspondant au schéma créé par l'ancien Base.metadata.create_all
+BASELINE_REVISION = "0001_baseline"
+
+# Verrou consultatif : un seul worker gunicorn applique les migrations
+MIGRATION_LOCK_ID = 12345
+
+
+def get_db():
+    """
+    Session SQLAlchemy de la requête en cours, partagée par load_user et les routes.
+    Créée à la première utilisation, fermée par close_db() en fin de requête :
+    une seule connexion empruntée au pool par requête.
+    """
+    if "db_session" not in g:
+        g.db_session = SessionLocal()
+    return g.db_session
+
+
+def read_only(view):
+    """
+    Route en lecture seule : ses SELECT peuvent être servis par un réplica
+    (DATABASE_REPLICA_URLS), sauf si l'utilisateur vient d'écrire (lecture de ses
+    propres écritures : primaire pendant DB_READ_YOUR_WRITES_SECONDS).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if replica_engines and user_session.get(PRIMARY_UNTIL_KEY, 0) <= time.time():
+            get_db().info["read_only"] = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def pipeline(session):
+    """
+    Mode pipeline psycopg 3 sur la connexion de la session : les requêtes dont on ne lit
+    pas le résultat (INSERT/UPSERT sans RETURNING) partent à la suite, sans attendre chacune
+    la réponse du serveur ; un seul aller-retour pour le lot.
+    Une erreur remonte à la synchronisation (lecture d'un résultat, fin du bloc).
+
+    Le commit se fait APRÈS le bloc : il rend la connexion au pool, qui la prêterait alors à
+    un autre thread encore en mode pipeline (connexion inutilisable jusqu'à la fin du bloc).
+    """
+    with session.connection().connection.driver_connection.pipeline() as lot:
+        try:
+            yield
+        except DBAPIError:
+            # Erreur remontée en cours de bloc (lecture d'un résultat) : les requêtes suivantes
+            # du lot sont abandonnées par le serveur ; les récupérer ici laisse la sortie du
+            # pipeline propre, et seule l'erreur d'origine remonte
+            try:
+                lot.sync()
+            except psycopg.Error:
+                pass
+            raise
+
+
+def commit_pending(response):
+    """
+    Avant l'envoi de la réponse : commit des modifications restées en attente. Le marqueur
+    de lecture de ses écritures (PRIMARY_UNTIL_KEY, posé au commit) part ainsi dans le
+    cookie de session de cette réponse ; un commit en teardown arriverait après son envoi.
+    Un échec remonte (erreur 500) au lieu d'une réponse de succès pour une écriture perdue.
+    Réponse d'erreur (exception dans la route) : rien n'est validé, close_db annule.
+    """
+    session = g.get("db_session")
+    if response.status_code >= 500 or session is None:
+        return response
+    if session.new or session.dirty or session.deleted:
+        session.commit()
+    return response
+
+
+def close_db(exception=None):
+    """
+    Fin de requête : rollback si la requête a échoué, commit des modifications
+    restées en attente (réponses sans passage par commit_pending), puis restitution
+    de la connexion au pool.
+    """
+    session = g.pop("db_session", None)
+    if session is None:
+        return
+    try:
+        if exception is not None:
+            session.rollback()
+        elif session.new or session.dirty or session.deleted:
+            session.commit()
+    except Exception:
+        logging.getLogger("app.db").exception("Échec du commit en fin de requête")
+        session.rollback()
+    finally:
+        session.close()
+
+
+def create_autocommit_engine(url):
+    """
+    Engine des stockages annexes (cache partagé, compteurs de rate limiting) : une requête
+    courte en autocommit par appel, hors de la session de la requête HTTP et de son pool.
+    Une connexion permanente par worker, les autres ouvertes à la demande.
+    """
+    options = {**ENGINE_OPTIONS, "isolation_level": "AUTOCOMMIT"}
+    if "pool_size" in options:
+        options.update(poolclass=QueuePool, pool_size=1, max_overflow=GUNICORN_THREADS)
+    return create_engine(psycopg_url(url), **options)
+
+
+def create_migration_engine():
+    """Engine dédié aux migrations : connexion directe, sans pool ni statement_timeout."""
+    return create_engine(MIGRATION_DATABASE_URL, poolclass=NullPool, future=True)
+
+
+def run_migrations(connection):
+    """
+    Applique les migrations Alembic jusqu'à 'head' sur la connexion donnée.
+    Une base créée avant Alembic (tables présentes, pas de table alembic_version)
+    est d'abord marquée comme étant au schéma initial.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+
+    tables = inspect(connection).get_table_names()
+    # Alembic doit démarrer hors transaction pour pouvoir gérer ses propres
+    # blocs autocommit (CREATE INDEX CONCURRENTLY)
+    connection.commit()
+    if "users" in tables and "alembic_version" not in tables:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
 def init_db(app=None):
     """
-    Initialise la base (crée les tables si besoin).
+    Initialise la base : applique les migrations Alembic en attente et,
+    si une app est fournie, y rattache la session par requête (commit_pending, close_db).
     """
-    import logging
     logger = logging.getLogger("app.db")
-    logger.info(f"Base de données : {DATABASE_URL}")
-
-    from .models import question_type_enum
-    with engine.connect() as conn:
-        conn.execute(text("SELECT pg_advisory_xact_lock(12345)"))
-        question_type_enum.create(bind=engine, checkfirst=True)
-        Base.metadata.create_all(bind=engine)
-        conn.commit()
\ No newline at end of file
+    logger.info(f"Base de données : {engine.url.render_as_string(hide_password=True)}")
+
+    migration_engine = create_migration_engine()
+    try:
+        with migration_engine.connect() as conn:
+            # Pas de statement_timeout pour les migrations (index sur de grosses tables)
+            conn.execute(text("SET statement_timeout = 0"))
+            # Verrou de session (et non de transaction) : certaines migrations
+            # committent en cours de route (CREATE INDEX CONCURRENTLY).
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            conn.commit()
+            try:
+                run_migrations(conn)
+                conn.commit()
+            finally:
+                conn.rollback()
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                conn.commit()
+    finally:
+        migration_engine.dispose()
+
+    if app is not None:
+        app.after_request(commit_pending)
+        app.teardown_appcontext(close_db)
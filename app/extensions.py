@@ -2,9 +2,10 @@
 # Extensions Flask partagées (évite les imports circulaires).
 # On crée les instances ici, on les initialise dans __init__.py avec init_app().
 
+import os
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from .ratelimit import default_limit, user_or_ip_key  # enregistre aussi le stockage postgresql://
 
 # --- Protection CSRF ---
 # Génère un token secret unique par session.
@@ -13,10 +14,16 @@ from flask_limiter.util import get_remote_address
 csrf = CSRFProtect()
 
 # --- Rate Limiter ---
-# Limite le nombre de requêtes par IP pour éviter le spam et le brute-force.
+# Limite le nombre de requêtes pour éviter le spam et le brute-force.
 # Format : "X per minute" ou "X per hour"
 limiter = Limiter(
-    key_func=get_remote_address,       # On identifie chaque visiteur par son IP
-    default_limits=["120 per minute"],  # Règle globale par défaut
-    storage_uri="memory://",           # Stockage en mémoire (suffisant pour un petit projet)
+    # Chaque utilisateur connecté a son propre budget ; un visiteur anonyme est identifié
+    # par son IP (plafond relevé pour les réseaux d'établissement, cf. app/ratelimit.py)
+    key_func=user_or_ip_key,
+    default_limits=[default_limit],  # Règle globale par défaut (RATELIMIT_DEFAULT)
+    # Compteurs : en mémoire par worker par défaut, partagés entre workers avec une URL
+    # PostgreSQL ou Redis (cf. app/ratelimit.py)
+    storage_uri=os.getenv("RATELIMIT_STORAGE_URI", "memory://"),
+    # Stockage partagé injoignable : repli temporaire sur des compteurs en mémoire du worker
+    in_memory_fallback_enabled=True,
 )
@@ -0,0 +1,215 @@
+# app/fanout.py
+# Processus de diffusion des flux SSE (flask --app run.py fanout) : un serveur asyncio qui
+# tient les flux longs du classement en direct (pages d'événement ouvertes) et de la
+# progression des générations de quiz. Un flux en attente n'y coûte qu'une coroutine et un
+# socket : une classe entière peut garder la page ouverte pendant tout l'événement sans
+# occuper les threads des workers gunicorn.
+#
+# - UNE connexion PostgreSQL en LISTEN (canaux event_leaderboard et generation_jobs) ;
+#   chaque message est recopié tel quel aux flux de sa clé, sans requête SQL ;
+# - accès par jeton signé (SECRET_KEY) remis par le worker (page de l'événement pour un
+#   membre du groupe, réponse de POST /api/quizzes/jobs pour son auteur) : le processus ne
+#   lit ni session Flask ni base ;
+# - activé par LEADERBOARD_STREAM_URL (URL publique du processus, vue du navigateur) ;
+#   sans elle, les flux sont servis par les workers (/events/<id>/leaderboard/stream,
+#   /api/quizzes/jobs/<id>/events), au plus SSE_MAX_STREAMS par worker.
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from urllib.parse import parse_qs, urlsplit
+import psycopg
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy.engine import make_url
+from . import db
+from .generation import CHANNEL as JOB_CHANNEL, FINISHED
+from .leaderboard import CHANNEL
+from .notify import SSE_KEEPALIVE, sse
+
+logger = logging.getLogger("app.fanout")
+
+FANOUT_URL = os.getenv("LEADERBOARD_STREAM_URL", "").rstrip("/")
+TOKEN_SALT = "leaderboard-stream"
+JOB_TOKEN_SALT = "generation-stream"
+JOB_STREAM_TTL = 3600  # secondes de validité du jeton d'une génération (puis le client interroge)
+REQUEST_TIMEOUT = 10  # secondes pour recevoir la requête HTTP
+
+_STREAM_PATH = re.compile(r"/events/([^/]+)/leaderboard/stream")
+_JOB_PATH = re.compile(r"/jobs/([^/]+)/events")
+_RESYNC = object()
+
+
+# --- Jetons d'accès ---
+def stream_token(secret_key, event_id, end_date):
+    """Jeton d'abonnement au classement de l'événement, valable jusqu'à sa fin."""
+    return URLSafeSerializer(secret_key, salt=TOKEN_SALT).dumps({"event": event_id, "end": end_date.timestamp()})
+
+
+def job_token(secret_key, job_id):
+    """Jeton d'abonnement à la progression d'une génération, valable JOB_STREAM_TTL secondes."""
+    return URLSafeSerializer(secret_key, salt=JOB_TOKEN_SALT).dumps({"job": job_id, "end": time.time() + JOB_STREAM_TTL})
+
+
+def read_token(secret_key, token, salt=TOKEN_SALT):
+    """Contenu du jeton ({"event", "end"} ou {"job", "end"}), None s'il est invalide."""
+    try:
+        return URLSafeSerializer(secret_key, salt=salt).loads(token)
+    except BadSignature:
+        return None
+
+
+def stream_url(secret_key, event):
+    """URL du flux de l'événement sur le processus de diffusion (LEADERBOARD_STREAM_URL)."""
+    return f"{FANOUT_URL}/events/{event.id}/leaderboard/stream?token={stream_token(secret_key, event.id, event.end_date)}"
+
+
+def job_stream_url(secret_key, job):
+    """URL du flux de progression de la génération sur le processus de diffusion."""
+    return f"{FANOUT_URL}/jobs/{job.id}/events?token={job_token(secret_key, job.id)}"
+
+
+# --- Abonnements ---
+class Hub:
+    """Connexion LISTEN du processus et files des flux abonnés, par canal et clé."""
+
+    def __init__(self):
+        self.subscribers = {}  # (canal, clé) -> ensemble de files
+        self.ready = asyncio.Event()
+        self.conninfo = make_url(db.MIGRATION_DATABASE_URL).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+
+    def subscribe(self, channel, key):
+        messages = asyncio.Queue()
+        self.subscribers.setdefault((channel, key), set()).add(messages)
+        return messages
+
+    def unsubscribe(self, channel, key, messages):
+        subscribers = self.subscribers.get((channel, key), set())
+        subscribers.discard(messages)
+        if not subscribers:
+            self.subscribers.pop((channel, key), None)
+
+    def dispatch(self, channel, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Notification illisible : {payload[:100]}")
+            return
+        key = message.pop("key", None)
+        for messages in self.subscribers.get((channel, key), ()):
+            messages.put_nowait(message)
+
+    async def listen(self):
+        """Relaie les NOTIFY aux abonnés ; après une coupure, chaque flux reçoit « resync »."""
+        delay = 1
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True) as conn:
+                    for channel in (CHANNEL, JOB_CHANNEL):
+                        await conn.execute(f'LISTEN "{channel}"')
+                    self.ready.set()
+                    delay = 1
+                    async for notify in conn.notifies():
+                        self.dispatch(notify.channel, notify.payload)
+            except psycopg.Error as e:
+                logger.warning(f"Connexion LISTEN perdue ({e}), nouvelle tentative dans {delay}s")
+                self.ready.clear()
+                for queues in self.subscribers.values():
+                    for messages in queues:
+                        messages.put_nowait(_RESYNC)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+# --- Serveur HTTP ---
+def _response(writer, status, headers=(), body=""):
+    head = [f"HTTP/1.1 {status}", "Connection: close", "Access-Control-Allow-Origin: *", *headers]
+    writer.write(("\r\n".join(head) + "\r\n\r\n" + body).encode())
+
+
+async def _read_request(reader):
+    """Chemin et paramètres de la requête (les en-têtes sont ignorés)."""
+    request_line = await reader.readline()
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    url = urlsplit(target)
+    return method, url.path, parse_qs(url.query)
+
+
+async def _stream(hub, writer, channel, key, end, last=None):
+    """Relaie les messages de (channel, key) jusqu'à `end`, ou jusqu'au message `last`."""
+    messages = hub.subscribe(channel, key)
+    try:
+        _response(writer, "200 OK", ["Content-Type: text/event-stream", "Cache-Control: no-cache"], ": connecté\n\n")
+        await writer.drain()
+        while time.time() < end:
+            try:
+                message = await asyncio.wait_for(messages.get(), timeout=SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                writer.write(b": keepalive\n\n")
+            else:
+                writer.write((sse({}, "resync") if message is _RESYNC else sse(message)).encode())
+                if last and message is not _RESYNC and last(message):
+                    return
+            await writer.drain()
+        writer.write(sse({}, "ended").encode())
+        await writer.drain()
+    finally:
+        hub.unsubscribe(channel, key, messages)
+
+
+def _job_finished(message):
+    return message.get("status") in FINISHED
+
+
+async def handle(hub, secret_key, reader, writer):
+    """
+    Une connexion : GET /events/<id>/leaderboard/stream?token=..., GET /jobs/<id>/events?token=...
+    (fin du flux avec l'état final de la génération), ou GET /health.
+    """
+    try:
+        method, path, query = await asyncio.wait_for(_read_request(reader), REQUEST_TIMEOUT)
+        token = query.get("token", [""])[0]
+        if match := _STREAM_PATH.fullmatch(path):
+            grant, channel, last = read_token(secret_key, token), CHANNEL, None
+            allowed = grant is not None and grant["event"] == match.group(1)
+        elif match := _JOB_PATH.fullmatch(path):
+            grant, channel, last = read_token(secret_key, token, JOB_TOKEN_SALT), JOB_CHANNEL, _job_finished
+            allowed = grant is not None and grant["job"] == match.group(1)
+        if method != "GET":
+            _response(writer, "405 Method Not Allowed")
+        elif path == "/health":
+            _response(writer, "200 OK", ["Content-Type: text/plain"], "ok")
+        elif not match:
+            _response(writer, "404 Not Found")
+        elif not allowed:
+            _response(writer, "403 Forbidden")
+        else:
+            await _stream(hub, writer, channel, match.group(1), grant["end"], last)
+        await writer.drain()
+    except (ConnectionError, asyncio.TimeoutError, ValueError):
+        pass  # client parti ou requête illisible
+    finally:
+        writer.close()
+
+
+async def serve(secret_key, host, port, started=None):
+    """Sert les flux jusqu'à l'arrêt du processus. `started` : appelé avec le serveur une fois prêt."""
+    hub = Hub()
+    listener = asyncio.create_task(hub.listen())
+    server = await asyncio.start_server(lambda r, w: handle(hub, secret_key, r, w), host, port)
+    await hub.ready.wait()
+    logger.info(f"Diffusion des flux SSE sur {host}:{port}")
+    if started:
+        started(server)
+    try:
+        await asyncio.Future()  # jusqu'à l'arrêt du processus
+    finally:
+        listener.cancel()
+        server.close()
+        server.close_clients()  # flux ouverts coupés : les navigateurs se reconnectent
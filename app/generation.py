@@ -0,0 +1,222 @@
+# app/generation.py
+# Générations de quiz en arrière-plan (POST /api/quizzes/jobs, cf. app/routes/quizzes.py) :
+# - la route réserve le quota, crée une ligne generation_jobs « queued » et répond aussitôt ;
+# - un pool de threads du worker (GENERATION_WORKERS) découpe le cours en parties
+#   d'environ GENERATION_CHUNK_WORDS mots et appelle le modèle pour chacune ; les questions
+#   sont mises de côté dans la ligne (staged_questions) et n'entrent dans la table questions
+#   qu'avec le statut « done » : le cours n'est jouable (et « déjà généré ») qu'une fois
+#   la génération terminée ;
+# - chaque étape met à jour la ligne et publie un NOTIFY (canal generation_jobs), relayé au
+#   navigateur par le flux SSE GET /api/quizzes/jobs/<id>/events.
+#
+# Échec : les questions mises de côté sont abandonnées et la réservation de quota est
+# rendue (tout ou rien, comme la génération synchrone). Une génération restée sans nouvelle
+# GENERATION_JOB_TIMEOUT secondes (worker arrêté pendant l'appel au modèle) est déclarée
+# échouée à la demande suivante sur le même cours. Chaque écriture de la génération se fait
+# sous verrou de sa ligne, après avoir vérifié qu'elle est toujours en cours : un thread qui
+# reprend après cette déclaration s'arrête sans rien écrire.
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from sqlalchemy import func, select
+from . import notify
+from .db import SessionLocal
+from .extract import count_words
+from .llm import generate_quiz_from_text, last_token_count, split_course
+from .models import Document, GenerationJob, Question, QuestionType, new_id
+from .quota import record_tokens, release_generation
+
+logger = logging.getLogger("app.generation")
+
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "2"))
+GENERATION_CHUNK_WORDS = int(os.getenv("GENERATION_CHUNK_WORDS", "800"))
+GENERATION_JOB_TIMEOUT = int(os.getenv("GENERATION_JOB_TIMEOUT", "300"))
+
+CHANNEL = "generation_jobs"
+ACTIVE = ("queued", "running")
+FINISHED = ("done", "failed")
+
+ERROR_MESSAGES = {
+    "quota_exceeded": "Service temporairement indisponible. Réessaie plus tard.",
+    "error": "Erreur lors de la génération. Réessaie.",
+}
+
+_executor = ThreadPoolExecutor(max_workers=GENERATION_WORKERS, thread_name_prefix="generation")
+
+
+def calculate_questions_count(word_count: int) -> int:
+    """
+    Calcule le nombre de questions optimal basé sur le nombre de mots.
+    - < 800 mots : 30 questions (Petit cours)
+    - 800-1500 mots : 40 questions (Moyen cours)
+    - > 1500 mots : 50 questions (Grand cours)
+    """
+    if word_count < 800:
+        return 30
+    elif word_count <= 1500:
+        return 40
+    else:
+        return 50
+
+
+def question_from_item(document_id, item):
+    """Question à enregistrer à partir d'un élément renvoyé par le modèle."""
+    return Question(
+        id=new_id(),
+        document_id=document_id,
+        type=QuestionType.qcm if item["type"] == "qcm" else QuestionType.ouverte,
+        question=item["question"],
+        choices=item.get("choices"),
+        answer=item.get("answer"),
+        explanation=item.get("explanation"),
+    )
+
+
+def split_questions(total, part_words):
+    """Répartit `total` questions entre les parties, au prorata de leurs mots (au moins 1 chacune)."""
+    words = sum(part_words) or 1
+    counts = [max(1, round(total * w / words)) for w in part_words]
+    counts[-1] = max(1, counts[-1] + total - sum(counts))
+    return counts
+
+
+# --- État d'une génération ---
+def job_state(job):
+    """État publié aux clients (réponse JSON et messages SSE)."""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "chunks_done": job.chunks_done,
+        "chunks_total": job.chunks_total,
+        "questions": job.questions_count,
+        "error": job.error,
+    }
+
+
+def _publish(session, job):
+    notify.publish(session, CHANNEL, job.id, **job_state(job))
+
+
+def active_job(session, document_id):
+    """Génération en cours pour le cours, None s'il n'y en a pas (une génération expirée est déclarée échouée)."""
+    row = (
+        session.query(
+            GenerationJob,
+            GenerationJob.updated_at < func.localtimestamp() - timedelta(seconds=GENERATION_JOB_TIMEOUT),
+        )
+        .filter(GenerationJob.document_id == document_id, GenerationJob.status.in_(ACTIVE))
+        .with_for_update(of=GenerationJob)  # pas de déclaration d'échec pendant une écriture du thread
+        .populate_existing()  # état relu sous verrou, même si la ligne est déjà dans la session
+        .first()
+    )
+    if row is None:
+        return None
+    job, expired = row
+    if expired:
+        logger.warning(f"Génération {job.id} sans nouvelle depuis {GENERATION_JOB_TIMEOUT}s : abandonnée")
+        _fail(session, job, ERROR_MESSAGES["error"])
+        session.flush()
+        return None
+    return job
+
+
+def create_job(session, user_id, document_id, quota_day):
+    """Nouvelle génération « queued » (à lancer avec start() après le commit)."""
+    job = GenerationJob(
+        user_id=user_id, document_id=document_id, status="queued",
+        chunks_done=0, questions_count=0, quota_day=quota_day,
+    )
+    session.add(job)
+    session.flush()
+    _publish(session, job)
+    return job
+
+
+def start(job_id):
+    """Lance la génération dans le pool de threads du worker."""
+    _executor.submit(run_job, job_id)
+
+
+def _fail(session, job, message):
+    """Génération échouée : questions mises de côté abandonnées, quota rendu, clients notifiés."""
+    release_generation(session, job.user_id, job.quota_day)
+    job.status, job.error, job.staged_questions = "failed", message, []
+    _publish(session, job)
+
+
+def _still_running(session, job_id):
+    """
+    Verrouille la ligne de la génération jusqu'au commit et vérifie qu'elle est toujours
+    « running » (ni déclarée échouée par active_job, ni supprimée avec son cours).
+    """
+    status = session.execute(
+        select(GenerationJob.status).where(GenerationJob.id == job_id).with_for_update()
+    ).scalar()
+    return status == "running"
+
+
+def _abandon(session, job):
+    """La génération a été déclarée échouée (ou supprimée) pendant l'appel au modèle : rien n'est écrit."""
+    session.rollback()
+    logger.warning(f"Génération {job.id} plus en cours (déclarée échouée ou cours supprimé) : arrêt")
+
+
+# --- Exécution (thread du pool) ---
+def run_job(job_id):
+    """Génère le quiz partie par partie, en publiant la progression après chaque partie."""
+    session = SessionLocal()
+    try:
+        job = session.get(GenerationJob, job_id, with_for_update=True)
+        if job is None or job.status != "queued":
+            session.rollback()
+            return
+        document = session.get(Document, job.document_id)
+        parts = split_course(document.content, GENERATION_CHUNK_WORDS)
+        counts = split_questions(
+            calculate_questions_count(count_words(document.content)), [count_words(p) for p in parts]
+        )
+        job.status, job.chunks_total = "running", len(parts)
+        _publish(session, job)
+        session.commit()
+
+        for part, count in zip(parts, counts):
+            questions, error = generate_quiz_from_text(part, total_questions=count)
+            if not _still_running(session, job.id):
+                _abandon(session, job)
+                return
+            if error:
+                logger.error(f"Génération {job.id} : erreur « {error} » sur la partie {job.chunks_done + 1}/{len(parts)}")
+                _fail(session, job, ERROR_MESSAGES[error])
+                session.commit()
+                return
+            job.staged_questions = [*job.staged_questions, *questions]
+            record_tokens(session, job.user_id, job.quota_day, last_token_count())
+            job.chunks_done += 1
+            job.questions_count += len(questions)
+            _publish(session, job)
+            session.commit()
+
+        if not _still_running(session, job.id):
+            _abandon(session, job)
+            return
+        if not job.questions_count:
+            _fail(session, job, "Aucune question générée")
+        else:
+            # Questions visibles d'un bloc, dans la transaction qui termine la génération
+            session.add_all(question_from_item(job.document_id, q) for q in job.staged_questions)
+            job.status, job.staged_questions = "done", []
+            _publish(session, job)
+            logger.info(f"Quiz généré : {job.questions_count} questions pour '{document.title}' ({len(parts)} parties)")
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Erreur inattendue génération {job_id} : {e}")
+        job = session.get(GenerationJob, job_id, with_for_update=True)
+        if job is not None and job.status in ACTIVE:
+            _fail(session, job, ERROR_MESSAGES["error"])
+        session.commit()
+    finally:
+        session.close()
+
@@ -0,0 +1,193 @@
+# app/leaderboard.py
+# Classement des événements : une ligne par (événement, participant) dans event_leaderboard,
+# mise à jour dans la même transaction que la participation (submit_quiz).
+#
+# Ordre du classement : bonnes réponses (décroissant), puis temps total (croissant).
+# La page de classement n'affiche qu'une tranche autour de l'utilisateur : son coût
+# ne dépend pas du nombre de participants (lectures par plage sur l'index de classement).
+#
+# Classement en direct : chaque participation publie un NOTIFY (canal event_leaderboard)
+# avec la nouvelle ligne du participant, son rang et le nombre de participants ; les pages
+# ouvertes le reçoivent par le flux SSE /events/<id>/leaderboard/stream et mettent à jour
+# leur tranche sans recharger (ni relire la base).
+
+from sqlalchemy import Integer, bindparam, func, over, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from .models import EventLeaderboard, User
+from .pagination import key_values
+
+# Clé de tri (même expression que l'index ix_event_leaderboard_ranking)
+SORT_KEY = (-EventLeaderboard.total_correct, EventLeaderboard.total_time, EventLeaderboard.user_id)
+SCORE_KEY = SORT_KEY[:2]  # clé sans départage : deux lignes égales ont le même rang
+
+PODIUM_SIZE = 3
+
+CHANNEL = "event_leaderboard"
+
+# Écrit en SQL pour calculer le message côté serveur, dans la transaction de la participation :
+# le SELECT part dans le même lot que l'upsert (mode pipeline), sans aller-retour de plus
+_PUBLISH = text("""
+    SELECT pg_notify(:channel, json_build_object(
+        'key', l.event_id,
+        'user_id', l.user_id,
+        'username', u.username,
+        'total_correct', l.total_correct,
+        'total_questions', l.total_questions,
+        'total_time', l.total_time,
+        'quiz_count', l.quiz_count,
+        'gained', json_build_object('correct', :correct, 'questions', :questions, 'time', :time_spent),
+        'rank', 1 + (
+            SELECT count(*) FROM event_leaderboard b
+            WHERE b.event_id = l.event_id AND (-b.total_correct, b.total_time) < (-l.total_correct, l.total_time)
+        ),
+        'total_participants', (SELECT count(*) FROM event_leaderboard b WHERE b.event_id = l.event_id)
+    )::text)
+    FROM event_leaderboard l JOIN users u ON u.id = l.user_id
+    WHERE l.event_id = :event_id AND l.user_id = :user_id
+""").bindparams(
+    bindparam("correct", type_=Integer), bindparam("questions", type_=Integer), bindparam("time_spent", type_=Integer),
+)
+
+
+def record_participation(session, event_id, user_id, correct, total, time_spent):
+    """Ajoute le résultat d'un quiz au classement de l'événement (upsert atomique)."""
+    stmt = insert(EventLeaderboard).values(
+        event_id=event_id,
+        user_id=user_id,
+        total_correct=correct,
+        total_questions=total,
+        total_time=time_spent or 0,
+        quiz_count=1,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EventLeaderboard.event_id, EventLeaderboard.user_id],
+        set_={
+            "total_correct": EventLeaderboard.total_correct + stmt.excluded.total_correct,
+            "total_questions": EventLeaderboard.total_questions + stmt.excluded.total_questions,
+            "total_time": EventLeaderboard.total_time + stmt.excluded.total_time,
+            "quiz_count": EventLeaderboard.quiz_count + 1,
+            "updated_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+
+
+def publish_participation(session, event_id, user_id, correct, total, time_spent):
+    """
+    Publie la nouvelle ligne du participant aux pages de classement ouvertes (délivré au
+    commit). `correct`, `total`, `time_spent` : le quiz qui vient d'être ajouté, pour que
+    les pages retrouvent la position précédente du participant.
+    """
+    session.execute(_PUBLISH, {
+        "channel": CHANNEL, "event_id": event_id, "user_id": user_id,
+        "correct": correct, "questions": total, "time_spent": time_spent or 0,
+    })
+
+
+def _count_before(session, event_id, key_columns, values):
+    """Nombre de lignes de l'événement placées strictement avant la clé donnée."""
+    return session.execute(
+        select(func.count())
+        .select_from(EventLeaderboard)
+        .where(EventLeaderboard.event_id == event_id, tuple_(*key_columns) < key_values(key_columns, values))
+    ).scalar()
+
+
+def _slice(session, event_id, key=None, before=0, after=10):
+    """
+    Lignes autour d'une clé de tri : `before` lignes avant, la clé et `after - 1` lignes après.
+    Le rang local (fonction de fenêtre rank()) est calculé sur la tranche.
+    """
+    columns = (
+        EventLeaderboard.user_id,
+        User.username,
+        EventLeaderboard.total_correct,
+        EventLeaderboard.total_questions,
+        EventLeaderboard.total_time,
+        EventLeaderboard.quiz_count,
+    )
+    base = (
+        select(*columns)
+        .join(User, User.id == EventLeaderboard.user_id)
+        .where(EventLeaderboard.event_id == event_id)
+    )
+    parts = []
+    if key is not None and before:
+        parts.append(
+            base.where(tuple_(*SORT_KEY) < key_values(SORT_KEY, key))
+            .order_by(*(c.desc() for c in SORT_KEY)).limit(before)
+        )
+    following = base.order_by(*SORT_KEY).limit(after)
+    if key is not None:
+        following = following.where(tuple_(*SORT_KEY) >= key_values(SORT_KEY, key))
+    parts.append(following)
+
+    page = (parts[0].union_all(*parts[1:]) if len(parts) > 1 else parts[0]).subquery()
+    order = (-page.c.total_correct, page.c.total_time, page.c.user_id)
+    local_rank = over(func.rank(), order_by=(-page.c.total_correct, page.c.total_time))
+    stmt = select(page, local_rank.label("local_rank")).order_by(*order)
+    return session.execute(stmt).mappings().all()
+
+
+def leaderboard_page(session, event_id, user_id, window=10):
+    """
+    Tranche du classement centrée sur l'utilisateur (`window` lignes de part et d'autre),
+    précédée du podium si la tranche ne commence pas au premier rang.
+    Retourne {"rows", "podium", "me", "total_participants", "has_more_above", "has_more_below"}.
+    """
+    me = session.get(EventLeaderboard, (event_id, user_id))
+    if me is None:
+        rows = _slice(session, event_id, after=2 * window)
+        first_position = 0
+    else:
+        key = (-me.total_correct, me.total_time, me.user_id)
+        rows = _slice(session, event_id, key=key, before=window, after=window + 1)
+        my_position = _count_before(session, event_id, SORT_KEY, key)
+        first_position = my_position - sum(1 for r in rows if (-r["total_correct"], r["total_time"], r["user_id"]) < key)
+
+    ranking = _with_global_rank(session, event_id, rows, first_position, user_id)
+
+    podium = []
+    if ranking and first_position > 0:
+        top_rows = _slice(session, event_id, after=min(PODIUM_SIZE, first_position))
+        podium = _with_global_rank(session, event_id, top_rows, 0, user_id)
+
+    total = session.execute(
+        select(func.count()).select_from(EventLeaderboard).where(EventLeaderboard.event_id == event_id)
+    ).scalar()
+    return {
+        "rows": ranking,
+        "podium": podium,
+        "me": next((r for r in ranking if r["is_current_user"]), None),
+        "total_participants": total,
+        "has_more_above": first_position > len(podium),
+        "has_more_below": first_position + len(ranking) < total,
+    }
+
+
+def _with_global_rank(session, event_id, rows, first_position, user_id):
+    """
+    Convertit le rang local de la tranche en rang global.
+    - Lignes à égalité avec la première de la tranche : 1 + nombre de lignes strictement meilleures.
+    - Les autres : toutes les lignes avant la tranche sont strictement meilleures,
+      rang = position de la tranche + rang local.
+    """
+    if not rows:
+        return []
+    top = rows[0]
+    top_rank = 1 + (
+        _count_before(session, event_id, SCORE_KEY, (-top["total_correct"], top["total_time"]))
+        if first_position else 0
+    )
+    return [
+        {
+            "rank": top_rank if r["local_rank"] == 1 else first_position + r["local_rank"],
+            "user": {"id": r["user_id"], "username": r["username"]},
+            "total_correct": r["total_correct"],
+            "total_questions": r["total_questions"],
+            "total_time": r["total_time"],
+            "quiz_count": r["quiz_count"],
+            "is_current_user": r["user_id"] == user_id,
+        }
+        for r in rows
+    ]
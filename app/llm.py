@@ -4,6 +4,7 @@ import os
 import json
 import random
 import logging
+import threading
 from typing import List, Tuple, Optional
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
@@ -26,6 +27,14 @@ API_KEYS = [k for k in [
 
 logger = logging.getLogger("app.llm")
 
+# Tokens consommés par le dernier appel du thread courant (comptés dans le quota journalier)
+_usage = threading.local()
+
+
+def last_token_count() -> int:
+    """Tokens consommés par le dernier appel Gemini du thread courant (0 en mode mock ou en cas d'erreur)."""
+    return getattr(_usage, "tokens", 0)
+
 
 # --- Modèle de sortie attendu ---
 class QuizItem(BaseModel):
@@ -112,6 +121,24 @@ def generate_mock_quiz(text: str, total_questions: int) -> List[dict]:
     return questions
 
 
+def split_course(text: str, max_words: int) -> List[str]:
+    """
+    Découpe le cours en parties d'environ `max_words` mots, aux limites de paragraphes
+    (un paragraphe plus long reste entier). Chaque partie fait l'objet d'un appel au modèle.
+    """
+    parts, current, count = [], [], 0
+    for paragraph in (p for p in text.split("\n") if p.strip()):
+        words = len(paragraph.split())
+        if current and count + words > max_words:
+            parts.append("\n".join(current))
+            current, count = [], 0
+        current.append(paragraph)
+        count += words
+    if current:
+        parts.append("\n".join(current))
+    return parts or [text]
+
+
 def generate_quiz_from_text(text: str, total_questions: int) -> Tuple[List[dict], Optional[str]]:
     """
     Appelle le modèle Gemini pour générer un quiz structuré.
@@ -119,6 +146,7 @@ def generate_quiz_from_text(text: str, total_questions: int) -> Tuple[List[dict]
     Retourne (questions, error) : questions est une liste, error est None ou un code d'erreur.
     Codes d'erreur : "quota_exceeded", "error"
     """
+    _usage.tokens = 0
     if MOCK_MODE:
         return generate_mock_quiz(text, total_questions=100), None
 
@@ -141,6 +169,8 @@ def generate_quiz_from_text(text: str, total_questions: int) -> Tuple[List[dict]
             )
 
             quiz = QuizResponse.model_validate_json(response.text)
+            tokens = getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+            _usage.tokens = tokens if isinstance(tokens, int) else 0
             if i > 0:
                 logger.info(f"Fallback clé {i + 1} a fonctionné")
             return [item.model_dump() for item in quiz.items], None
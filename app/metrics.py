@@ -0,0 +1,142 @@
+# app/metrics.py
+# Métriques applicatives minimales au format texte Prometheus.
+# Pas de dépendance externe : compteurs et histogrammes en mémoire, protégés par un verrou
+# (plusieurs threads par worker gunicorn). Chaque worker expose ses propres valeurs,
+# étiquetées par son PID.
+
+import os
+import threading
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class Counter:
+    """Compteur monotone."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0.0
+        _registry.append(self)
+
+    def inc(self, amount=1):
+        with _lock:
+            self.value += amount
+
+    def collect(self, labels):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        yield f"{self.name}{_labels(labels)} {self.value}"
+
+
+class LabeledCounter:
+    """Compteurs monotones, un par combinaison de valeurs des étiquettes `labelnames`."""
+
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        _registry.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with _lock:
+            self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def collect(self, labels):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels({**labels, **dict(zip(self.labelnames, label_values))})} {value}"
+
+
+class Histogram:
+    """
+    Histogramme à seuils fixes. `buckets` : seuils dans l'unité de la mesure observée
+    (secondes, nombre de requêtes...), à indiquer dans le nom de la métrique et à la
+    création de chaque histogramme.
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        _registry.append(self)
+
+    def observe(self, value):
+        with _lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    def collect(self, labels):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for bound, count in zip(self.buckets, self.counts):
+            yield f"{self.name}_bucket{_labels({**labels, 'le': bound})} {count}"
+        yield f"{self.name}_bucket{_labels({**labels, 'le': '+Inf'})} {self.count}"
+        yield f"{self.name}_sum{_labels(labels)} {self.sum}"
+        yield f"{self.name}_count{_labels(labels)} {self.count}"
+
+
+class Gauge:
+    """Jauge dont la valeur est lue au moment de l'export (fonction sans argument)."""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+        _registry.append(self)
+
+    def collect(self, labels):
+        value = self.read()
+        if value is None:
+            return
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name}{_labels(labels)} {value}"
+
+
+def render():
+    """Toutes les métriques enregistrées, au format d'exposition texte Prometheus."""
+    labels = {"pid": os.getpid()}
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.collect(labels))
+    return "\n".join(lines) + "\n"
+
+
+# --- Pool de connexions SQLAlchemy (alimentées par app.db) ---
+POOL_CHECKOUT_SECONDS = Histogram(
+    "revisia_db_pool_checkout_seconds",
+    "Temps d'attente pour obtenir une connexion du pool (secondes)",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],  # secondes
+)
+POOL_TIMEOUTS = Counter(
+    "revisia_db_pool_timeouts_total",
+    "Demandes de connexion abandonnées (pool épuisé au-delà de DB_POOL_TIMEOUT)",
+)
+REPLICA_QUERIES = Counter(
+    "revisia_db_replica_queries_total",
+    "Requêtes SQL servies par un réplica en lecture (DATABASE_REPLICA_URLS)",
+)
+
+
+# --- Caches de modèles de lecture (alimentées par app.cache) ---
+CACHE_REQUESTS = LabeledCounter(
+    "revisia_cache_requests_total",
+    "Lectures des caches de modèles de lecture, par cache et par résultat (local, shared, miss)",
+    labelnames=("cache", "result"),
+)
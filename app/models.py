@@ -2,8 +2,9 @@ import uuid
 import enum
 import random
 import string
-from sqlalchemy import Boolean, Column, Text, DateTime, ForeignKey, Enum as SAEnum, JSON, Integer, Float
+from sqlalchemy import BigInteger, Boolean, Column, Computed, Date, Text, DateTime, ForeignKey, Enum as SAEnum, JSON, Integer, Float, Index, LargeBinary, UniqueConstraint, Uuid
 from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
@@ -24,6 +25,24 @@ question_type_enum = SAEnum(
 )
 
 
+# --- Identifiants : UUID natifs PostgreSQL ---
+# Stockés en colonne "uuid" (16 octets au lieu de 36 en texte), manipulés en str côté Python.
+UUID = Uuid(as_uuid=False)
+
+
+def new_id() -> str:
+    """UUIDv7 : préfixe horodaté → insertions en fin d'index B-tree (meilleure localité)."""
+    return str(uuid.uuid7())
+
+
+def parse_uuid(value) -> str | None:
+    """Identifiant reçu du client (paramètre, formulaire, JSON) ; None si ce n'est pas un UUID."""
+    try:
+        return str(uuid.UUID(value))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
 # --- Helper pour générer un code d'invitation unique ---
 def generate_invite_code(length=6):
     """Génère un code d'invitation aléatoire au format REV-XXXXXX"""
@@ -36,7 +55,7 @@ def generate_invite_code(length=6):
 class User(Base, UserMixin):
     __tablename__ = "users"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
     username = Column(Text, unique=True, nullable=False)
     email = Column(Text, unique=True, nullable=False)
     password_hash = Column(Text, nullable=False)
@@ -59,32 +78,50 @@ class User(Base, UserMixin):
 class Subject(Base):
     __tablename__ = "subjects"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
     name = Column(Text, nullable=False)
     color = Column(Text, nullable=False, default="#3B82F6")  # Couleur par défaut (bleu)
-    user_id = Column(Text, ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
+    # Dénormalisé : tenu à jour par app/counters.py (création/suppression/déplacement de cours)
+    document_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="subjects")
     documents = relationship("Document", back_populates="subject")
     group_links = relationship("GroupSubject", back_populates="subject", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_subjects_user_id", "user_id"),
+    )
+
 
 # --- Table documents ---
 class Document(Base):
     __tablename__ = "documents"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
     title = Column(Text, nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
-    user_id = Column(Text, ForeignKey("users.id"), nullable=True)
+    user_id = Column(UUID, ForeignKey("users.id"), nullable=True)
     user = relationship("User", back_populates="documents")
 
-    subject_id = Column(Text, ForeignKey("subjects.id"), nullable=True)
+    subject_id = Column(UUID, ForeignKey("subjects.id"), nullable=True)
     subject = relationship("Subject", back_populates="documents")
 
+    # Recherche plein texte (app/search.py) : colonne générée par Postgres à chaque écriture,
+    # jamais chargée avec le document (deferred)
+    search_vector = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(content, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
     questions = relationship("Question", back_populates="document", cascade="all, delete-orphan")
     quiz_sessions = relationship(
         "QuizSession",
@@ -92,78 +129,142 @@ class Document(Base):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Liste des cours d'un utilisateur (triée par date) et cours d'une matière ;
+        # l'id départage les dates égales (pagination par curseur, cf. app/pagination.py)
+        Index("ix_documents_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_documents_subject_id_created_at_id", "subject_id", "created_at", "id"),
+        Index("ix_documents_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
 
 # --- Table questions ---
 class Question(Base):
     __tablename__ = "questions"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
-    document_id = Column(Text, ForeignKey("documents.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
+    document_id = Column(UUID, ForeignKey("documents.id"), nullable=False)
     type = Column(question_type_enum, nullable=False)
     question = Column(Text, nullable=False)
     choices = Column(JSON, nullable=True)
     answer = Column(Text, nullable=True)
     explanation = Column(Text, nullable=True)
+    # Clé de tri aléatoire tirée à l'insertion : échantillonnage par l'index (app/sampling.py)
+    rand_key = Column(Float, nullable=False, server_default=func.random())
+    # Recherche plein texte (app/search.py), cf. Document.search_vector
+    search_vector = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(question, '')), 'A') || "
+            "setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(answer, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     document = relationship("Document", back_populates="questions")
     results = relationship("Result", back_populates="question", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Questions d'un cours, et tirage aléatoire par plage de rand_key (app/sampling.py)
+        Index("ix_questions_document_id_rand_key", "document_id", "rand_key"),
+        Index("ix_questions_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
 
 # --- Table results ---
 class Result(Base):
     __tablename__ = "results"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
-    question_id = Column(Text, ForeignKey("questions.id"), nullable=False)
-    user_id = Column(Text, ForeignKey("users.id"), nullable=True)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
+    question_id = Column(UUID, ForeignKey("questions.id"), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id"), nullable=True)
     user_answer = Column(Text, nullable=False)
     is_correct = Column(Boolean, nullable=True)
     evaluation = Column(Text, nullable=True)
     reviewed_at = Column(DateTime, server_default=func.now())
 
     question = relationship("Question", back_populates="results")
-    quiz_session_id = Column(Text, ForeignKey("quiz_sessions.id"), nullable=True)
+    quiz_session_id = Column(UUID, ForeignKey("quiz_sessions.id"), nullable=True)
     quiz_session = relationship("QuizSession", back_populates="results")
 
+    __table_args__ = (
+        Index("ix_results_quiz_session_id", "quiz_session_id"),
+        Index("ix_results_question_id", "question_id"),
+    )
 
-# --- Table quiz_generations (compteur de générations par user/jour) ---
-class QuizGeneration(Base):
-    __tablename__ = "quiz_generations"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(Text, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, server_default=func.now())
+# --- Table user_question_stats (maîtrise d'une question par un utilisateur, cf. app/review.py) ---
+class UserQuestionStat(Base):
+    __tablename__ = "user_question_stats"
 
-    user = relationship("User")
+    user_id = Column(UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(UUID, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    correct_count = Column(Integer, nullable=False, default=0)
+    correct_streak = Column(Integer, nullable=False, default=0)  # bonnes réponses consécutives
+    last_seen = Column(DateTime, nullable=False, server_default=func.now())
+    next_due = Column(DateTime, nullable=False, server_default=func.now())  # prochaine révision
+
+
+# --- Table generation_quotas (compteur de générations par user/jour) ---
+class GenerationQuota(Base):
+    __tablename__ = "generation_quotas"
+
+    user_id = Column(UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    generations = Column(Integer, nullable=False, default=0)
+    tokens = Column(BigInteger, nullable=False, default=0)  # tokens LLM consommés
+
+
+# --- Table generation_usage_monthly (cumul mensuel des anciens compteurs journaliers) ---
+class GenerationUsageMonthly(Base):
+    __tablename__ = "generation_usage_monthly"
+
+    user_id = Column(UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # 1er jour du mois
+    generations = Column(Integer, nullable=False, default=0)
+    tokens = Column(BigInteger, nullable=False, default=0)
 
 
 # --- Table quiz_sessions ---
 class QuizSession(Base):
     __tablename__ = "quiz_sessions"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(Text, ForeignKey("users.id"), nullable=False)
-    document_id = Column(Text, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
+    user_id = Column(UUID, ForeignKey("users.id"), nullable=False)
+    document_id = Column(UUID, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
     score = Column(Float, nullable=False)
     total_questions = Column(Integer, nullable=False)
     played_at = Column(DateTime, server_default=func.now())
+    # Clé fournie par le client (en-tête Idempotency-Key) : un renvoi ne crée pas de doublon
+    idempotency_key = Column(Text, nullable=True)
 
     # Relations
     user = relationship("User", back_populates="quiz_sessions")
     document = relationship("Document", back_populates="quiz_sessions", passive_deletes=True)
     results = relationship("Result", back_populates="quiz_session", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Historique des scores d'un utilisateur sur un document (graphique des résultats)
+        Index("ix_quiz_sessions_user_document_played_at", "user_id", "document_id", "played_at"),
+        Index("ix_quiz_sessions_document_id", "document_id"),
+        Index("uq_quiz_sessions_user_id_idempotency_key", "user_id", "idempotency_key", unique=True),
+    )
+
 
 # --- Table groups (groupes/classes) ---
 class Group(Base):
     __tablename__ = "groups"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
     name = Column(Text, nullable=False)
     description = Column(Text, nullable=True)
     invite_code = Column(Text, unique=True, nullable=False)
-    owner_id = Column(Text, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(UUID, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
+    # Dénormalisé : tenu à jour par app/counters.py (adhésion/départ)
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     owner = relationship("User", back_populates="owned_groups", foreign_keys=[owner_id])
     members = relationship("GroupMember", back_populates="group", cascade="all, delete-orphan")
@@ -174,9 +275,9 @@ class Group(Base):
 class GroupMember(Base):
     __tablename__ = "group_members"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
-    group_id = Column(Text, ForeignKey("groups.id"), nullable=False)
-    user_id = Column(Text, ForeignKey("users.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
+    group_id = Column(UUID, ForeignKey("groups.id"), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id"), nullable=False)
     joined_at = Column(DateTime, server_default=func.now())
 
     group = relationship("Group", back_populates="members")
@@ -184,7 +285,9 @@ class GroupMember(Base):
 
     __table_args__ = (
         # Contrainte d'unicité : un utilisateur ne peut rejoindre un groupe qu'une seule fois
-        # Note: SQLAlchemy utilise __table_args__ pour les contraintes de table
+        # (l'index sert aussi aux vérifications d'appartenance group_id + user_id)
+        UniqueConstraint("group_id", "user_id", name="uq_group_members_group_id_user_id"),
+        Index("ix_group_members_user_id", "user_id"),
     )
 
 
@@ -192,24 +295,29 @@ class GroupMember(Base):
 class GroupSubject(Base):
     __tablename__ = "group_subjects"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
-    group_id = Column(Text, ForeignKey("groups.id"), nullable=False)
-    subject_id = Column(Text, ForeignKey("subjects.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
+    group_id = Column(UUID, ForeignKey("groups.id"), nullable=False)
+    subject_id = Column(UUID, ForeignKey("subjects.id"), nullable=False)
     added_at = Column(DateTime, server_default=func.now())
 
     group = relationship("Group", back_populates="subjects")
     subject = relationship("Subject", back_populates="group_links")
 
+    __table_args__ = (
+        UniqueConstraint("group_id", "subject_id", name="uq_group_subjects_group_id_subject_id"),
+        Index("ix_group_subjects_subject_id", "subject_id"),
+    )
+
 
 # --- Table events (événements/compétitions) ---
 class Event(Base):
     __tablename__ = "events"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
     name = Column(Text, nullable=False)
     description = Column(Text, nullable=True)
-    group_id = Column(Text, ForeignKey("groups.id"), nullable=False)
-    subject_id = Column(Text, ForeignKey("subjects.id"), nullable=False)
+    group_id = Column(UUID, ForeignKey("groups.id"), nullable=False)
+    subject_id = Column(UUID, ForeignKey("subjects.id"), nullable=False)
     start_date = Column(DateTime, nullable=False)
     end_date = Column(DateTime, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
@@ -218,6 +326,10 @@ class Event(Base):
     subject = relationship("Subject")
     quizzes = relationship("EventQuiz", back_populates="event", cascade="all, delete-orphan", order_by="EventQuiz.quiz_number")
     participations = relationship("EventParticipation", back_populates="event", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_events_group_id_start_date_id", "group_id", "start_date", "id"),
+    )
     
     def get_status(self):
         """Retourne le statut de l'événement : 'future', 'active', 'ended'"""
@@ -236,30 +348,174 @@ class Event(Base):
 class EventQuiz(Base):
     __tablename__ = "event_quizzes"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
-    event_id = Column(Text, ForeignKey("events.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
+    event_id = Column(UUID, ForeignKey("events.id"), nullable=False)
     quiz_number = Column(Integer, nullable=False)  # 1 à 5
-    questions = Column(JSON, nullable=False)  # Liste des IDs des questions
     created_at = Column(DateTime, server_default=func.now())
     
     event = relationship("Event", back_populates="quizzes")
     participations = relationship("EventParticipation", back_populates="quiz", cascade="all, delete-orphan")
+    question_links = relationship(
+        "EventQuizQuestion",
+        back_populates="event_quiz",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="EventQuizQuestion.position",
+    )
+
+    __table_args__ = (
+        UniqueConstraint("event_id", "quiz_number", name="uq_event_quizzes_event_id_quiz_number"),
+    )
+
+
+# --- Table event_quiz_questions (questions d'un quiz d'événement, dans l'ordre) ---
+class EventQuizQuestion(Base):
+    __tablename__ = "event_quiz_questions"
+
+    event_quiz_id = Column(UUID, ForeignKey("event_quizzes.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)  # 1 à 20
+    question_id = Column(UUID, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+
+    event_quiz = relationship("EventQuiz", back_populates="question_links")
+    question = relationship("Question")
+
+    __table_args__ = (
+        # "Cette question est-elle utilisée dans un événement ?" (suppression de document)
+        Index("ix_event_quiz_questions_question_id", "question_id"),
+    )
 
 
 # --- Table event_participations (participation d'un étudiant à un quiz d'événement) ---
 class EventParticipation(Base):
     __tablename__ = "event_participations"
 
-    id: Mapped[str] = mapped_column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
-    event_id = Column(Text, ForeignKey("events.id"), nullable=False)
-    quiz_id = Column(Text, ForeignKey("event_quizzes.id"), nullable=False)
-    user_id = Column(Text, ForeignKey("users.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
+    event_id = Column(UUID, ForeignKey("events.id"), nullable=False)
+    quiz_id = Column(UUID, ForeignKey("event_quizzes.id"), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id"), nullable=False)
     correct_count = Column(Integer, nullable=False, default=0)
     total_questions = Column(Integer, nullable=False)
     time_spent = Column(Integer, nullable=True)  # en secondes
-    answers = Column(JSON, nullable=False)  # Détails des réponses
     completed_at = Column(DateTime, server_default=func.now())
     
     event = relationship("Event", back_populates="participations")
     quiz = relationship("EventQuiz", back_populates="participations")
     user = relationship("User")
+    answers = relationship(
+        "EventAnswer",
+        back_populates="participation",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="EventAnswer.position",
+    )
+
+    __table_args__ = (
+        # Progression d'un utilisateur dans un événement + classement
+        Index("ix_event_participations_event_id_user_id", "event_id", "user_id"),
+        # Un quiz d'événement ne peut être complété qu'une seule fois par utilisateur
+        UniqueConstraint("quiz_id", "user_id", name="uq_event_participations_quiz_id_user_id"),
+    )
+
+
+# --- Table event_leaderboard (classement d'un événement, une ligne par participant) ---
+class EventLeaderboard(Base):
+    __tablename__ = "event_leaderboard"
+
+    event_id = Column(UUID, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_correct = Column(Integer, nullable=False, default=0)
+    total_questions = Column(Integer, nullable=False, default=0)
+    total_time = Column(Integer, nullable=False, default=0)  # en secondes (départage)
+    quiz_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now())
+
+    user = relationship("User")
+
+
+# Classement : bonnes réponses décroissantes, puis temps croissant (cf. app/leaderboard.py)
+Index(
+    "ix_event_leaderboard_ranking",
+    EventLeaderboard.event_id,
+    -EventLeaderboard.total_correct,
+    EventLeaderboard.total_time,
+    EventLeaderboard.user_id,
+)
+
+
+# --- Table event_answers (réponse à une question d'un quiz d'événement) ---
+class EventAnswer(Base):
+    __tablename__ = "event_answers"
+
+    participation_id = Column(UUID, ForeignKey("event_participations.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)  # 1 à 20
+    event_id = Column(UUID, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)  # dénormalisé pour les statistiques
+    question_id = Column(UUID, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+    user_answer = Column(Text, nullable=False, default="")
+    is_correct = Column(Boolean, nullable=False, default=False)
+
+    participation = relationship("EventParticipation", back_populates="answers")
+    question = relationship("Question")
+
+    __table_args__ = (
+        # Statistiques par question d'un événement (taux de réussite, questions les plus ratées)
+        Index("ix_event_answers_event_id_question_id", "event_id", "question_id"),
+        Index("ix_event_answers_question_id", "question_id"),
+    )
+
+
+# --- Table cache_entries (tier partagé des caches de lecture, cf. app/cache.py) ---
+# UNLOGGED (migration 0014) : pas de WAL, contenu perdu après un crash de Postgres, ce qui
+# ne fait que vider le cache. Lignes expirées supprimées par `flask purge-cache`.
+class CacheEntry(Base):
+    __tablename__ = "cache_entries"
+
+    key = Column(Text, primary_key=True)  # "<cache>:<clé>"
+    value = Column(LargeBinary, nullable=False)  # valeur sérialisée (pickle)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_cache_entries_expires_at", "expires_at"),
+    )
+
+
+# --- Table rate_limits (compteurs du rate limiting partagés entre workers, cf. app/ratelimit.py) ---
+# UNLOGGED comme cache_entries (migration 0015) : un crash remet les compteurs à zéro.
+class RateLimit(Base):
+    __tablename__ = "rate_limits"
+
+    key = Column(Text, primary_key=True)  # clé de limite Flask-Limiter (règle + identifiant)
+    count = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # fin de la fenêtre courante
+
+    __table_args__ = (
+        Index("ix_rate_limits_expires_at", "expires_at"),
+    )
+
+
+# --- Table generation_jobs (générations de quiz en arrière-plan, cf. app/generation.py) ---
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=new_id)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    document_id = Column(UUID, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    status = Column(Text, nullable=False, default="queued")  # queued, running, done, failed
+    chunks_done = Column(Integer, nullable=False, default=0)
+    chunks_total = Column(Integer, nullable=True)  # connu au démarrage de la génération
+    questions_count = Column(Integer, nullable=False, default=0)  # questions déjà générées
+    # Questions générées, mises de côté jusqu'à la fin : invisibles (jeu, « quiz déjà généré »)
+    # tant que la génération n'est pas terminée, enregistrées d'un bloc avec le statut « done »
+    staged_questions = Column(JSON, nullable=False, default=list, server_default="[]")
+    error = Column(Text, nullable=True)  # message affiché si status = failed
+    quota_day = Column(Date, nullable=False)  # jour de la réservation du quota (rendue en cas d'échec)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Une seule génération en cours par cours (deux clics ou deux onglets)
+        Index(
+            "uq_generation_jobs_document_id_active", "document_id", unique=True,
+            postgresql_where=status.in_(["queued", "running"]),
+        ),
+        Index("ix_generation_jobs_user_id_created_at", "user_id", "created_at"),
+    )
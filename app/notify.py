@@ -0,0 +1,155 @@
+# app/notify.py
+# Notifications PostgreSQL (LISTEN/NOTIFY) relayées aux flux SSE d'un worker.
+#
+# - publish() émet un NOTIFY dans la transaction de l'écriture : il n'est délivré qu'au
+#   commit (jamais pour une transaction annulée), à tous les workers et machines.
+# - Chaque worker garde UNE connexion en LISTEN (thread démarré au premier abonnement) et
+#   distribue les messages aux files des flux abonnés : un flux SSE en attente n'occupe ni
+#   connexion du pool ni requête SQL.
+# - Après une coupure de la connexion LISTEN, des messages ont pu être perdus : chaque file
+#   reçoit RESYNC, et le flux relit l'état en base.
+#
+# Un flux SSE long (classement d'un événement, progression d'une génération) occupe un thread
+# du worker pendant toute sa durée : au plus SSE_MAX_STREAMS par worker (acquire_stream), le
+# reste des threads reste aux requêtes. Au-delà, les pages passent par le processus de
+# diffusion (app/fanout.py) ou interrogent l'état de la génération.
+#
+# LISTEN est une commande de session : la connexion est directe (MIGRATION_DATABASE_URL),
+# jamais via PgBouncer en mode transaction.
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from . import db
+
+logger = logging.getLogger("app.notify")
+
+RESYNC = object()  # message perdu possible : relire l'état en base
+# Commentaire SSE envoyé pendant l'attente : garde la connexion ouverte derrière les proxys
+# et détecte la déconnexion du client
+SSE_KEEPALIVE = int(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", str(max(1, db.GUNICORN_THREADS // 2))))
+
+_NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+
+_subscribers = {}  # (canal, clé) -> ensemble de files
+_lock = threading.Lock()
+_listener = None
+_streams = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+
+def publish(session, channel, key, **payload):
+    """NOTIFY sur `channel` pour les abonnés de `key`, délivré au commit de la session."""
+    session.execute(_NOTIFY, {"channel": channel, "payload": json.dumps({"key": key, **payload}, default=str)})
+
+
+def sse(data, event=None):
+    """Message SSE : `data` sérialisé en JSON, précédé du type d'événement s'il est donné."""
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, default=str)}\n\n"
+
+
+def acquire_stream():
+    """Réserve une place de flux SSE long dans le worker ; False si toutes sont prises."""
+    return _streams.acquire(blocking=False)
+
+
+def release_stream():
+    _streams.release()
+
+
+@contextmanager
+def subscribe(channel, key):
+    """File des messages (dicts, ou RESYNC) publiés sur `channel` pour `key`."""
+    global _listener
+    messages = queue.SimpleQueue()
+    with _lock:
+        _subscribers.setdefault((channel, key), set()).add(messages)
+        if _listener is None or not _listener.is_alive():
+            _listener = _Listener()
+            _listener.start()
+        _listener.listen(channel)
+    # Abonnement actif avant que l'appelant lise l'état initial : aucune mise à jour perdue
+    _listener.ready.wait(timeout=5)
+    try:
+        yield messages
+    finally:
+        with _lock:
+            subscribers = _subscribers.get((channel, key), set())
+            subscribers.discard(messages)
+            if not subscribers:
+                _subscribers.pop((channel, key), None)
+
+
+def _dispatch(channel, payload):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        logger.warning(f"Notification illisible sur {channel} : {payload[:100]}")
+        return
+    with _lock:
+        subscribers = list(_subscribers.get((channel, message.get("key")), ()))
+    for messages in subscribers:
+        messages.put(message)
+
+
+class _Listener(threading.Thread):
+    """Connexion LISTEN du worker ; se reconnecte après une coupure."""
+
+    def __init__(self):
+        super().__init__(name="pg-listen", daemon=True)
+        self.channels = set()
+        self.pending = set()
+        self.ready = threading.Event()
+        self.conninfo = make_url(db.MIGRATION_DATABASE_URL).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+
+    def listen(self, channel):
+        """Canal à écouter (appelé sous _lock) ; pris en compte dans la seconde."""
+        if channel not in self.channels:
+            self.ready.clear()
+            self.channels.add(channel)
+            self.pending.add(channel)
+
+    def run(self):
+        delay = 1
+        while True:
+            try:
+                with psycopg.connect(self.conninfo, autocommit=True) as conn:
+                    with _lock:
+                        self.pending = set(self.channels)
+                    delay = 1
+                    while True:
+                        self._listen_pending(conn)
+                        for notify in conn.notifies(timeout=1):
+                            _dispatch(notify.channel, notify.payload)
+            except psycopg.Error as e:
+                logger.warning(f"Connexion LISTEN perdue ({e}), nouvelle tentative dans {delay}s")
+                self.ready.clear()
+                self._resync_all()
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def _listen_pending(self, conn):
+        with _lock:
+            pending = set(self.pending)
+        for channel in pending:
+            conn.execute(f'LISTEN "{channel}"')
+        with _lock:
+            self.pending -= pending
+            if not self.pending:
+                self.ready.set()
+
+    def _resync_all(self):
+        with _lock:
+            subscribers = [m for queues in _subscribers.values() for m in queues]
+        for messages in subscribers:
+            messages.put(RESYNC)
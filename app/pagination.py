@@ -0,0 +1,107 @@
+# app/pagination.py
+# Pagination par curseur (keyset) des listes longues (cours, événements).
+#
+# La page suivante reprend après la dernière ligne affichée :
+#   WHERE (created_at, id) < (:dernier_created_at, :dernier_id) ORDER BY created_at DESC, id DESC LIMIT n
+# au lieu d'un OFFSET : le coût d'une page ne dépend pas de sa position dans la liste
+# (lecture par plage sur l'index (filtre, tri, id)), et une insertion entre deux pages
+# ne décale ni ne duplique les lignes.
+#
+# Le curseur est opaque pour le client : les valeurs de la clé de tri de la dernière
+# ligne, en JSON encodé base64 (url-safe). Côté pages HTML, le bouton "Charger plus"
+# (partials/load_more.html + main.js) redemande la page avec ?cursor=...&partial=1.
+
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+from flask import make_response, render_template
+from sqlalchemy import DateTime, Uuid, literal, tuple_
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible ou ne correspondant pas à la clé de tri."""
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: str | None  # None : dernière page
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(values):
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _typed(column, value):
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Uuid):
+        return str(uuid.UUID(value))  # identifiant falsifié : refusé ici, pas par Postgres
+    return value
+
+
+def decode_cursor(cursor, columns):
+    """Valeurs de la clé de tri contenues dans le curseur (typées d'après les colonnes)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursor(cursor)
+        return tuple(_typed(c, v) for c, v in zip(columns, values))
+    except (binascii.Error, UnicodeDecodeError, AttributeError, ValueError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def key_values(columns, values):
+    """
+    Valeurs d'une clé de tri, typées comme leurs colonnes : psycopg 3 type chaque paramètre
+    (::UUID, ::INTEGER...), une comparaison (uuid, ...) < (varchar, ...) serait refusée.
+    """
+    return tuple_(*(literal(v, c.type) for c, v in zip(columns, values)))
+
+
+def page_size(value, default=PAGE_SIZE):
+    """Taille de page demandée (paramètre ?limit=), bornée à [1, MAX_PAGE_SIZE]."""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def paginate(query, columns, cursor=None, limit=PAGE_SIZE, key=None):
+    """
+    Une page de `query` triée par `columns` décroissantes ; la dernière colonne
+    doit être unique (l'id) pour départager les égalités.
+    `key(ligne)` donne les valeurs de la clé d'une ligne (par défaut : attributs
+    de l'entité portant le nom des colonnes).
+    Lève InvalidCursor si le curseur est illisible.
+    """
+    if cursor:
+        query = query.filter(tuple_(*columns) < key_values(columns, decode_cursor(cursor, columns)))
+    rows = query.order_by(*(c.desc() for c in columns)).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    key = key or (lambda row: tuple(getattr(row, c.key) for c in columns))
+    return Page(rows, encode_cursor(key(rows[-1])))
+
+
+def load_more_response(template, page, **context):
+    """
+    Réponse d'un "Charger plus" : le fragment HTML des lignes de la page, le curseur
+    de la page suivante dans l'en-tête X-Next-Cursor (absent en fin de liste).
+    """
+    response = make_response(render_template(template, **context))
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return response
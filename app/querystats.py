@@ -0,0 +1,141 @@
+# app/querystats.py
+# Instrumentation des requêtes SQL : nombre de requêtes, temps total passé en base et
+# requête la plus lente, par requête HTTP (ou par bloc `with track_queries()`).
+#
+# Les hooks before/after_cursor_execute sont posés sur la classe Engine : toutes les
+# requêtes sont mesurées, quel que soit l'engine. Les mesures vont aux collecteurs actifs
+# du contexte courant (ContextVar : un par thread gunicorn), imbriquables.
+#
+# En fin de requête HTTP :
+# - en DEBUG (ou SQL_STATS_HEADER=True) : en-têtes X-DB-Queries / X-DB-Time-Ms / Server-Timing ;
+# - log "app.queries" : systématique en DEBUG, sinon seulement au-delà des seuils
+#   SQL_WARN_QUERIES (nombre de requêtes) ou SQL_WARN_MS (temps total).
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import metrics
+
+logger = logging.getLogger("app.queries")
+
+SQL_WARN_QUERIES = int(os.getenv("SQL_WARN_QUERIES", "30"))
+SQL_WARN_MS = float(os.getenv("SQL_WARN_MS", "500"))
+
+_collectors = ContextVar("query_collectors", default=())
+
+QUERIES_PER_REQUEST = metrics.Histogram(
+    "revisia_db_queries_per_request",
+    "Nombre de requêtes SQL par requête HTTP",
+    buckets=[1, 2, 5, 10, 20, 50, 100],  # nombre de requêtes SQL
+)
+
+
+class QueryStats:
+    """Mesures d'un bloc : nombre de requêtes, temps total (s), requête la plus lente."""
+
+    def __init__(self, record=False):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+        # Texte de toutes les requêtes (tests : message d'échec lisible)
+        self.statements = [] if record else None
+
+    def add(self, statement, duration):
+        self.count += 1
+        self.total += duration
+        if duration >= self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements.append(statement)
+
+    def summary(self):
+        return (
+            f"{self.count} requête(s) SQL en {self.total * 1000:.1f} ms"
+            f" (la plus lente : {self.slowest * 1000:.1f} ms)"
+        )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for stats in _collectors.get():
+        stats.add(statement, duration)
+
+
+def start(record=False):
+    """Démarre un collecteur ; retourne (stats, jeton à passer à stop())."""
+    stats = QueryStats(record=record)
+    return stats, _collectors.set(_collectors.get() + (stats,))
+
+
+def stop(token):
+    _collectors.reset(token)
+
+
+@contextmanager
+def track_queries(record=False):
+    """Mesure les requêtes SQL exécutées dans le bloc : `with track_queries() as stats:`."""
+    stats, token = start(record=record)
+    try:
+        yield stats
+    finally:
+        stop(token)
+
+
+def _shorten(statement, length=200):
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "…"
+
+
+def init_app(app):
+    """Mesure chaque requête HTTP (en-têtes en DEBUG, logs, métrique)."""
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats, g.query_stats_token = start()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get("query_stats")
+        if stats is None:
+            return response
+        QUERIES_PER_REQUEST.observe(stats.count)
+
+        if app.debug or app.config.get("SQL_STATS_HEADER"):
+            response.headers["X-DB-Queries"] = str(stats.count)
+            response.headers["X-DB-Time-Ms"] = f"{stats.total * 1000:.1f}"
+            response.headers["Server-Timing"] = (
+                f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries"'
+            )
+
+        over_budget = stats.count > SQL_WARN_QUERIES or stats.total * 1000 > SQL_WARN_MS
+        if over_budget or app.debug:
+            log = logger.warning if over_budget else logger.info
+            log(f"{request.method} {request.path} : {stats.summary()}")
+            if stats.slowest_statement:
+                log(f"  requête la plus lente : {_shorten(stats.slowest_statement)}")
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exception=None):
+        token = g.pop("query_stats_token", None)
+        g.pop("query_stats", None)
+        if token is not None:
+            stop(token)
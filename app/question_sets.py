@@ -0,0 +1,107 @@
+# app/question_sets.py
+# Jeux de questions en cache mémoire (par worker) : questions d'un cours, questions d'un
+# quiz d'événement dans l'ordre du quiz.
+#
+# Une question ne change plus une fois générée : les routes de jeu, d'aperçu et de correction
+# (quiz perso, sauvegarde des résultats, quiz d'événement, soumission, résultat) lisent ces
+# tableaux compacts au lieu de relire la table questions à chaque requête.
+#
+# Invalidation : la suppression d'un cours, l'ajout (génération) ou la suppression d'une
+# question retirent le jeu du cours. Les quiz d'événement ne changent pas après création ; un cours
+# supprimé alors qu'il sert dans un événement est refusé (cf. delete_document) sauf événement
+# terminé, qui ne se joue plus. Dans les autres workers, un jeu retiré expire après
+# QUESTION_CACHE_TTL secondes.
+
+import os
+from dataclasses import dataclass
+from sqlalchemy import event
+from .cache import TTLCache
+from .models import Document, EventQuizQuestion, Question, QuestionType
+
+question_cache = TTLCache(
+    maxsize=int(os.getenv("QUESTION_CACHE_SIZE", "512")),  # nombre de jeux de questions
+    ttl=int(os.getenv("QUESTION_CACHE_TTL", "3600")),
+)
+
+
+@dataclass(frozen=True)
+class CachedQuestion:
+    """Question en lecture seule (mêmes attributs que le modèle pour les templates)."""
+    id: str
+    document_id: str
+    type: QuestionType
+    question: str
+    choices: tuple | None
+    answer: str | None
+    explanation: str | None
+    normalized_answer: str | None  # réponse attendue, comparée sans casse ni espaces
+
+    @classmethod
+    def from_model(cls, q):
+        return cls(
+            id=q.id,
+            document_id=q.document_id,
+            type=QuestionType(q.type),
+            question=q.question,
+            choices=tuple(q.choices) if q.choices else None,
+            answer=q.answer,
+            explanation=q.explanation,
+            normalized_answer=normalize_answer(q.answer) if q.answer is not None else None,
+        )
+
+    def is_correct(self, user_answer):
+        return self.normalized_answer is not None and normalize_answer(user_answer) == self.normalized_answer
+
+
+def normalize_answer(text):
+    return (text or "").strip().lower()
+
+
+def _cached(key, load, ids=()):
+    questions = question_cache.get(key)
+    # Question attendue absente du jeu en cache (générée depuis, dans un autre worker) : relecture
+    if questions is not None and ids and not set(ids) <= {q.id for q in questions}:
+        questions = None
+    if questions is None:
+        questions = tuple(CachedQuestion.from_model(q) for q in load())
+        # Jeu vide (génération pas encore faite) : pas mis en cache
+        if questions:
+            question_cache.set(key, questions)
+    return questions
+
+
+def document_questions(session, document_id, ids=()):
+    """
+    Questions d'un cours (tuple de CachedQuestion). `ids` : questions que le serveur vient
+    de tirer en base (jamais des ids reçus du client) ; le jeu est relu si l'une d'elles y manque.
+    """
+    return _cached(
+        ("document", document_id),
+        lambda: session.query(Question).filter(Question.document_id == document_id).order_by(Question.id).all(),
+        ids,
+    )
+
+
+def event_quiz_questions(session, quiz_id):
+    """Questions d'un quiz d'événement, dans l'ordre du quiz (tuple de CachedQuestion)."""
+    return _cached(
+        ("event_quiz", quiz_id),
+        lambda: (
+            session.query(Question)
+            .join(EventQuizQuestion, EventQuizQuestion.question_id == Question.id)
+            .filter(EventQuizQuestion.event_quiz_id == quiz_id)
+            .order_by(EventQuizQuestion.position)
+            .all()
+        ),
+    )
+
+
+@event.listens_for(Question, "after_insert")
+@event.listens_for(Question, "after_delete")
+def _invalidate_document_questions(mapper, connection, target):
+    question_cache.pop(("document", target.document_id))
+
+
+@event.listens_for(Document, "after_delete")
+def _invalidate_deleted_document(mapper, connection, target):
+    question_cache.pop(("document", target.id))
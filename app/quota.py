@@ -0,0 +1,83 @@
+# app/quota.py
+# Quota journalier de générations de quiz : une ligne (user_id, day) par utilisateur et par jour.
+# La réservation est un upsert atomique : deux requêtes simultanées ne peuvent pas
+# dépasser la limite, et la vérification du quota est une lecture par clé primaire.
+
+from datetime import date, timedelta
+from sqlalchemy import delete, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
+from .models import GenerationQuota, GenerationUsageMonthly
+
+
+def generations_today(session, user_id, day=None):
+    """Nombre de générations de l'utilisateur pour le jour donné (aujourd'hui par défaut)."""
+    quota = session.get(GenerationQuota, (user_id, day or date.today()))
+    return quota.generations if quota else 0
+
+
+def reserve_generation(session, user_id, limit=None, day=None):
+    """
+    Compte une génération pour l'utilisateur, si la limite n'est pas atteinte.
+    Retourne le nombre de générations du jour après réservation, ou None si la limite
+    est atteinte. limit=None : pas de limite (le compteur est tenu quand même).
+    """
+    if limit is not None and limit <= 0:
+        return None
+    stmt = insert(GenerationQuota).values(
+        user_id=user_id, day=day or date.today(), generations=1, tokens=0,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GenerationQuota.user_id, GenerationQuota.day],
+        set_={"generations": GenerationQuota.generations + 1},
+        where=(GenerationQuota.generations < limit) if limit is not None else None,
+    ).returning(GenerationQuota.generations)
+    return session.execute(stmt).scalar()
+
+
+def release_generation(session, user_id, day):
+    """Annule une réservation (génération échouée : elle ne compte pas dans le quota)."""
+    session.execute(
+        update(GenerationQuota)
+        .where(GenerationQuota.user_id == user_id, GenerationQuota.day == day, GenerationQuota.generations > 0)
+        .values(generations=GenerationQuota.generations - 1)
+    )
+
+
+def record_tokens(session, user_id, day, tokens):
+    """Ajoute les tokens LLM consommés au compteur du jour."""
+    if not tokens:
+        return
+    session.execute(
+        update(GenerationQuota)
+        .where(GenerationQuota.user_id == user_id, GenerationQuota.day == day)
+        .values(tokens=GenerationQuota.tokens + tokens)
+    )
+
+
+def rollup_quotas(session, keep_days=90):
+    """
+    Cumule par mois les compteurs journaliers de plus de `keep_days` jours
+    (table generation_usage_monthly) puis les supprime.
+    Retourne le nombre de lignes mensuelles créées ou mises à jour.
+    """
+    cutoff = date.today() - timedelta(days=keep_days)
+    moved = (
+        delete(GenerationQuota)
+        .where(GenerationQuota.day < cutoff)
+        .returning(GenerationQuota.user_id, GenerationQuota.day, GenerationQuota.generations, GenerationQuota.tokens)
+        .cte("moved")
+    )
+    month = func.date_trunc("month", moved.c.day).cast(GenerationUsageMonthly.month.type)
+    stmt = insert(GenerationUsageMonthly).from_select(
+        ["user_id", "month", "generations", "tokens"],
+        select(moved.c.user_id, month, func.sum(moved.c.generations), func.sum(moved.c.tokens))
+        .group_by(moved.c.user_id, month),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GenerationUsageMonthly.user_id, GenerationUsageMonthly.month],
+        set_={
+            "generations": GenerationUsageMonthly.generations + stmt.excluded.generations,
+            "tokens": GenerationUsageMonthly.tokens + stmt.excluded.tokens,
+        },
+    ).returning(literal_column("1"))
+    return len(session.execute(stmt).all())
@@ -0,0 +1,159 @@
+# app/ratelimit.py
+# Stockage des compteurs de Flask-Limiter (cf. app/extensions.py), choisi par
+# RATELIMIT_STORAGE_URI :
+# - memory:// (défaut) : compteurs propres à chaque worker, remis à zéro au redémarrage ;
+# - postgresql://... : table UNLOGGED rate_limits, compteurs exacts entre workers et machines ;
+# - redis://... ou redis+unix://... : serveur compatible Redis (support natif de la
+#   bibliothèque limits, paquet redis à installer).
+#
+# Stratégie « fixed-window » : chaque hit est un seul upsert atomique (incrément, ou
+# nouvelle fenêtre si la précédente est expirée) qui renvoie le compteur à jour.
+#
+# Clés et limites (cf. les décorateurs @limiter.limit des routes) :
+# - utilisateur connecté : compteur par compte, quelle que soit l'IP ;
+# - visiteur anonyme : compteur par IP, plafond multiplié par RATELIMIT_NAT_FACTOR pour les
+#   réseaux d'établissement listés dans RATELIMIT_NAT_RANGES (une classe entière derrière
+#   la même IP publique) ;
+# - connexion : compteur par IP et par compte visé, plus un plafond global par IP.
+
+import ipaddress
+import os
+import time
+from datetime import timedelta
+from flask import request
+from flask_login import current_user
+from flask_limiter.util import get_remote_address
+from limits import parse_many
+from limits.storage import Storage
+from sqlalchemy import Interval, bindparam, delete, func, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from .db import create_autocommit_engine
+from .models import RateLimit
+
+DEFAULT_LIMIT = os.getenv("RATELIMIT_DEFAULT", "120 per minute")
+# Réseaux (CIDR, séparés par des virgules) dont l'IP publique est partagée par une classe
+NAT_RANGES = [
+    ipaddress.ip_network(cidr.strip(), strict=False)
+    for cidr in os.getenv("RATELIMIT_NAT_RANGES", "").split(",")
+    if cidr.strip()
+]
+NAT_FACTOR = int(os.getenv("RATELIMIT_NAT_FACTOR", "10"))
+
+
+# --- Clés ---
+def is_nat_address(address):
+    """True si l'adresse appartient à un réseau de RATELIMIT_NAT_RANGES."""
+    if not NAT_RANGES or not address:
+        return False
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in NAT_RANGES)
+
+
+def user_or_ip_key():
+    """Clé par défaut : le compte de l'utilisateur connecté, sinon l'IP."""
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    return f"ip:{get_remote_address()}"
+
+
+def ip_key():
+    """IP du client, même connecté (plafond global d'une route)."""
+    return f"ip:{get_remote_address()}"
+
+
+def login_key():
+    """IP et compte visé : les élèves d'une même classe n'épuisent pas le budget des autres."""
+    email = (request.form.get("email") or "").strip().lower()
+    return f"login:{get_remote_address()}:{email}"
+
+
+# --- Limites ---
+def per_ip(amount, period="minute"):
+    """Limite par IP (callable pour @limiter.limit), multipliée pour les réseaux NAT connus."""
+
+    def limit():
+        factor = NAT_FACTOR if is_nat_address(get_remote_address()) else 1
+        return f"{amount * factor} per {period}"
+
+    return limit
+
+
+def default_limit():
+    """Limite globale : DEFAULT_LIMIT par compte, ou par IP (plafond NAT) pour un anonyme."""
+    if current_user.is_authenticated or not is_nat_address(get_remote_address()):
+        return DEFAULT_LIMIT
+    return ";".join(
+        f"{item.amount * NAT_FACTOR} per {item.multiples} {item.GRANULARITY.name}"
+        for item in parse_many(DEFAULT_LIMIT)
+    )
+
+
+# Requêtes construites une fois, paramètres liés. L'upsert est écrit en SQL : la construction
+# insert() du dialecte PostgreSQL n'entre pas dans le cache de compilation de SQLAlchemy, et
+# la recompiler à chaque hit coûterait plus que son aller-retour vers Postgres.
+_INCR = text("""
+    INSERT INTO rate_limits AS r (key, count, expires_at)
+    VALUES (:key, :amount, now() + :expiry)
+    ON CONFLICT (key) DO UPDATE SET
+        count = CASE WHEN r.expires_at <= now() THEN excluded.count ELSE r.count + excluded.count END,
+        expires_at = CASE WHEN r.expires_at <= now() THEN excluded.expires_at ELSE r.expires_at END
+    RETURNING count
+""").bindparams(bindparam("expiry", type_=Interval))
+_GET = select(RateLimit.count).where(RateLimit.key == bindparam("key"), RateLimit.expires_at > func.now())
+# Durée restante calculée par Postgres (expires_at est une heure locale du serveur)
+_REMAINING = (
+    select(func.extract("epoch", RateLimit.expires_at - func.localtimestamp()))
+    .where(RateLimit.key == bindparam("key"))
+)
+_CLEAR = delete(RateLimit).where(RateLimit.key == bindparam("key"))
+
+
+class PostgresStorage(Storage):
+    """Compteurs de limites dans la table rate_limits (une requête par opération)."""
+
+    STORAGE_SCHEME = ["postgresql", "postgres", "postgresql+psycopg"]
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.engine = create_autocommit_engine(uri)
+
+    @property
+    def base_exceptions(self):
+        return SQLAlchemyError
+
+    def _scalar(self, stmt, **params):
+        with self.engine.connect() as conn:
+            return conn.execute(stmt, params).scalar()
+
+    def incr(self, key, expiry, amount=1):
+        return self._scalar(_INCR, key=key, amount=amount, expiry=timedelta(seconds=expiry))
+
+    def get(self, key):
+        return self._scalar(_GET, key=key) or 0
+
+    def get_expiry(self, key):
+        return time.time() + max(float(self._scalar(_REMAINING, key=key) or 0), 0)
+
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def reset(self):
+        with self.engine.connect() as conn:
+            return conn.execute(delete(RateLimit)).rowcount
+
+    def clear(self, key):
+        with self.engine.connect() as conn:
+            conn.execute(_CLEAR, {"key": key})
+
+
+def purge_expired_limits(session):
+    """Supprime les compteurs dont la fenêtre est terminée. Retourne le nombre de lignes supprimées."""
+    return session.execute(delete(RateLimit).where(RateLimit.expires_at <= func.now())).rowcount
@@ -0,0 +1,128 @@
+# app/read_models.py
+# Modèles de lecture en cache (cf. LayeredCache dans app/cache.py), relus à chaque requête
+# par les routes de groupes et d'événements et par les listes de matières :
+# - droits d'un utilisateur sur un groupe (propriétaire, membre) ;
+# - matières d'un utilisateur, avec leur nombre de cours ;
+# - métadonnées d'un événement (groupe, matière, dates).
+#
+# Invalidation :
+# - adhésion, départ, suppression d'un groupe : événements du mapper sur GroupMember et Group ;
+# - matière créée, modifiée ou supprimée : événements du mapper sur Subject ;
+# - nombre de cours (UPDATE de compteur, sans événement du mapper) : subjects_changed(),
+#   appelée par les routes d'ajout, de suppression et de déplacement d'un cours ;
+# - événement supprimé : événement du mapper sur Event.
+
+import os
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import event, exists
+from sqlalchemy.orm import object_session
+from .cache import LayeredCache
+from .models import Event, Group, GroupMember, Subject
+
+READ_MODEL_TTL = int(os.getenv("READ_MODEL_CACHE_TTL", "300"))
+
+group_access_cache = LayeredCache("group_access", ttl=READ_MODEL_TTL, maxsize=4096)
+subjects_cache = LayeredCache("subjects", ttl=READ_MODEL_TTL)
+events_cache = LayeredCache("events", ttl=READ_MODEL_TTL)
+
+
+# --- Droits sur un groupe ---
+GroupAccess = namedtuple("GroupAccess", "exists is_owner is_member")
+
+
+def group_access(session, group_id, user_id):
+    """
+    Droits de l'utilisateur sur le groupe. Une route qui a besoin du groupe le charge avant
+    (session.get) : en cas d'absence du cache, il est alors relu dans la session, sans requête.
+    """
+
+    def load():
+        group = session.get(Group, group_id)
+        if group is None:
+            return GroupAccess(False, False, False)
+        is_owner = group.owner_id == user_id
+        is_member = is_owner or session.query(
+            exists().where(GroupMember.group_id == group_id, GroupMember.user_id == user_id)
+        ).scalar()
+        return GroupAccess(True, is_owner, is_member)
+
+    return group_access_cache.get_or_load(f"{group_id}:{user_id}", load)
+
+
+@event.listens_for(GroupMember, "after_insert")
+@event.listens_for(GroupMember, "after_delete")
+def _invalidate_membership(mapper, connection, target):
+    group_access_cache.invalidate(f"{target.group_id}:{target.user_id}", object_session(target))
+
+
+@event.listens_for(Group, "after_delete")
+def _invalidate_owner_access(mapper, connection, target):
+    # Les membres sont supprimés en cascade (un événement chacun) ; un non-membre garde
+    # au plus READ_MODEL_TTL secondes un accès refusé à un groupe qui n'existe plus
+    group_access_cache.invalidate(f"{target.id}:{target.owner_id}", object_session(target))
+
+
+# --- Matières d'un utilisateur ---
+def user_subjects(session, user_id):
+    """Matières de l'utilisateur (liste de dicts id, name, color, document_count, created_at)."""
+
+    def load():
+        return [
+            {
+                "id": s.id,
+                "name": s.name,
+                "color": s.color,
+                "document_count": s.document_count,
+                "created_at": s.created_at,
+            }
+            for s in session.query(Subject).filter_by(user_id=user_id).order_by(Subject.created_at, Subject.id)
+        ]
+
+    return subjects_cache.get_or_load(user_id, load)
+
+
+def subjects_changed(session, user_id):
+    """À appeler quand le nombre de cours d'une matière de l'utilisateur change."""
+    subjects_cache.invalidate(user_id, session)
+
+
+@event.listens_for(Subject, "after_insert")
+@event.listens_for(Subject, "after_update")
+@event.listens_for(Subject, "after_delete")
+def _invalidate_subjects(mapper, connection, target):
+    subjects_cache.invalidate(target.user_id, object_session(target))
+
+
+# --- Métadonnées d'un événement ---
+@dataclass(frozen=True)
+class EventInfo:
+    """Événement en lecture seule (mêmes attributs que le modèle pour les templates)."""
+    id: str
+    group_id: str
+    subject_id: str
+    name: str
+    description: str | None
+    start_date: datetime
+    end_date: datetime
+
+    get_status = Event.get_status
+
+
+def event_info(session, event_id):
+    """Métadonnées de l'événement, None s'il n'existe pas."""
+
+    def load():
+        e = session.get(Event, event_id)
+        if e is None:
+            return None
+        return EventInfo(e.id, e.group_id, e.subject_id, e.name, e.description, e.start_date, e.end_date)
+
+    return events_cache.get_or_load(event_id, load)
+
+
+@event.listens_for(Event, "after_update")
+@event.listens_for(Event, "after_delete")
+def _invalidate_event(mapper, connection, target):
+    events_cache.invalidate(target.id, object_session(target))
@@ -0,0 +1,100 @@
+# app/review.py
+# Révision espacée : choix des questions d'un quiz selon ce que l'utilisateur maîtrise.
+#
+# user_question_stats garde, par (utilisateur, question), le nombre de tentatives, de bonnes
+# réponses, la série de bonnes réponses consécutives et la date de prochaine révision.
+# Elle est mise à jour par un upsert à chaque enregistrement de résultats (save_results) :
+# jamais de recalcul depuis la table results.
+#
+# Intervalles (système de Leitner) : une erreur remet la question en révision immédiate,
+# chaque bonne réponse consécutive espace la suivante (1, 3, 7, 16 puis 35 jours).
+
+import random
+from datetime import timedelta
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.dialects.postgresql import insert
+from .models import Question, UserQuestionStat
+
+QUIZ_SIZE = 10
+
+# Délai avant la prochaine révision, indexé par la série de bonnes réponses (plafonnée)
+REVIEW_INTERVALS = (
+    timedelta(0),
+    timedelta(days=1),
+    timedelta(days=3),
+    timedelta(days=7),
+    timedelta(days=16),
+    timedelta(days=35),
+)
+
+
+def _next_due(streak):
+    """Expression SQL : date de prochaine révision après `streak` bonnes réponses consécutives."""
+    return func.now() + case(
+        *((streak == i, interval) for i, interval in enumerate(REVIEW_INTERVALS[:-1])),
+        else_=REVIEW_INTERVALS[-1],
+    )
+
+
+def record_answers(session, user_id, answers):
+    """
+    Met à jour les statistiques de l'utilisateur avec les réponses d'un quiz
+    (`answers` : couples (question_id, is_correct)), en une seule requête.
+    """
+    # Une question répondue deux fois dans le même envoi : seule la dernière réponse compte
+    # (un upsert ne peut pas modifier deux fois la même ligne)
+    latest = dict(answers)
+    if not latest:
+        return
+    stats = UserQuestionStat
+    stmt = insert(stats).values([
+        {
+            "user_id": user_id,
+            "question_id": question_id,
+            "attempts": 1,
+            "correct_count": int(bool(is_correct)),
+            "correct_streak": int(bool(is_correct)),
+            "last_seen": func.now(),
+            "next_due": func.now() + REVIEW_INTERVALS[int(bool(is_correct))],
+        }
+        for question_id, is_correct in latest.items()
+    ])
+    streak = case((stmt.excluded.correct_count == 1, stats.correct_streak + 1), else_=0)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[stats.user_id, stats.question_id],
+        set_={
+            "attempts": stats.attempts + 1,
+            "correct_count": stats.correct_count + stmt.excluded.correct_count,
+            "correct_streak": streak,
+            "last_seen": func.now(),
+            "next_due": _next_due(streak),
+        },
+    )
+    session.execute(stmt)
+
+
+def pick_questions(session, user_id, document_id, limit=QUIZ_SIZE):
+    """
+    Ids des questions d'un quiz, en une requête (index questions.document_id + clé primaire des stats) :
+    d'abord celles à réviser (échéance passée), puis les jamais vues, puis les autres ;
+    à échéance égale, les moins maîtrisées (série la plus courte, taux de réussite le plus bas).
+    """
+    stats = UserQuestionStat
+    bucket = case(
+        (stats.next_due <= func.now(), 0),
+        (stats.question_id.is_(None), 1),
+        else_=2,
+    )
+    success_rate = stats.correct_count * 1.0 / func.nullif(stats.attempts, 0)
+    question_ids = (
+        session.scalars(
+            select(Question.id)
+            .outerjoin(stats, and_(stats.question_id == Question.id, stats.user_id == user_id))
+            .where(Question.document_id == document_id)
+            .order_by(bucket, stats.correct_streak, success_rate, stats.next_due, func.random())
+            .limit(limit)
+        ).all()
+    )
+    # Ordre de présentation aléatoire : les révisions ne sont pas toujours en tête
+    random.shuffle(question_ids)
+    return question_ids
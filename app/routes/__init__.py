@@ -0,0 +1,16 @@
+# app/routes/__init__.py
+from werkzeug.routing import UUIDConverter
+
+
+class IdConverter(UUIDConverter):
+    """
+    <uuid:...> dans les routes : un identifiant mal formé ne correspond à aucune route (404)
+    au lieu d'atteindre une colonne uuid. La valeur reste une str, comme les colonnes
+    Uuid(as_uuid=False) des modèles.
+    """
+
+    def to_python(self, value):
+        return value.lower()
+
+    def to_url(self, value):
+        return str(value)
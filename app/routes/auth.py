@@ -1,14 +1,19 @@
 # app/routes/auth.py
+import os
 import logging
+from dataclasses import dataclass
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import (
     LoginManager,
+    UserMixin,
     login_user,
     logout_user,
     login_required,
     current_user,
 )
-from ..db import SessionLocal
+from sqlalchemy import event
+from ..cache import TTLCache
+from ..db import get_db
 from ..models import User
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
@@ -17,27 +22,58 @@ logger = logging.getLogger("app.auth")
 # Import du rate limiter (défini dans extensions.py)
 # On l'applique sur login/register pour bloquer les attaques par brute-force
 from ..extensions import limiter
+from ..ratelimit import ip_key, login_key, per_ip
 
 # --- Initialisation Flask-Login ---
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"
 
 
+# --- Cache d'identité ---
+# load_user est appelé à chaque requête authentifiée : on garde en mémoire (par worker)
+# l'identité utilisée par les routes et les templates, sans relire la table users.
+# Un autre worker voit une modification du compte au plus USER_CACHE_TTL secondes plus tard.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "2048")),
+    ttl=int(os.getenv("USER_CACHE_TTL", "60")),
+)
+
+
+@dataclass(frozen=True, eq=False)
+class CachedUser(UserMixin):
+    """Identité légère de l'utilisateur connecté (current_user)."""
+    id: str
+    username: str
+    email: str
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    user_cache.pop(target.id)
+
+
 # --- Fonction de chargement utilisateur ---
 @login_manager.user_loader
 def load_user(user_id):
-    session = SessionLocal()
-    try:
-        user = session.get(User, user_id)
-        return user
-    finally:
-        session.close()
+    identity = user_cache.get(user_id)
+    if identity is None:
+        row = (
+            get_db().query(User.id, User.username, User.email)
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        identity = CachedUser(id=row.id, username=row.username, email=row.email)
+        user_cache.set(user_id, identity)
+    return identity
 
 
 # --- Page d'inscription ---
-# Limite : 5 inscriptions par minute par IP (anti-spam)
+# Limite : 5 inscriptions par minute par IP (anti-spam), relevée pour le réseau d'un établissement
 @bp.route("/register", methods=["GET", "POST"])
-@limiter.limit("5 per minute")
+@limiter.limit(per_ip(5), key_func=ip_key, methods=["POST"])
 def register():
     from flask import current_app
     if current_user.is_authenticated:
@@ -55,7 +91,7 @@ def register():
             flash("Tous les champs sont requis.", "error")
             return redirect(url_for("auth.register"))
 
-        session = SessionLocal()
+        session = get_db()
         try:
             existing = session.query(User).filter(
                 (User.email == email) | (User.username == username)
@@ -76,16 +112,16 @@ def register():
             session.rollback()
             flash(f"Erreur : {e}", "error")
             return redirect(url_for("auth.register"))
-        finally:
-            session.close()
 
     return render_template("register.html", registration_enabled=True)
 
 
 # --- Page de connexion ---
-# Limite : 5 tentatives par minute par IP (anti brute-force)
+# Limites (anti brute-force) : 5 tentatives par minute par IP et par compte visé, et
+# 30 par minute par IP tous comptes confondus (relevée pour le réseau d'un établissement)
 @bp.route("/login", methods=["GET", "POST"])
-@limiter.limit("5 per minute")
+@limiter.limit("5 per minute", key_func=login_key, methods=["POST"])
+@limiter.limit(per_ip(30), key_func=ip_key, methods=["POST"])
 def login():
     if current_user.is_authenticated:
         return redirect(url_for("ui.home"))
@@ -94,21 +130,18 @@ def login():
         email = request.form.get("email")
         password = request.form.get("password")
 
-        session = SessionLocal()
-        try:
-            user = session.query(User).filter_by(email=email).first()
+        session = get_db()
+        user = session.query(User).filter_by(email=email).first()
 
-            if not user or not user.check_password(password):
-                logger.warning(f"Échec connexion : {email}")
-                flash("❌ Identifiants incorrects.", "error")
-                return redirect(url_for("auth.login"))
+        if not user or not user.check_password(password):
+            logger.warning(f"Échec connexion : {email}")
+            flash("❌ Identifiants incorrects.", "error")
+            return redirect(url_for("auth.login"))
 
-            login_user(user)
-            logger.info(f"Connexion : {user.username} ({email})")
-            flash(f"👋 Bienvenue, {user.username} !")
-            return redirect(url_for("ui.home"))
-        finally:
-            session.close()
+        login_user(user)
+        logger.info(f"Connexion : {user.username} ({email})")
+        flash(f"👋 Bienvenue, {user.username} !")
+        return redirect(url_for("ui.home"))
 
     return render_template("login.html")
 
@@ -118,6 +151,7 @@ def login():
 @login_required
 def logout():
     logger.info(f"Déconnexion : {current_user.username}")
+    user_cache.pop(current_user.id)
     logout_user()
     flash("👋 Déconnecté avec succès.")
     return redirect(url_for("auth.login"))
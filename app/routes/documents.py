@@ -1,11 +1,13 @@
 import os
-import uuid
 import logging
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from ..db import SessionLocal
-from ..models import Document
+from ..counters import adjust_document_count, move_document
+from ..db import get_db, read_only
+from ..models import Document, Subject, new_id, parse_uuid
+from ..pagination import InvalidCursor, page_size, paginate
+from ..read_models import subjects_changed
 from ..extract import extract_text_from_docx
 
 bp = Blueprint("documents", __name__, url_prefix="/api/documents")
@@ -18,7 +20,12 @@ UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 
-# Limite : 10 uploads par minute (évite le spam de fichiers)
+def _own_subject(session, subject_id):
+    """La matière existe et appartient à l'utilisateur connecté."""
+    return session.query(Subject.id).filter_by(id=subject_id, user_id=current_user.id).first() is not None
+
+
+# Limite : 10 uploads par minute et par utilisateur (évite le spam de fichiers)
 @bp.route("/upload", methods=["POST"])
 @limiter.limit("10 per minute")
 @login_required
@@ -35,14 +42,20 @@ def upload_document():
     if not filename.endswith(".docx"):
         return jsonify({"error": "Format non supporté"}), 400
 
-    # Sauvegarde temporaire du fichier
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(file_path)
-
-    # Récupérer la matière (obligatoire)
+    # Récupérer la matière (obligatoire, de l'utilisateur : son compteur de cours est mis à jour)
     subject_id = request.form.get("subject_id")
     if not subject_id:
         return jsonify({"error": "La matière est obligatoire"}), 400
+    subject_id = parse_uuid(subject_id)
+    if not subject_id:
+        return jsonify({"error": "Matière invalide"}), 400
+    session = get_db()
+    if not _own_subject(session, subject_id):
+        return jsonify({"error": "Matière introuvable"}), 404
+
+    # Sauvegarde temporaire du fichier
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    file.save(file_path)
 
     # Extraction du texte
     from ..extract import extract_text_from_docx, count_words, get_preview
@@ -51,16 +64,17 @@ def upload_document():
     preview = get_preview(text_content, max_chars=200)
 
     # Enregistrement dans la base
-    session = SessionLocal()
     try:
         document = Document(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             title=filename,
             content=text_content,
             user_id=current_user.id,
             subject_id=subject_id if subject_id else None
         )
         session.add(document)
+        adjust_document_count(session, document.subject_id, 1)
+        subjects_changed(session, current_user.id)
         session.commit()
 
         doc_id = document.id
@@ -79,18 +93,56 @@ def upload_document():
         session.rollback()
         logger.error(f"Erreur upload par {current_user.username} : {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
 
 
-@bp.route("/<string:document_id>", methods=["DELETE"])
+@bp.route("", methods=["GET"])
+@login_required
+@read_only
+def list_documents():
+    """
+    Cours de l'utilisateur connecté, du plus récent au plus ancien, par pages.
+    Paramètres : subject_id (filtre), limit, cursor (next_cursor de la page précédente).
+    """
+    session = get_db()
+    query = session.query(
+        Document.id, Document.title, Document.subject_id, Document.created_at
+    ).filter(Document.user_id == current_user.id)
+    if request.args.get("subject_id"):
+        subject_id = parse_uuid(request.args["subject_id"])
+        if not subject_id:
+            return jsonify({"error": "Matière invalide"}), 400
+        query = query.filter(Document.subject_id == subject_id)
+
+    try:
+        page = paginate(
+            query, (Document.created_at, Document.id),
+            request.args.get("cursor"), page_size(request.args.get("limit")),
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Curseur invalide"}), 400
+
+    return jsonify({
+        "documents": [
+            {
+                "id": doc.id,
+                "title": doc.title,
+                "subject_id": doc.subject_id,
+                "created_at": doc.created_at.isoformat() if doc.created_at else None,
+            }
+            for doc in page.items
+        ],
+        "next_cursor": page.next_cursor,
+    }), 200
+
+
+@bp.route("/<uuid:document_id>", methods=["DELETE"])
 @login_required
 def delete_document(document_id):
     """
     Supprime un document appartenant à l'utilisateur connecté.
     Les questions et résultats liés seront supprimés automatiquement (cascade SQLAlchemy).
     """
-    session = SessionLocal()
+    session = get_db()
     try:
         document = session.get(Document, document_id)
         if not document:
@@ -100,68 +152,49 @@ def delete_document(document_id):
         if document.user_id != current_user.id:
             return jsonify({"error": "Non autorisé"}), 403
 
-        # ⚠️ Vérifier si les questions du document sont utilisées dans des événements actifs
-        from ..models import Question, EventQuiz, Event
+        # ⚠️ Vérifier si les questions du document sont utilisées dans des événements en cours ou à venir
+        # (une seule requête EXISTS, servie par l'index event_quiz_questions.question_id)
+        from ..models import Question, EventQuiz, EventQuizQuestion, Event
+        from sqlalchemy import exists
         from datetime import datetime
-        import json
-        
-        # Récupérer toutes les questions du document
-        questions = session.query(Question).filter_by(document_id=document_id).all()
-        question_ids = [q.id for q in questions]
-        
-        if question_ids:
-            # Vérifier si ces questions sont dans des événements actifs
-            now = datetime.now()
-            active_events_with_questions = []
-            
-            active_event_quizzes = session.query(EventQuiz, Event).join(
-                Event, EventQuiz.event_id == Event.id
-            ).filter(
-                Event.start_date <= now,
-                Event.end_date >= now
-            ).all()
-            
-            for quiz, event in active_event_quizzes:
-                quiz_questions = json.loads(quiz.questions)
-                if any(qid in quiz_questions for qid in question_ids):
-                    if event.name not in [e['name'] for e in active_events_with_questions]:
-                        active_events_with_questions.append({
-                            'name': event.name,
-                            'id': event.id
-                        })
-            
-            if active_events_with_questions:
-                event_names = ', '.join([e['name'] for e in active_events_with_questions])
-                return jsonify({
-                    "error": f"❌ Impossible : ce cours contient des questions utilisées dans {len(active_events_with_questions)} événement(s) en cours : {event_names}",
-                    "active_events": active_events_with_questions
-                }), 400
-            
-            # Vérifier événements futurs
-            future_event_quizzes = session.query(EventQuiz, Event).join(
-                Event, EventQuiz.event_id == Event.id
-            ).filter(
-                Event.start_date > now
-            ).all()
-            
-            future_events_with_questions = []
-            for quiz, event in future_event_quizzes:
-                quiz_questions = json.loads(quiz.questions)
-                if any(qid in quiz_questions for qid in question_ids):
-                    if event.name not in [e['name'] for e in future_events_with_questions]:
-                        future_events_with_questions.append({
-                            'name': event.name,
-                            'id': event.id
-                        })
-            
-            if future_events_with_questions:
-                event_names = ', '.join([e['name'] for e in future_events_with_questions])
-                return jsonify({
-                    "error": f"⚠️ Impossible : ce cours contient des questions utilisées dans {len(future_events_with_questions)} événement(s) à venir : {event_names}. Supprimez d'abord les événements.",
-                    "future_events": future_events_with_questions
-                }), 400
+
+        now = datetime.now()
+        uses_document = exists().where(
+            EventQuiz.event_id == Event.id,
+            EventQuizQuestion.event_quiz_id == EventQuiz.id,
+            Question.id == EventQuizQuestion.question_id,
+            Question.document_id == document_id,
+        )
+        blocking_events = (
+            session.query(Event.id, Event.name, Event.start_date)
+            .filter(Event.end_date >= now, uses_document)
+            .order_by(Event.start_date)
+            .all()
+        )
+
+        active_events_with_questions = [
+            {'name': name, 'id': event_id} for event_id, name, start_date in blocking_events if start_date <= now
+        ]
+        if active_events_with_questions:
+            event_names = ', '.join([e['name'] for e in active_events_with_questions])
+            return jsonify({
+                "error": f"❌ Impossible : ce cours contient des questions utilisées dans {len(active_events_with_questions)} événement(s) en cours : {event_names}",
+                "active_events": active_events_with_questions
+            }), 400
+
+        future_events_with_questions = [
+            {'name': name, 'id': event_id} for event_id, name, start_date in blocking_events if start_date > now
+        ]
+        if future_events_with_questions:
+            event_names = ', '.join([e['name'] for e in future_events_with_questions])
+            return jsonify({
+                "error": f"⚠️ Impossible : ce cours contient des questions utilisées dans {len(future_events_with_questions)} événement(s) à venir : {event_names}. Supprimez d'abord les événements.",
+                "future_events": future_events_with_questions
+            }), 400
 
         session.delete(document)
+        adjust_document_count(session, document.subject_id, -1)
+        subjects_changed(session, current_user.id)
         session.commit()
 
         logger.info(f"Document supprimé : '{document.title}' par {current_user.username}")
@@ -171,17 +204,16 @@ def delete_document(document_id):
         session.rollback()
         logger.error(f"Erreur suppression document {document_id} : {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
 
 
-@bp.route("/<string:document_id>/content", methods=["GET"])
+@bp.route("/<uuid:document_id>/content", methods=["GET"])
 @login_required
+@read_only
 def get_document_content(document_id):
     """
     Récupère le contenu complet d'un document pour l'aperçu.
     """
-    session = SessionLocal()
+    session = get_db()
     try:
         document = session.get(Document, document_id)
         if not document:
@@ -197,11 +229,9 @@ def get_document_content(document_id):
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
 
 
-@bp.route("/<string:document_id>/subject", methods=["PUT"])
+@bp.route("/<uuid:document_id>/subject", methods=["PUT"])
 @login_required
 def update_document_subject(document_id):
     """
@@ -209,8 +239,12 @@ def update_document_subject(document_id):
     """
     data = request.get_json()
     subject_id = data.get("subject_id")  # Peut être None pour "Sans matière"
+    if subject_id is not None:
+        subject_id = parse_uuid(subject_id)
+        if not subject_id:
+            return jsonify({"error": "Matière invalide"}), 400
     
-    session = SessionLocal()
+    session = get_db()
     try:
         document = session.get(Document, document_id)
         if not document:
@@ -219,7 +253,11 @@ def update_document_subject(document_id):
         if document.user_id != current_user.id:
             return jsonify({"error": "Non autorisé"}), 403
 
-        document.subject_id = subject_id
+        if subject_id is not None and not _own_subject(session, subject_id):
+            return jsonify({"error": "Matière introuvable"}), 404
+
+        move_document(session, document, subject_id)
+        subjects_changed(session, current_user.id)
         session.commit()
 
         logger.info(f"Matière du document '{document.title}' changée par {current_user.username}")
@@ -228,6 +266,4 @@ def update_document_subject(document_id):
 
     except Exception as e:
         session.rollback()
-        return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -4,17 +4,26 @@ Tout membre d'un groupe peut participer. Seul le propriétaire du groupe peut cr
 """
 
 import logging
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+import queue
+from flask import Blueprint, Response, abort, current_app, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, joinedload
 from datetime import datetime
-import random
-import json
 
-from ..db import SessionLocal
+from .. import fanout, notify
+from ..db import get_db, pipeline, read_only
+from ..leaderboard import (
+    CHANNEL as LEADERBOARD_CHANNEL, leaderboard_page, publish_participation, record_participation,
+)
+from ..pagination import PAGE_SIZE, InvalidCursor, load_more_response, paginate
+from ..question_sets import event_quiz_questions
+from ..read_models import event_info, group_access
+from ..sampling import allocate, count_by_document, deal, sample_by_document
 from ..models import (
-    Event, EventQuiz, EventParticipation,
-    Group, GroupMember, Subject, Question, GroupSubject, User,
+    Event, EventQuiz, EventQuizQuestion, EventParticipation, EventAnswer, EventLeaderboard,
+    Group, Subject, Question, GroupSubject, new_id, parse_uuid,
 )
 
 events_bp = Blueprint("events", __name__, url_prefix="/events")
@@ -25,271 +34,337 @@ logger = logging.getLogger("app.events")
 # HELPERS
 # ============================================
 
-def _check_group_membership(session, group_id, user_id):
-    """Vérifie l'appartenance au groupe. Retourne (group, is_owner, is_member)."""
-    group = session.get(Group, group_id)
-    if not group:
-        return None, False, False
-    is_owner = group.owner_id == user_id
-    is_member = is_owner or session.query(GroupMember).filter_by(
-        group_id=group_id, user_id=user_id
-    ).first() is not None
-    return group, is_owner, is_member
-
-
-def _enrich_event_for_user(session, event, user_id):
-    """Ajoute des attributs de progression et de statut à un événement."""
-    status = event.get_status()
-    if status == 'future':
-        event.status_label = "À venir"
-        event.status_class = "bg-blue-100 text-blue-800"
-        event.can_play = False
-    elif status == 'ended':
-        event.status_label = "Terminé"
-        event.status_class = "bg-gray-100 text-gray-800"
-        event.can_play = False
-    else:
-        event.status_label = "En cours"
-        event.status_class = "bg-green-100 text-green-800"
-        event.can_play = True
-
-    event.participants_count = (
-        session.query(EventParticipation.user_id)
-        .filter(EventParticipation.event_id == event.id)
-        .distinct().count()
+# Libellé et style du badge de statut, par statut d'événement
+STATUS_DISPLAY = {
+    "future": ("À venir", "bg-blue-100 text-blue-800"),
+    "ended": ("Terminé", "bg-gray-100 text-gray-800"),
+    "active": ("En cours", "bg-green-100 text-green-800"),
+}
+
+
+def _group_events_for_user(session, group_id, user_id, cursor=None, limit=PAGE_SIZE):
+    """
+    Une page des événements d'un groupe (les plus récents d'abord) avec statut,
+    nombre de participants et progression de l'utilisateur, en une seule requête.
+    Retourne une Page (cf. app/pagination.py) ; lève InvalidCursor si le curseur est illisible.
+    """
+    now = datetime.now()
+    status = case(
+        (Event.start_date > now, "future"),
+        (Event.end_date < now, "ended"),
+        else_="active",
+    )
+    participants = (
+        session.query(EventLeaderboard.event_id, func.count().label("participants_count"))
+        .join(Event, Event.id == EventLeaderboard.event_id)
+        .filter(Event.group_id == group_id)
+        .group_by(EventLeaderboard.event_id)
+        .subquery()
+    )
+    mine = aliased(EventLeaderboard)
+    query = (
+        session.query(
+            Event,
+            status.label("status"),
+            func.coalesce(participants.c.participants_count, 0),
+            func.coalesce(mine.quiz_count, 0),
+        )
+        .outerjoin(participants, participants.c.event_id == Event.id)
+        .outerjoin(mine, and_(mine.event_id == Event.id, mine.user_id == user_id))
+        .options(joinedload(Event.subject))
+        .filter(Event.group_id == group_id)
+    )
+    page = paginate(
+        query, (Event.start_date, Event.id), cursor, limit,
+        key=lambda row: (row[0].start_date, row[0].id),
     )
 
-    completed = session.query(EventParticipation).filter(
-        EventParticipation.event_id == event.id,
-        EventParticipation.user_id == user_id,
-    ).count()
-    event.user_progress = completed
-    event.total_quizzes = 5
-    event.next_quiz = completed + 1 if completed < 5 else None
+    events = []
+    for event, event_status, participants_count, completed in page.items:
+        event.status_label, event.status_class = STATUS_DISPLAY[event_status]
+        event.can_play = event_status == "active"
+        event.participants_count = participants_count
+        event.user_progress = completed
+        event.total_quizzes = 5
+        event.next_quiz = completed + 1 if completed < 5 else None
+        events.append(event)
+    return page._replace(items=events)
+
+
+def _question_stats(session, event_id, limit=None):
+    """
+    Taux de réussite par question d'un événement, calculé en SQL
+    (des plus ratées aux mieux réussies).
+    """
+    correct = func.count().filter(EventAnswer.is_correct)
+    query = (
+        session.query(
+            Question.id,
+            Question.question,
+            func.count().label("attempts"),
+            correct.label("correct"),
+        )
+        .join(EventAnswer, EventAnswer.question_id == Question.id)
+        .filter(EventAnswer.event_id == event_id)
+        .group_by(Question.id, Question.question)
+        .order_by((correct * 1.0 / func.count()).asc(), func.count().desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    return [
+        {
+            "question_id": qid,
+            "question": text,
+            "attempts": attempts,
+            "correct": correct_count,
+            "success_rate": round(correct_count * 100 / attempts, 1),
+        }
+        for qid, text, attempts, correct_count in query.all()
+    ]
 
 
 # ============================================
 # ROUTES
 # ============================================
 
-@events_bp.route("/group/<group_id>")
+@events_bp.route("/group/<uuid:group_id>")
 @login_required
+@read_only
 def group_events(group_id):
     """Liste des événements d'un groupe."""
-    session = SessionLocal()
-    try:
-        group, is_owner, is_member = _check_group_membership(session, group_id, current_user.id)
-        if not group or not is_member:
-            flash("Accès non autorisé.", "error")
-            return redirect(url_for("groups.list_groups"))
-
-        events = (
-            session.query(Event)
-            .filter(Event.group_id == group_id)
-            .order_by(Event.start_date.desc())
-            .all()
-        )
-        for event in events:
-            _enrich_event_for_user(session, event, current_user.id)
+    session = get_db()
+    group = session.get(Group, group_id)
+    access = group_access(session, group_id, current_user.id)
+    if not group or not access.is_member:
+        flash("Accès non autorisé.", "error")
+        return redirect(url_for("groups.list_groups"))
+    is_owner = access.is_owner
 
-        return render_template("events/list.html", group=group, events=events, is_owner=is_owner)
-    finally:
-        session.close()
+    try:
+        page = _group_events_for_user(session, group_id, current_user.id, request.args.get("cursor"))
+    except InvalidCursor:
+        abort(400)
+    if request.args.get("partial"):
+        return load_more_response("partials/event_cards.html", page, events=page.items, is_owner=is_owner)
+
+    return render_template(
+        "events/list.html",
+        group=group,
+        events=page.items,
+        is_owner=is_owner,
+        next_cursor=page.next_cursor,
+        load_more_url=url_for("events.group_events", group_id=group_id),
+    )
 
 
-@events_bp.route("/create/<group_id>", methods=["GET", "POST"])
+@events_bp.route("/create/<uuid:group_id>", methods=["GET", "POST"])
 @login_required
 def create_event(group_id):
     """Créer un événement (propriétaire du groupe uniquement)."""
-    session = SessionLocal()
-    try:
-        group, is_owner, _ = _check_group_membership(session, group_id, current_user.id)
-        if not group or not is_owner:
-            flash("Accès non autorisé.", "error")
-            return redirect(url_for("groups.list_groups"))
-
-        group_subjects = (
-            session.query(Subject)
-            .join(GroupSubject, Subject.id == GroupSubject.subject_id)
-            .filter(GroupSubject.group_id == group_id)
-            .all()
-        )
-
-        if request.method == "POST":
-            name = request.form.get("name")
-            description = request.form.get("description")
-            subject_id = request.form.get("subject_id")
-            start_date_str = request.form.get("start_date")
-            end_date_str = request.form.get("end_date")
+    session = get_db()
+    group = session.get(Group, group_id)
+    if not group or not group_access(session, group_id, current_user.id).is_owner:
+        flash("Accès non autorisé.", "error")
+        return redirect(url_for("groups.list_groups"))
+
+    group_subjects = (
+        session.query(Subject)
+        .join(GroupSubject, Subject.id == GroupSubject.subject_id)
+        .filter(GroupSubject.group_id == group_id)
+        .all()
+    )
 
-            if not all([name, subject_id, start_date_str, end_date_str]):
-                flash("Tous les champs obligatoires doivent être remplis.", "error")
-                return redirect(request.url)
+    if request.method == "POST":
+        name = request.form.get("name")
+        description = request.form.get("description")
+        subject_id = request.form.get("subject_id")
+        start_date_str = request.form.get("start_date")
+        end_date_str = request.form.get("end_date")
 
-            if not session.query(GroupSubject).filter(
-                and_(GroupSubject.group_id == group_id, GroupSubject.subject_id == subject_id)
-            ).first():
-                flash("La matière sélectionnée n'est pas liée à ce groupe.", "error")
-                return redirect(request.url)
+        if not all([name, subject_id, start_date_str, end_date_str]):
+            flash("Tous les champs obligatoires doivent être remplis.", "error")
+            return redirect(request.url)
 
-            try:
-                start_date = datetime.fromisoformat(start_date_str)
-                end_date = datetime.fromisoformat(end_date_str)
-                if end_date <= start_date:
-                    flash("La date de fin doit être après la date de début.", "error")
-                    return redirect(request.url)
-            except ValueError:
-                flash("Format de date invalide.", "error")
+        subject_id = parse_uuid(subject_id)
+        if not subject_id or not session.query(GroupSubject).filter(
+            and_(GroupSubject.group_id == group_id, GroupSubject.subject_id == subject_id)
+        ).first():
+            flash("La matière sélectionnée n'est pas liée à ce groupe.", "error")
+            return redirect(request.url)
+
+        try:
+            start_date = datetime.fromisoformat(start_date_str)
+            end_date = datetime.fromisoformat(end_date_str)
+            if end_date <= start_date:
+                flash("La date de fin doit être après la date de début.", "error")
                 return redirect(request.url)
-
-            questions = (
-                session.query(Question)
-                .join(Question.document)
-                .filter(Question.document.has(subject_id=subject_id))
-                .all()
+        except ValueError:
+            flash("Format de date invalide.", "error")
+            return redirect(request.url)
+
+        # Nombre de questions par cours : seuls les ids tirés sortent ensuite de la base
+        counts = count_by_document(session, subject_id)
+        available = sum(counts.values())
+
+        required = 100  # 5 quiz × 20 questions
+        if available < required:
+            flash(
+                f"❌ La matière ne contient que {available} question(s), "
+                f"mais {required} sont nécessaires (5 quiz × 20 questions).",
+                "error",
             )
-
-            required = 100  # 5 quiz × 20 questions
-            if len(questions) < required:
-                flash(
-                    f"❌ La matière ne contient que {len(questions)} question(s), "
-                    f"mais {required} sont nécessaires (5 quiz × 20 questions).",
-                    "error",
-                )
-                return render_template("events/create.html", group=group, subjects=group_subjects)
-
-            event = Event(
-                name=name,
-                description=description,
-                group_id=group_id,
-                subject_id=subject_id,
-                start_date=start_date,
-                end_date=end_date,
+            return render_template("events/create.html", group=group, subjects=group_subjects)
+
+        event = Event(
+            name=name,
+            description=description,
+            group_id=group_id,
+            subject_id=subject_id,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        session.add(event)
+        session.flush()
+
+        # Tirage stratifié : chaque cours de la matière est représenté dans chaque quiz
+        drawn = sample_by_document(session, allocate(counts, required))
+        for i, question_ids in enumerate(deal(drawn, 5), 1):
+            quiz = EventQuiz(
+                event_id=event.id,
+                quiz_number=i,
+                question_links=[
+                    EventQuizQuestion(position=position, question_id=qid)
+                    for position, qid in enumerate(question_ids, 1)
+                ],
             )
-            session.add(event)
-            session.flush()
-
-            all_ids = [q.id for q in questions]
-            random.shuffle(all_ids)
+            session.add(quiz)
 
-            for i in range(1, 6):
-                quiz = EventQuiz(
-                    event_id=event.id,
-                    quiz_number=i,
-                    questions=json.dumps(all_ids[(i - 1) * 20 : i * 20]),
-                )
-                session.add(quiz)
-
-            session.commit()
-            logger.info(f"Événement créé : '{name}' dans groupe '{group.name}' par {current_user.username}")
-            flash(f"Événement '{name}' créé !", "success")
-            return redirect(url_for("events.group_events", group_id=group_id))
+        session.commit()
+        logger.info(f"Événement créé : '{name}' dans groupe '{group.name}' par {current_user.username}")
+        flash(f"Événement '{name}' créé !", "success")
+        return redirect(url_for("events.group_events", group_id=group_id))
 
-        return render_template("events/create.html", group=group, subjects=group_subjects)
-    finally:
-        session.close()
+    return render_template("events/create.html", group=group, subjects=group_subjects)
 
 
-@events_bp.route("/<event_id>")
+@events_bp.route("/<uuid:event_id>")
 @login_required
+@read_only
 def event_detail(event_id):
     """Détails d'un événement : classement + progression personnelle."""
-    session = SessionLocal()
-    try:
-        event = session.get(Event, event_id)
-        if not event:
-            flash("Événement introuvable.", "error")
-            return redirect(url_for("ui.home"))
+    session = get_db()
+    event = session.get(Event, event_id)
+    if not event:
+        flash("Événement introuvable.", "error")
+        return redirect(url_for("ui.home"))
+
+    access = group_access(session, event.group_id, current_user.id)
+    if not access.is_member:
+        flash("Accès non autorisé.", "error")
+        return redirect(url_for("groups.list_groups"))
+    is_owner = access.is_owner
+
+    # Progression de l'utilisateur
+    user_participations = (
+        session.query(EventParticipation)
+        .filter(EventParticipation.event_id == event_id, EventParticipation.user_id == current_user.id)
+        .order_by(EventParticipation.completed_at)
+        .all()
+    )
+    completed_count = len(user_participations)
+    next_quiz = completed_count + 1 if completed_count < 5 else None
+    user_correct = sum(p.correct_count for p in user_participations)
+    user_total_q = sum(p.total_questions for p in user_participations)
 
-        group, is_owner, is_member = _check_group_membership(session, event.group_id, current_user.id)
-        if not is_member:
-            flash("Accès non autorisé.", "error")
-            return redirect(url_for("groups.list_groups"))
+    # Classement : tranche autour de l'utilisateur (coût indépendant du nombre de participants)
+    leaderboard = leaderboard_page(session, event_id, current_user.id)
 
-        # Progression de l'utilisateur
-        user_participations = (
-            session.query(EventParticipation)
-            .filter(EventParticipation.event_id == event_id, EventParticipation.user_id == current_user.id)
-            .order_by(EventParticipation.completed_at)
-            .all()
-        )
-        completed_count = len(user_participations)
-        next_quiz = completed_count + 1 if completed_count < 5 else None
-        user_correct = sum(p.correct_count for p in user_participations)
-        user_total_q = sum(p.total_questions for p in user_participations)
-
-        # Classement
-        ranking_data = (
-            session.query(
-                EventParticipation.user_id,
-                func.sum(EventParticipation.correct_count).label("total_correct"),
-                func.sum(EventParticipation.total_questions).label("total_questions"),
-                func.count(EventParticipation.id).label("quiz_count"),
-            )
-            .filter(EventParticipation.event_id == event_id)
-            .group_by(EventParticipation.user_id)
-            .all()
-        )
+    # Questions les plus ratées (propriétaire uniquement)
+    hardest_questions = _question_stats(session, event_id, limit=5) if is_owner else []
 
-        ranking = []
-        for user_id, total_correct, total_questions, quiz_count in ranking_data:
-            user = session.get(User, user_id)
-            ranking.append({
-                "user": user,
-                "total_correct": total_correct,
-                "total_questions": total_questions,
-                "quiz_count": quiz_count,
-                "is_current_user": user_id == current_user.id,
-            })
-        ranking.sort(key=lambda x: x["total_correct"], reverse=True)
-        for idx, item in enumerate(ranking, 1):
-            item["rank"] = idx
-
-        # Stats
-        total_participants = len(ranking)
-        all_correct = sum(r["total_correct"] for r in ranking)
-        all_questions = sum(r["total_questions"] for r in ranking)
-        stats = {
-            "total_participants": total_participants,
-            "total_completions": sum(r["quiz_count"] for r in ranking),
-            "avg_correct": round(all_correct / total_participants, 1) if total_participants else 0,
-            "avg_total": round(all_questions / total_participants, 1) if total_participants else 0,
-            "total_quizzes": 5,
-        }
+    status = event.get_status()
+    can_play = status == "active" and next_quiz is not None
 
-        status = event.get_status()
-        can_play = status == "active" and next_quiz is not None
-
-        return render_template(
-            "events/detail.html",
-            event=event,
-            is_owner=is_owner,
-            ranking=ranking,
-            stats=stats,
-            user_participations=user_participations,
-            completed_count=completed_count,
-            next_quiz=next_quiz,
-            user_correct=user_correct,
-            user_total_q=user_total_q,
-            can_play=can_play,
-        )
-    finally:
-        session.close()
+    # Classement en direct : processus de diffusion s'il est déployé, sinon flux du worker
+    if status == "ended":
+        stream_url = None
+    elif fanout.FANOUT_URL:
+        stream_url = fanout.stream_url(current_app.secret_key, event)
+    else:
+        stream_url = url_for("events.leaderboard_stream", event_id=event_id)
+
+    return render_template(
+        "events/detail.html",
+        event=event,
+        is_owner=is_owner,
+        ranking=leaderboard["rows"],
+        leaderboard=leaderboard,
+        user_participations=user_participations,
+        completed_count=completed_count,
+        next_quiz=next_quiz,
+        user_correct=user_correct,
+        user_total_q=user_total_q,
+        can_play=can_play,
+        hardest_questions=hardest_questions,
+        stream_url=stream_url,
+    )
 
 
-@events_bp.route("/<event_id>/delete", methods=["POST"])
+@events_bp.route("/<uuid:event_id>/leaderboard/stream")
+@login_required
+def leaderboard_stream(event_id):
+    """
+    Flux SSE du classement : un message par participation (ligne du participant, son rang,
+    nombre de participants), appliqué par la page à sa tranche. Message « resync » si des
+    notifications ont pu être perdues (la page se recharge), « ended » à la fin de l'événement.
+    Le flux occupe un thread du worker : 204 (la page reste statique) si le worker en sert
+    déjà SSE_MAX_STREAMS.
+    """
+    session = get_db()
+    event = event_info(session, event_id)
+    if not event:
+        abort(404)
+    if not group_access(session, event.group_id, current_user.id).is_member:
+        abort(403)
+    end_date = event.end_date
+    if not notify.acquire_stream():
+        return "", 204
+
+    def stream():
+        with notify.subscribe(LEADERBOARD_CHANNEL, event_id) as messages:
+            yield ": connecté\n\n"
+            while datetime.now() < end_date:
+                try:
+                    message = messages.get(timeout=notify.SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is notify.RESYNC:
+                    yield notify.sse({}, "resync")
+                else:
+                    yield notify.sse({k: v for k, v in message.items() if k != "key"})
+            yield notify.sse({}, "ended")
+
+    response = Response(stream(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # pas de mise en tampon par nginx
+    })
+    response.call_on_close(notify.release_stream)
+    return response
+
+
+@events_bp.route("/<uuid:event_id>/delete", methods=["POST"])
 @login_required
 def delete_event(event_id):
     """Supprimer un événement (propriétaire du groupe uniquement)."""
-    session = SessionLocal()
+    session = get_db()
     try:
         event = session.get(Event, event_id)
         if not event:
             flash("Événement introuvable.", "error")
             return redirect(url_for("groups.list_groups"))
 
-        group, is_owner, _ = _check_group_membership(session, event.group_id, current_user.id)
-        if not is_owner:
+        if not group_access(session, event.group_id, current_user.id).is_owner:
             flash("Accès non autorisé.", "error")
             return redirect(url_for("groups.list_groups"))
 
@@ -304,197 +379,217 @@ def delete_event(event_id):
         session.rollback()
         flash(f"Erreur : {e}", "error")
         return redirect(url_for("events.group_events", group_id=event.group_id if event else ""))
-    finally:
-        session.close()
 
 
-@events_bp.route("/<event_id>/play/<int:quiz_number>")
+@events_bp.route("/<uuid:event_id>/play/<int:quiz_number>")
 @login_required
 def play_quiz(event_id, quiz_number):
     """Jouer un quiz d'événement."""
-    session = SessionLocal()
-    try:
-        event = session.get(Event, event_id)
-        if not event:
-            flash("Événement introuvable.", "error")
-            return redirect(url_for("ui.home"))
+    session = get_db()
+    event = event_info(session, event_id)
+    if not event:
+        flash("Événement introuvable.", "error")
+        return redirect(url_for("ui.home"))
 
-        _, _, is_member = _check_group_membership(session, event.group_id, current_user.id)
-        if not is_member:
-            flash("❌ Vous n'êtes pas membre de ce groupe.", "error")
-            return redirect(url_for("groups.list_groups"))
+    if not group_access(session, event.group_id, current_user.id).is_member:
+        flash("❌ Vous n'êtes pas membre de ce groupe.", "error")
+        return redirect(url_for("groups.list_groups"))
 
-        status = event.get_status()
-        if status == "future":
-            flash("⚠️ Cet événement n'a pas encore commencé.", "warning")
-            return redirect(url_for("events.event_detail", event_id=event_id))
-        if status == "ended":
-            flash("❌ Cet événement est terminé.", "error")
-            return redirect(url_for("events.event_detail", event_id=event_id))
-
-        if quiz_number < 1 or quiz_number > 5:
-            flash("❌ Numéro de quiz invalide.", "error")
-            return redirect(url_for("events.event_detail", event_id=event_id))
-
-        quiz = session.query(EventQuiz).filter(
-            and_(EventQuiz.event_id == event_id, EventQuiz.quiz_number == quiz_number)
-        ).first()
-        if not quiz:
-            flash("Quiz introuvable.", "error")
-            return redirect(url_for("events.event_detail", event_id=event_id))
-
-        existing = session.query(EventParticipation).filter(
-            EventParticipation.quiz_id == quiz.id,
-            EventParticipation.user_id == current_user.id,
-        ).first()
-        if existing:
-            flash("⚠️ Vous avez déjà complété ce quiz.", "warning")
-            return redirect(url_for("events.quiz_result", event_id=event_id, participation_id=existing.id))
-
-        completed_count = session.query(EventParticipation).filter(
-            EventParticipation.event_id == event_id,
-            EventParticipation.user_id == current_user.id,
-        ).count()
-        expected = completed_count + 1
-        if quiz_number != expected:
-            flash(f"🔒 Vous devez d'abord compléter le Quiz {expected}.", "error")
-            return redirect(url_for("events.event_detail", event_id=event_id))
-
-        question_ids = json.loads(quiz.questions)
-        questions = session.query(Question).filter(Question.id.in_(question_ids)).all()
-        q_dict = {q.id: q for q in questions}
-        questions_ordered = [q_dict[qid] for qid in question_ids if qid in q_dict]
-
-        return render_template("events/play.html", event=event, quiz=quiz, questions=questions_ordered)
-    finally:
-        session.close()
-
-
-@events_bp.route("/<event_id>/submit/<int:quiz_number>", methods=["POST"])
-@login_required
-def submit_quiz(event_id, quiz_number):
-    """Soumettre les réponses d'un quiz d'événement."""
-    session = SessionLocal()
-    try:
-        event = session.get(Event, event_id)
-        if not event:
-            return jsonify({"error": "Événement introuvable"}), 404
+    status = event.get_status()
+    if status == "future":
+        flash("⚠️ Cet événement n'a pas encore commencé.", "warning")
+        return redirect(url_for("events.event_detail", event_id=event_id))
+    if status == "ended":
+        flash("❌ Cet événement est terminé.", "error")
+        return redirect(url_for("events.event_detail", event_id=event_id))
+
+    if quiz_number < 1 or quiz_number > 5:
+        flash("❌ Numéro de quiz invalide.", "error")
+        return redirect(url_for("events.event_detail", event_id=event_id))
+
+    quiz = session.query(EventQuiz).filter(
+        and_(EventQuiz.event_id == event_id, EventQuiz.quiz_number == quiz_number)
+    ).first()
+    if not quiz:
+        flash("Quiz introuvable.", "error")
+        return redirect(url_for("events.event_detail", event_id=event_id))
+
+    existing = session.query(EventParticipation).filter(
+        EventParticipation.quiz_id == quiz.id,
+        EventParticipation.user_id == current_user.id,
+    ).first()
+    if existing:
+        flash("⚠️ Vous avez déjà complété ce quiz.", "warning")
+        return redirect(url_for("events.quiz_result", event_id=event_id, participation_id=existing.id))
+
+    completed_count = session.query(EventParticipation).filter(
+        EventParticipation.event_id == event_id,
+        EventParticipation.user_id == current_user.id,
+    ).count()
+    expected = completed_count + 1
+    if quiz_number != expected:
+        flash(f"🔒 Vous devez d'abord compléter le Quiz {expected}.", "error")
+        return redirect(url_for("events.event_detail", event_id=event_id))
 
-        _, _, is_member = _check_group_membership(session, event.group_id, current_user.id)
-        if not is_member:
-            return jsonify({"error": "Accès non autorisé"}), 403
+    questions = event_quiz_questions(session, quiz.id)
 
-        if event.get_status() != "active":
-            return jsonify({"error": "Événement non actif"}), 403
+    return render_template("events/play.html", event=event, quiz=quiz, questions=questions)
 
-        if quiz_number < 1 or quiz_number > 5:
-            return jsonify({"error": "Numéro de quiz invalide"}), 400
 
-        quiz = session.query(EventQuiz).filter(
-            and_(EventQuiz.event_id == event_id, EventQuiz.quiz_number == quiz_number)
-        ).first()
-        if not quiz:
-            return jsonify({"error": "Quiz introuvable"}), 404
+@events_bp.route("/<uuid:event_id>/submit/<int:quiz_number>", methods=["POST"])
+@login_required
+def submit_quiz(event_id, quiz_number):
+    """Soumettre les réponses d'un quiz d'événement."""
+    session = get_db()
+    event = event_info(session, event_id)
+    if not event:
+        return jsonify({"error": "Événement introuvable"}), 404
+
+    if not group_access(session, event.group_id, current_user.id).is_member:
+        return jsonify({"error": "Accès non autorisé"}), 403
+
+    if event.get_status() != "active":
+        return jsonify({"error": "Événement non actif"}), 403
+
+    if quiz_number < 1 or quiz_number > 5:
+        return jsonify({"error": "Numéro de quiz invalide"}), 400
+
+    quiz = session.query(EventQuiz).filter(
+        and_(EventQuiz.event_id == event_id, EventQuiz.quiz_number == quiz_number)
+    ).first()
+    if not quiz:
+        return jsonify({"error": "Quiz introuvable"}), 404
+
+    if session.query(EventParticipation).filter(
+        EventParticipation.quiz_id == quiz.id,
+        EventParticipation.user_id == current_user.id,
+    ).first():
+        return jsonify({"error": "Quiz déjà complété"}), 400
+
+    completed_count = session.query(EventParticipation).filter(
+        EventParticipation.event_id == event_id,
+        EventParticipation.user_id == current_user.id,
+    ).count()
+    if quiz_number != completed_count + 1:
+        return jsonify({"error": f"Complétez le Quiz {completed_count + 1} d'abord"}), 403
+
+    data = request.get_json()
+    answers = data.get("answers", {})
+    time_spent = data.get("time_spent", 0)
+
+    questions = event_quiz_questions(session, quiz.id)
+
+    participation_id = new_id()
+    correct_count = 0
+    answer_rows = []
+    for position, question in enumerate(questions, 1):
+        user_answer = answers.get(question.id, "")
+        is_correct = question.type.value == "qcm" and question.is_correct(user_answer)
+        if is_correct:
+            correct_count += 1
+        answer_rows.append({
+            "participation_id": participation_id,
+            "position": position,
+            "event_id": event_id,
+            "question_id": question.id,
+            "user_answer": user_answer,
+            "is_correct": is_correct,
+        })
 
-        if session.query(EventParticipation).filter(
-            EventParticipation.quiz_id == quiz.id,
-            EventParticipation.user_id == current_user.id,
-        ).first():
-            return jsonify({"error": "Quiz déjà complété"}), 400
-
-        completed_count = session.query(EventParticipation).filter(
-            EventParticipation.event_id == event_id,
-            EventParticipation.user_id == current_user.id,
-        ).count()
-        if quiz_number != completed_count + 1:
-            return jsonify({"error": f"Complétez le Quiz {completed_count + 1} d'abord"}), 403
-
-        data = request.get_json()
-        answers = data.get("answers", {})
-        time_spent = data.get("time_spent", 0)
-
-        question_ids = json.loads(quiz.questions)
-        questions = session.query(Question).filter(Question.id.in_(question_ids)).all()
-        q_dict = {q.id: q for q in questions}
-
-        correct_count = 0
-        detailed_answers = []
-        for qid in question_ids:
-            if qid not in q_dict:
-                continue
-            question = q_dict[qid]
-            user_answer = answers.get(qid, "")
-            is_correct = question.type.value == "qcm" and user_answer.strip().lower() == question.answer.strip().lower()
-            if is_correct:
-                correct_count += 1
-            detailed_answers.append({
-                "question_id": qid,
-                "user_answer": user_answer,
-                "correct_answer": question.answer,
-                "is_correct": is_correct,
-            })
-
-        participation = EventParticipation(
-            event_id=event_id,
-            quiz_id=quiz.id,
-            user_id=current_user.id,
-            correct_count=correct_count,
-            total_questions=len(question_ids),
-            time_spent=time_spent,
-            answers=json.dumps(detailed_answers),
-        )
-        session.add(participation)
+    # Participation, réponses, classement et notification des pages de classement ouvertes :
+    # un seul aller-retour (mode pipeline), puis le commit
+    try:
+        with pipeline(session):
+            session.execute(insert(EventParticipation).values(
+                id=participation_id,
+                event_id=event_id,
+                quiz_id=quiz.id,
+                user_id=current_user.id,
+                correct_count=correct_count,
+                total_questions=len(questions),
+                time_spent=time_spent,
+            ))
+            if answer_rows:
+                session.execute(insert(EventAnswer).values(answer_rows))
+            record_participation(session, event_id, current_user.id, correct_count, len(questions), time_spent)
+            publish_participation(session, event_id, current_user.id, correct_count, len(questions), time_spent)
         session.commit()
+    except IntegrityError:
+        # Double clic ou second onglet : l'autre envoi a enregistré la participation entre
+        # la vérification et l'insertion (contrainte unique quiz + utilisateur)
+        session.rollback()
+        return jsonify({"error": "Quiz déjà complété"}), 400
 
-        logger.info(f"Participation : {current_user.username} - quiz {quiz_number} - {correct_count}/{len(question_ids)} ({time_spent}s)")
+    logger.info(f"Participation : {current_user.username} - quiz {quiz_number} - {correct_count}/{len(questions)} ({time_spent}s)")
 
-        return jsonify({
-            "success": True,
-            "correct": correct_count,
-            "total": len(question_ids),
-            "redirect": url_for("events.quiz_result", event_id=event_id, participation_id=participation.id),
-        })
-    finally:
-        session.close()
+    return jsonify({
+        "success": True,
+        "correct": correct_count,
+        "total": len(questions),
+        "redirect": url_for("events.quiz_result", event_id=event_id, participation_id=participation_id),
+    })
 
 
-@events_bp.route("/<event_id>/result/<participation_id>")
+@events_bp.route("/<uuid:event_id>/result/<uuid:participation_id>")
 @login_required
+@read_only
 def quiz_result(event_id, participation_id):
     """Résultat d'un quiz complété."""
-    session = SessionLocal()
-    try:
-        participation = session.get(EventParticipation, participation_id)
-        if not participation or participation.user_id != current_user.id:
-            flash("Résultat introuvable.", "error")
-            return redirect(url_for("ui.home"))
+    session = get_db()
+    participation = session.get(EventParticipation, participation_id)
+    if not participation or participation.user_id != current_user.id:
+        flash("Résultat introuvable.", "error")
+        return redirect(url_for("ui.home"))
+
+    event = event_info(session, event_id)
+    quiz = session.get(EventQuiz, participation.quiz_id)
+
+    # Réponses de la participation ; les questions viennent du jeu du quiz en cache
+    questions = {q.id: q for q in event_quiz_questions(session, participation.quiz_id)}
+    answers = (
+        session.query(EventAnswer)
+        .filter(EventAnswer.participation_id == participation.id)
+        .order_by(EventAnswer.position)
+        .all()
+    )
+    detailed_answers = [
+        {
+            "question_id": answer.question_id,
+            "user_answer": answer.user_answer,
+            "correct_answer": questions[answer.question_id].answer,
+            "is_correct": answer.is_correct,
+            "question": questions[answer.question_id],
+        }
+        for answer in answers
+    ]
 
-        event = session.get(Event, event_id)
-        quiz = session.get(EventQuiz, participation.quiz_id)
-
-        detailed_answers = json.loads(participation.answers)
-        q_ids = [a["question_id"] for a in detailed_answers]
-        questions = session.query(Question).filter(Question.id.in_(q_ids)).all()
-        q_dict = {q.id: q for q in questions}
-
-        for answer in detailed_answers:
-            qid = answer["question_id"]
-            if qid in q_dict:
-                answer["question"] = q_dict[qid]
-
-        completed_count = session.query(EventParticipation).filter(
-            EventParticipation.event_id == event_id,
-            EventParticipation.user_id == current_user.id,
-        ).count()
-        next_quiz = completed_count + 1 if completed_count < 5 else None
-
-        return render_template(
-            "events/result.html",
-            event=event,
-            quiz=quiz,
-            participation=participation,
-            detailed_answers=detailed_answers,
-            next_quiz=next_quiz,
-        )
-    finally:
-        session.close()
+    completed_count = session.query(EventParticipation).filter(
+        EventParticipation.event_id == event_id,
+        EventParticipation.user_id == current_user.id,
+    ).count()
+    next_quiz = completed_count + 1 if completed_count < 5 else None
+
+    return render_template(
+        "events/result.html",
+        event=event,
+        quiz=quiz,
+        participation=participation,
+        detailed_answers=detailed_answers,
+        next_quiz=next_quiz,
+    )
+
+
+@events_bp.route("/<uuid:event_id>/stats/questions")
+@login_required
+@read_only
+def question_stats(event_id):
+    """Statistiques par question d'un événement (propriétaire du groupe uniquement)."""
+    session = get_db()
+    event = event_info(session, event_id)
+    if not event:
+        return jsonify({"error": "Événement introuvable"}), 404
+
+    if not group_access(session, event.group_id, current_user.id).is_owner:
+        return jsonify({"error": "Accès non autorisé"}), 403
+
+    return jsonify({"questions": _question_stats(session, event_id)})
@@ -1,10 +1,13 @@
 # app/routes/groups.py
 import logging
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, abort, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func
-from ..db import SessionLocal
-from ..models import Group, GroupMember, User, Subject, Document, GroupSubject, generate_invite_code
+from sqlalchemy import and_, case, func, or_
+from ..counters import adjust_member_count
+from ..db import get_db, read_only
+from ..models import Group, GroupMember, User, Subject, Document, GroupSubject, generate_invite_code, parse_uuid
+from ..pagination import InvalidCursor, load_more_response, paginate
+from ..read_models import group_access
 
 groups_bp = Blueprint("groups", __name__, url_prefix="/groups")
 logger = logging.getLogger("app.groups")
@@ -19,11 +22,8 @@ def _get_group_access(session, group_id, user_id):
     group = session.get(Group, group_id)
     if not group:
         return None, False, False
-    is_owner = group.owner_id == user_id
-    is_member = is_owner or session.query(GroupMember).filter_by(
-        group_id=group_id, user_id=user_id
-    ).first() is not None
-    return group, is_owner, is_member
+    access = group_access(session, group_id, user_id)
+    return group, access.is_owner, access.is_member
 
 
 # ============================================
@@ -32,46 +32,33 @@ def _get_group_access(session, group_id, user_id):
 
 @groups_bp.route("/")
 @login_required
+@read_only
 def list_groups():
     """Liste unifiée : groupes créés et groupes rejoints."""
-    session = SessionLocal()
-    try:
-        # Groupes dont l'utilisateur est propriétaire
-        owned = session.query(Group).filter_by(owner_id=current_user.id).order_by(Group.created_at.desc()).all()
-
-        # Groupes dont l'utilisateur est membre (mais pas propriétaire)
-        joined_rows = (
-            session.query(GroupMember, Group, User)
-            .join(Group, GroupMember.group_id == Group.id)
-            .join(User, Group.owner_id == User.id)
-            .filter(GroupMember.user_id == current_user.id, Group.owner_id != current_user.id)
-            .order_by(GroupMember.joined_at.desc())
-            .all()
-        )
-
-        groups_data = []
-
-        for group in owned:
-            member_count = session.query(GroupMember).filter_by(group_id=group.id).count()
-            groups_data.append({
-                'group': group,
-                'is_owner': True,
-                'member_count': member_count,
-                'owner': None,
-            })
-
-        for _membership, group, owner in joined_rows:
-            member_count = session.query(GroupMember).filter_by(group_id=group.id).count()
-            groups_data.append({
-                'group': group,
-                'is_owner': False,
-                'member_count': member_count,
-                'owner': owner,
-            })
-
-        return render_template("groups/index.html", groups=groups_data)
-    finally:
-        session.close()
+    session = get_db()
+    # Une seule requête : groupes possédés (les plus récents d'abord) puis groupes rejoints
+    # (par date d'adhésion) ; le nombre de membres est lu sur groups.member_count.
+    is_owner = Group.owner_id == current_user.id
+    rows = (
+        session.query(Group, User)
+        .join(User, Group.owner_id == User.id)
+        .outerjoin(GroupMember, and_(GroupMember.group_id == Group.id, GroupMember.user_id == current_user.id))
+        .filter(or_(is_owner, GroupMember.id.isnot(None)))
+        .order_by(is_owner.desc(), case((is_owner, Group.created_at), else_=GroupMember.joined_at).desc())
+        .all()
+    )
+
+    groups_data = [
+        {
+            'group': group,
+            'is_owner': group.owner_id == current_user.id,
+            'member_count': group.member_count,
+            'owner': None if group.owner_id == current_user.id else owner,
+        }
+        for group, owner in rows
+    ]
+
+    return render_template("groups/index.html", groups=groups_data)
 
 
 @groups_bp.route("/create", methods=["POST"])
@@ -85,7 +72,7 @@ def create_group():
         flash("Le nom du groupe est obligatoire.", "error")
         return redirect(url_for("groups.list_groups"))
 
-    session = SessionLocal()
+    session = get_db()
     try:
         invite_code = generate_invite_code()
         while session.query(Group).filter_by(invite_code=invite_code).first():
@@ -102,6 +89,7 @@ def create_group():
 
         # Ajouter le propriétaire comme premier membre
         session.add(GroupMember(group_id=new_group.id, user_id=current_user.id))
+        adjust_member_count(session, new_group.id, 1)
         session.commit()
 
         logger.info(f"Groupe créé : '{name}' (code: {invite_code}) par {current_user.username}")
@@ -111,8 +99,6 @@ def create_group():
         session.rollback()
         flash(f"Erreur lors de la création : {e}", "error")
         return redirect(url_for("groups.list_groups"))
-    finally:
-        session.close()
 
 
 @groups_bp.route("/join", methods=["POST"])
@@ -125,7 +111,7 @@ def join_group():
         flash("Veuillez entrer un code d'invitation.", "error")
         return redirect(url_for("groups.list_groups"))
 
-    session = SessionLocal()
+    session = get_db()
     try:
         group = session.query(Group).filter(func.upper(Group.invite_code) == invite_code).first()
         if not group:
@@ -138,6 +124,7 @@ def join_group():
             return redirect(url_for("groups.list_groups"))
 
         session.add(GroupMember(group_id=group.id, user_id=current_user.id))
+        adjust_member_count(session, group.id, 1)
         session.commit()
 
         logger.info(f"{current_user.username} a rejoint le groupe '{group.name}'")
@@ -147,78 +134,74 @@ def join_group():
         session.rollback()
         flash(f"Erreur : {e}", "error")
         return redirect(url_for("groups.list_groups"))
-    finally:
-        session.close()
 
 
-@groups_bp.route("/<group_id>")
+@groups_bp.route("/<uuid:group_id>")
 @login_required
+@read_only
 def view_group(group_id):
     """Vue unifiée du groupe : propriétaire voit les contrôles de gestion, membres voient les matières."""
-    session = SessionLocal()
-    try:
-        group, is_owner, is_member = _get_group_access(session, group_id, current_user.id)
-        if not group:
-            flash("Groupe introuvable.", "error")
-            return redirect(url_for("groups.list_groups"))
-        if not is_member:
-            flash("Vous n'êtes pas membre de ce groupe.", "error")
-            return redirect(url_for("groups.list_groups"))
-
-        # Membres
-        members_rows = (
-            session.query(GroupMember, User)
-            .join(User)
-            .filter(GroupMember.group_id == group_id)
-            .order_by(GroupMember.joined_at.desc())
-            .all()
-        )
-        members_data = [{'member': m, 'user': u, 'is_owner': u.id == group.owner_id} for m, u in members_rows]
-
-        # Propriétaire
-        owner = session.get(User, group.owner_id)
-
-        # Matières liées
-        group_subjects = (
-            session.query(GroupSubject, Subject)
-            .join(Subject)
-            .filter(GroupSubject.group_id == group_id)
-            .order_by(Subject.name)
-            .all()
-        )
-        subjects_data = []
-        for gs, subject in group_subjects:
-            doc_count = session.query(Document).filter_by(subject_id=subject.id).count()
-            subjects_data.append({'group_subject': gs, 'subject': subject, 'document_count': doc_count})
-
-        # Matières disponibles à ajouter (celles du propriétaire non encore liées)
-        available_subjects = []
-        if is_owner:
-            linked_ids = [s.id for _, s in group_subjects]
-            q = session.query(Subject).filter(Subject.user_id == current_user.id)
-            if linked_ids:
-                q = q.filter(~Subject.id.in_(linked_ids))
-            available_subjects = q.order_by(Subject.name).all()
-
-        return render_template(
-            "groups/detail.html",
-            group=group,
-            owner=owner,
-            is_owner=is_owner,
-            members=members_data,
-            subjects=subjects_data,
-            available_subjects=available_subjects,
-            member_count=len(members_data),
-        )
-    finally:
-        session.close()
-
+    session = get_db()
+    group, is_owner, is_member = _get_group_access(session, group_id, current_user.id)
+    if not group:
+        flash("Groupe introuvable.", "error")
+        return redirect(url_for("groups.list_groups"))
+    if not is_member:
+        flash("Vous n'êtes pas membre de ce groupe.", "error")
+        return redirect(url_for("groups.list_groups"))
 
-@groups_bp.route("/<group_id>/delete", methods=["POST"])
+    # Membres
+    members_rows = (
+        session.query(GroupMember, User)
+        .join(User)
+        .filter(GroupMember.group_id == group_id)
+        .order_by(GroupMember.joined_at.desc())
+        .all()
+    )
+    members_data = [{'member': m, 'user': u, 'is_owner': u.id == group.owner_id} for m, u in members_rows]
+
+    # Propriétaire
+    owner = session.get(User, group.owner_id)
+
+    # Matières liées
+    group_subjects = (
+        session.query(GroupSubject, Subject)
+        .join(Subject)
+        .filter(GroupSubject.group_id == group_id)
+        .order_by(Subject.name)
+        .all()
+    )
+    subjects_data = [
+        {'group_subject': gs, 'subject': subject, 'document_count': subject.document_count}
+        for gs, subject in group_subjects
+    ]
+
+    # Matières disponibles à ajouter (celles du propriétaire non encore liées)
+    available_subjects = []
+    if is_owner:
+        linked_ids = [s.id for _, s in group_subjects]
+        q = session.query(Subject).filter(Subject.user_id == current_user.id)
+        if linked_ids:
+            q = q.filter(~Subject.id.in_(linked_ids))
+        available_subjects = q.order_by(Subject.name).all()
+
+    return render_template(
+        "groups/detail.html",
+        group=group,
+        owner=owner,
+        is_owner=is_owner,
+        members=members_data,
+        subjects=subjects_data,
+        available_subjects=available_subjects,
+        member_count=len(members_data),
+    )
+
+
+@groups_bp.route("/<uuid:group_id>/delete", methods=["POST"])
 @login_required
 def delete_group(group_id):
     """Supprimer un groupe (propriétaire uniquement)."""
-    session = SessionLocal()
+    session = get_db()
     try:
         group, is_owner, _ = _get_group_access(session, group_id, current_user.id)
         if not group or not is_owner:
@@ -251,11 +234,9 @@ def delete_group(group_id):
         session.rollback()
         flash(f"Erreur : {e}", "error")
         return redirect(url_for("groups.view_group", group_id=group_id))
-    finally:
-        session.close()
 
 
-@groups_bp.route("/<group_id>/subjects/add", methods=["POST"])
+@groups_bp.route("/<uuid:group_id>/subjects/add", methods=["POST"])
 @login_required
 def add_subject_to_group(group_id):
     """Ajouter une matière au groupe (propriétaire uniquement)."""
@@ -263,8 +244,12 @@ def add_subject_to_group(group_id):
     if not subject_id:
         flash("Veuillez sélectionner une matière.", "error")
         return redirect(url_for("groups.view_group", group_id=group_id))
+    subject_id = parse_uuid(subject_id)
+    if not subject_id:
+        flash("Matière introuvable.", "error")
+        return redirect(url_for("groups.view_group", group_id=group_id))
 
-    session = SessionLocal()
+    session = get_db()
     try:
         group, is_owner, _ = _get_group_access(session, group_id, current_user.id)
         if not group or not is_owner:
@@ -287,16 +272,14 @@ def add_subject_to_group(group_id):
     except Exception as e:
         session.rollback()
         flash(f"Erreur : {e}", "error")
-    finally:
-        session.close()
     return redirect(url_for("groups.view_group", group_id=group_id))
 
 
-@groups_bp.route("/<group_id>/subjects/<subject_id>/remove", methods=["POST"])
+@groups_bp.route("/<uuid:group_id>/subjects/<uuid:subject_id>/remove", methods=["POST"])
 @login_required
 def remove_subject_from_group(group_id, subject_id):
     """Retirer une matière du groupe (propriétaire uniquement)."""
-    session = SessionLocal()
+    session = get_db()
     try:
         group, is_owner, _ = _get_group_access(session, group_id, current_user.id)
         if not group or not is_owner:
@@ -332,16 +315,14 @@ def remove_subject_from_group(group_id, subject_id):
     except Exception as e:
         session.rollback()
         flash(f"Erreur : {e}", "error")
-    finally:
-        session.close()
     return redirect(url_for("groups.view_group", group_id=group_id))
 
 
-@groups_bp.route("/<group_id>/leave", methods=["POST"])
+@groups_bp.route("/<uuid:group_id>/leave", methods=["POST"])
 @login_required
 def leave_group(group_id):
     """Quitter un groupe (les propriétaires ne peuvent pas quitter, ils doivent supprimer)."""
-    session = SessionLocal()
+    session = get_db()
     try:
         group, is_owner, is_member = _get_group_access(session, group_id, current_user.id)
 
@@ -371,6 +352,7 @@ def leave_group(group_id):
         membership = session.query(GroupMember).filter_by(group_id=group_id, user_id=current_user.id).first()
         group_name = group.name
         session.delete(membership)
+        adjust_member_count(session, group_id, -1)
         session.commit()
         logger.info(f"{current_user.username} a quitté le groupe '{group_name}'")
         flash(f"Vous avez quitté '{group_name}'.", "success")
@@ -379,52 +361,60 @@ def leave_group(group_id):
         session.rollback()
         flash(f"Erreur : {e}", "error")
         return redirect(url_for("groups.view_group", group_id=group_id))
-    finally:
-        session.close()
 
 
-@groups_bp.route("/<group_id>/subjects/<subject_id>/documents")
+@groups_bp.route("/<uuid:group_id>/subjects/<uuid:subject_id>/documents")
 @login_required
+@read_only
 def view_subject_documents(group_id, subject_id):
     """Voir les cours d'une matière du groupe."""
-    session = SessionLocal()
-    try:
-        group, _, is_member = _get_group_access(session, group_id, current_user.id)
-        if not group or not is_member:
-            flash("Accès non autorisé.", "error")
-            return redirect(url_for("groups.list_groups"))
+    session = get_db()
+    group, _, is_member = _get_group_access(session, group_id, current_user.id)
+    if not group or not is_member:
+        flash("Accès non autorisé.", "error")
+        return redirect(url_for("groups.list_groups"))
 
-        gs = session.query(GroupSubject).filter_by(group_id=group_id, subject_id=subject_id).first()
-        if not gs:
-            flash("Matière non disponible dans ce groupe.", "error")
-            return redirect(url_for("groups.view_group", group_id=group_id))
+    gs = session.query(GroupSubject).filter_by(group_id=group_id, subject_id=subject_id).first()
+    if not gs:
+        flash("Matière non disponible dans ce groupe.", "error")
+        return redirect(url_for("groups.view_group", group_id=group_id))
 
-        subject = session.get(Subject, subject_id)
-        documents = session.query(Document).filter_by(subject_id=subject_id).order_by(Document.created_at.desc()).all()
+    query = session.query(Document).filter_by(subject_id=subject_id)
+    try:
+        page = paginate(query, (Document.created_at, Document.id), request.args.get("cursor"))
+    except InvalidCursor:
+        abort(400)
+    if request.args.get("partial"):
+        return load_more_response(
+            "partials/group_document_cards.html", page, documents=page.items,
+        )
 
-        return render_template("groups/subject_documents.html", group=group, subject=subject, documents=documents)
-    finally:
-        session.close()
+    subject = session.get(Subject, subject_id)
+    return render_template(
+        "groups/subject_documents.html",
+        group=group,
+        subject=subject,
+        documents=page.items,
+        next_cursor=page.next_cursor,
+        load_more_url=url_for("groups.view_subject_documents", group_id=group_id, subject_id=subject_id),
+    )
 
 
-@groups_bp.route("/<group_id>/subjects/<subject_id>/documents/<document_id>")
+@groups_bp.route("/<uuid:group_id>/subjects/<uuid:subject_id>/documents/<uuid:document_id>")
 @login_required
+@read_only
 def view_document(group_id, subject_id, document_id):
     """Contenu d'un cours (JSON pour modal)."""
-    session = SessionLocal()
-    try:
-        _, _, is_member = _get_group_access(session, group_id, current_user.id)
-        if not is_member:
-            return jsonify({'error': 'Accès non autorisé'}), 403
+    session = get_db()
+    if not group_access(session, group_id, current_user.id).is_member:
+        return jsonify({'error': 'Accès non autorisé'}), 403
 
-        gs = session.query(GroupSubject).filter_by(group_id=group_id, subject_id=subject_id).first()
-        if not gs:
-            return jsonify({'error': 'Matière non disponible'}), 404
+    gs = session.query(GroupSubject).filter_by(group_id=group_id, subject_id=subject_id).first()
+    if not gs:
+        return jsonify({'error': 'Matière non disponible'}), 404
 
-        doc = session.query(Document).filter_by(id=document_id, subject_id=subject_id).first()
-        if not doc:
-            return jsonify({'error': 'Document introuvable'}), 404
+    doc = session.query(Document).filter_by(id=document_id, subject_id=subject_id).first()
+    if not doc:
+        return jsonify({'error': 'Document introuvable'}), 404
 
-        return jsonify({'title': doc.title, 'content': doc.content})
-    finally:
-        session.close()
+    return jsonify({'title': doc.title, 'content': doc.content})
@@ -0,0 +1,22 @@
+# app/routes/monitoring.py
+# Export des métriques (format texte Prometheus) pour le scraping.
+# Si METRICS_TOKEN est défini, l'appel doit fournir "Authorization: Bearer <token>".
+
+import hmac
+import os
+from flask import Blueprint, Response, abort, request
+from ..extensions import limiter
+from .. import metrics
+
+bp = Blueprint("monitoring", __name__)
+
+
+@bp.route("/metrics")
+@limiter.exempt
+def export_metrics():
+    token = os.getenv("METRICS_TOKEN")
+    if token:
+        provided = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(provided, token):
+            abort(404)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
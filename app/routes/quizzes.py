@@ -1,12 +1,16 @@
 # app/routes/quizzes.py
 import logging
-from flask import Blueprint, request, jsonify, current_app
+import queue
+from flask import Blueprint, Response, request, jsonify, current_app, url_for
 from flask_login import login_required, current_user
-from datetime import datetime, time
-from ..db import SessionLocal
-from ..models import Document, Question, QuestionType, QuizGeneration
-from ..llm import generate_quiz_from_text
-import uuid
+from datetime import date
+from sqlalchemy.exc import IntegrityError
+from .. import fanout, generation, notify
+from ..db import SessionLocal, get_db
+from ..generation import calculate_questions_count, job_state, question_from_item
+from ..models import Document, GenerationJob, Question, parse_uuid
+from ..llm import generate_quiz_from_text, last_token_count
+from ..quota import reserve_generation, release_generation, record_tokens
 
 bp = Blueprint("quizzes", __name__, url_prefix="/api/quizzes")
 logger = logging.getLogger("app.quizzes")
@@ -14,47 +18,22 @@ logger = logging.getLogger("app.quizzes")
 # Rate limiter pour éviter l'abus de génération (appels API Gemini coûteux)
 from ..extensions import limiter
 
-def calculate_questions_count(word_count: int) -> int:
-    """
-    Calcule le nombre de questions optimal basé sur le nombre de mots.
-    - < 800 mots : 30 questions (Petit cours)
-    - 800-1500 mots : 40 questions (Moyen cours)
-    - > 1500 mots : 50 questions (Grand cours)
-    """
-    if word_count < 800:
-        return 30
-    elif word_count <= 1500:
-        return 40
-    else:
-        return 50
-
-# Limite : 10 requêtes/minute par IP (en plus de la limite quotidienne par user)
+# Limite : 10 requêtes/minute par utilisateur (en plus de la limite quotidienne)
 @bp.route("/generate", methods=["POST"])
 @limiter.limit("10 per minute")
 @login_required
 def generate_quiz():
-    document_id = request.args.get("document_id")
+    document_id = parse_uuid(request.args.get("document_id"))
     if not document_id:
         return jsonify({"error": "Paramètre 'document_id' requis"}), 400
 
-    session = SessionLocal()
+    session = get_db()
+    today = date.today()
+    reserved = False
     try:
         # Appliquer la limite seulement si activée
         quiz_limit_enabled = current_app.config.get("QUIZ_LIMIT_ENABLED", False)
         daily_limit = current_app.config.get("DAILY_QUIZ_LIMIT", 10)
-        today_start = datetime.combine(datetime.now().date(), time.min)
-        daily_count = session.query(QuizGeneration).filter(
-            QuizGeneration.user_id == current_user.id,
-            QuizGeneration.created_at >= today_start
-        ).count()
-
-        if quiz_limit_enabled and daily_count >= daily_limit:
-            remaining = 0
-            logger.warning(f"Quota atteint : {current_user.username} ({daily_limit}/{daily_limit})")
-            return jsonify({
-                "error": f"Limite atteinte ({daily_limit}/{daily_limit} aujourd'hui). Reviens demain !",
-                "quota_remaining": remaining,
-            }), 429
 
         document = session.get(Document, document_id)
         if not document:
@@ -64,6 +43,25 @@ def generate_quiz():
         if existing:
             return jsonify({"message": "Quiz déjà généré pour ce document"}), 200
 
+        # Génération en arrière-plan en cours : ses questions ne sont pas encore visibles
+        if generation.active_job(session, document_id):
+            session.commit()
+            return jsonify({"error": "Génération déjà en cours pour ce document"}), 409
+
+        # Réserver la génération avant l'appel au LLM (upsert atomique : pas de
+        # dépassement du quota par des requêtes simultanées)
+        daily_count = reserve_generation(
+            session, current_user.id, daily_limit if quiz_limit_enabled else None, day=today,
+        )
+        if daily_count is None:
+            logger.warning(f"Quota atteint : {current_user.username} ({daily_limit}/{daily_limit})")
+            return jsonify({
+                "error": f"Limite atteinte ({daily_limit}/{daily_limit} aujourd'hui). Reviens demain !",
+                "quota_remaining": 0,
+            }), 429
+        session.commit()
+        reserved = True
+
         # Détection automatique du nombre de questions
         from ..extract import count_words
         word_count = count_words(document.content)
@@ -71,6 +69,12 @@ def generate_quiz():
 
         questions, error = generate_quiz_from_text(document.content, total_questions=total_questions)
 
+        if error or not questions:
+            # Génération échouée : elle ne compte pas dans le quota
+            release_generation(session, current_user.id, today)
+            session.commit()
+            reserved = False
+
         if error == "quota_exceeded":
             logger.warning(f"API Gemini indisponible (toutes clés épuisées) pour {current_user.username}")
             return jsonify({"error": "Service temporairement indisponible. Réessaie plus tard."}), 503
@@ -80,23 +84,13 @@ def generate_quiz():
         elif not questions:
             return jsonify({"error": "Aucune question générée"}), 500
 
-        for q in questions:
-            question = Question(
-                id=str(uuid.uuid4()),
-                document_id=document_id,
-                type=QuestionType.qcm if q["type"] == "qcm" else QuestionType.ouverte,
-                question=q["question"],
-                choices=q.get("choices"),
-                answer=q.get("answer"),
-                explanation=q.get("explanation"),
-            )
-            session.add(question)
-
-        # Enregistrer la génération dans le compteur
-        session.add(QuizGeneration(user_id=current_user.id))
+        session.add_all(question_from_item(document_id, q) for q in questions)
+
+        # Tokens consommés, dans le compteur du jour
+        record_tokens(session, current_user.id, today, last_token_count())
         session.commit()
 
-        quota_remaining = max(0, daily_limit - daily_count - 1)
+        quota_remaining = max(0, daily_limit - daily_count)
 
         logger.info(f"Quiz généré : {len(questions)} questions pour '{document.title}' par {current_user.username} (reste {quota_remaining})")
 
@@ -109,8 +103,145 @@ def generate_quiz():
 
     except Exception as e:
         session.rollback()
+        if reserved:
+            release_generation(session, current_user.id, today)
+            session.commit()
         logger.error(f"Erreur inattendue génération quiz : {e}")
         return jsonify({"error": str(e)}), 500
 
+
+# --- Génération en arrière-plan, progression en direct (cf. app/generation.py) ---
+def _job_response(job, **extra):
+    # Flux de progression : processus de diffusion s'il est déployé, sinon le worker
+    if fanout.FANOUT_URL:
+        events_url = fanout.job_stream_url(current_app.secret_key, job)
+    else:
+        events_url = url_for("quizzes.job_events", job_id=job.id)
+    return jsonify({**job_state(job), "events_url": events_url, **extra})
+
+
+# Limite : 10 requêtes/minute par utilisateur (en plus de la limite quotidienne)
+@bp.route("/jobs", methods=["POST"])
+@limiter.limit("10 per minute")
+@login_required
+def create_generation_job():
+    """
+    Lance la génération du quiz en arrière-plan et répond aussitôt (202) avec l'état de la
+    génération et l'URL de son flux de progression. Une génération déjà en cours pour le
+    cours est renvoyée telle quelle.
+    """
+    document_id = parse_uuid(request.args.get("document_id"))
+    if not document_id:
+        return jsonify({"error": "Paramètre 'document_id' requis"}), 400
+
+    session = get_db()
+    today = date.today()
+    quiz_limit_enabled = current_app.config.get("QUIZ_LIMIT_ENABLED", False)
+    daily_limit = current_app.config.get("DAILY_QUIZ_LIMIT", 10)
+
+    document = session.get(Document, document_id)
+    if not document:
+        return jsonify({"error": "Document introuvable"}), 404
+
+    existing = session.query(Question.id).filter_by(document_id=document_id).first()
+    if existing:
+        return jsonify({"message": "Quiz déjà généré pour ce document"}), 200
+
+    job = generation.active_job(session, document_id)
+    if job:
+        session.commit()
+        return _job_response(job), 202
+
+    daily_count = reserve_generation(
+        session, current_user.id, daily_limit if quiz_limit_enabled else None, day=today,
+    )
+    if daily_count is None:
+        session.rollback()
+        logger.warning(f"Quota atteint : {current_user.username} ({daily_limit}/{daily_limit})")
+        return jsonify({
+            "error": f"Limite atteinte ({daily_limit}/{daily_limit} aujourd'hui). Reviens demain !",
+            "quota_remaining": 0,
+        }), 429
+
+    job = generation.create_job(session, current_user.id, document_id, today)
+    try:
+        session.commit()
+    except IntegrityError:
+        # Même cours lancé en parallèle (autre onglet) : la réservation est annulée avec l'insertion
+        session.rollback()
+        job = generation.active_job(session, document_id)
+        session.commit()
+        if job is None:
+            return jsonify({"error": "Génération déjà en cours. Réessaie."}), 409
+        return _job_response(job), 202
+
+    generation.start(job.id)
+    logger.info(f"Génération lancée pour '{document.title}' par {current_user.username}")
+    return _job_response(job, quota_remaining=max(0, daily_limit - daily_count)), 202
+
+
+@bp.route("/jobs/<uuid:job_id>", methods=["GET"])
+@login_required
+def get_generation_job(job_id):
+    """État d'une génération (reprise après rechargement de la page)."""
+    job = get_db().get(GenerationJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({"error": "Génération introuvable"}), 404
+    return _job_response(job)
+
+
+def _load_job_state(job_id):
+    session = SessionLocal()
+    try:
+        job = session.get(GenerationJob, job_id)
+        if job is None:  # cours supprimé pendant la génération
+            return {"id": job_id, "status": "failed", "error": "Cours supprimé"}
+        return job_state(job)
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+@bp.route("/jobs/<uuid:job_id>/events", methods=["GET"])
+@login_required
+def job_events(job_id):
+    """
+    Flux SSE de la progression : un message par étape (queued, running avec la partie
+    n/m et le nombre de questions générées, done ou failed), puis fin du flux.
+    Pendant l'attente, le flux ne tient ni connexion à la base ni requête : il attend
+    les NOTIFY relayés par app/notify.py, mais occupe un thread du worker. Au-delà de
+    SSE_MAX_STREAMS flux : 204, le navigateur interroge GET /jobs/<id>.
+    """
+    job = get_db().get(GenerationJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({"error": "Génération introuvable"}), 404
+    if not notify.acquire_stream():
+        return "", 204
+
+    def stream():
+        # Abonné avant de lire l'état : aucune étape ne peut passer entre les deux
+        with notify.subscribe(generation.CHANNEL, job_id) as messages:
+            state, sent = _load_job_state(job_id), None
+            while True:
+                if state != sent:  # NOTIFY déjà reflété par l'état initial : pas de doublon
+                    yield notify.sse(state)
+                    sent = state
+                if state["status"] in generation.FINISHED:
+                    return
+                state = None
+                while state is None:
+                    try:
+                        message = messages.get(timeout=notify.SSE_KEEPALIVE)
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+                        continue
+                    if message is notify.RESYNC:
+                        state = _load_job_state(job_id)
+                    else:
+                        state = {k: v for k, v in message.items() if k != "key"}
+
+    response = Response(stream(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # pas de mise en tampon par nginx
+    })
+    response.call_on_close(notify.release_stream)
+    return response
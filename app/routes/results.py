@@ -1,15 +1,19 @@
 import logging
 from flask import Blueprint, request, jsonify
 from flask_login import current_user, login_required
-from ..db import SessionLocal
-from ..models import Result, QuizSession, Question
-import uuid
+from sqlalchemy.dialects.postgresql import insert
+from ..db import get_db, pipeline
+from ..models import Result, QuizSession, new_id, parse_uuid
+from ..question_sets import document_questions
+from ..review import record_answers
 
 # Logger pour tracer les sauvegardes de résultats
 logger = logging.getLogger("app.results")
 
 bp = Blueprint("results", __name__, url_prefix="/api/results")
 
+MAX_IDEMPOTENCY_KEY_LENGTH = 100
+
 
 @bp.route("/save", methods=["POST"])
 @login_required
@@ -17,20 +21,28 @@ def save_results():
     """
     Enregistre les résultats détaillés d'un quiz et crée une session globale (QuizSession).
     Le score et is_correct sont recalculés côté serveur (anti-triche).
+
+    Écriture groupée : la session (INSERT ... RETURNING), tous les résultats (un INSERT
+    multi-lignes) et les statistiques de révision (un upsert), en une transaction.
+    Idempotent avec l'en-tête Idempotency-Key : un renvoi du même quiz (réseau coupé,
+    double clic) renvoie la session déjà enregistrée sans rien réécrire.
     """
     data = request.get_json() or {}
-    document_id = data.get("document_id")
+    document_id = parse_uuid(data.get("document_id"))
     answers = data.get("answers", [])
+    idempotency_key = request.headers.get("Idempotency-Key") or None
 
     if not answers or document_id is None:
         return jsonify({"error": "Données incomplètes"}), 400
+    if idempotency_key and len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        return jsonify({"error": "Clé d'idempotence invalide"}), 400
 
-    session = SessionLocal()
+    session = get_db()
     try:
-        # Récupérer les questions depuis la base pour vérification côté serveur
-        question_ids = [a.get("question_id") for a in answers if a.get("question_id")]
-        questions = session.query(Question).filter(Question.id.in_(question_ids)).all()
-        q_dict = {q.id: q for q in questions}
+        # Réponses attendues (jeu de questions du cours, en cache) pour vérification côté serveur ;
+        # une question absente du jeu (autre cours, identifiant inventé) est ignorée. Les ids
+        # viennent du client : ils ne forcent jamais une relecture du jeu.
+        expected = {q.id: q for q in document_questions(session, document_id)}
 
         # Recalculer le score côté serveur
         score = 0
@@ -39,14 +51,10 @@ def save_results():
             question_id = item.get("question_id")
             user_answer = item.get("user_answer", "")
 
-            if not question_id or question_id not in q_dict:
+            if not question_id or question_id not in expected:
                 continue
 
-            question = q_dict[question_id]
-            is_correct = (
-                question.answer is not None
-                and user_answer.strip().lower() == question.answer.strip().lower()
-            )
+            is_correct = expected[question_id].is_correct(user_answer)
             if is_correct:
                 score += 1
 
@@ -56,29 +64,52 @@ def save_results():
                 "is_correct": is_correct,
             })
 
-        # Créer la session de quiz globale
-        quiz_session = QuizSession(
-            id=str(uuid.uuid4()),
-            user_id=current_user.id,
-            document_id=document_id,
-            score=score,
-            total_questions=len(verified_answers)
-        )
-        session.add(quiz_session)
-        session.flush()
-
-        # Enregistrer chaque résultat individuel
-        for item in verified_answers:
-            result = Result(
-                id=str(uuid.uuid4()),
-                question_id=item["question_id"],
+        # Créer la session de quiz globale (rien si la clé d'idempotence est déjà connue)
+        quiz_session_id = session.execute(
+            insert(QuizSession)
+            .values(
+                id=new_id(),
                 user_id=current_user.id,
-                user_answer=item["user_answer"],
-                is_correct=item["is_correct"],
-                quiz_session_id=quiz_session.id
+                document_id=document_id,
+                score=score,
+                total_questions=len(verified_answers),
+                idempotency_key=idempotency_key,
             )
-            session.add(result)
-
+            .on_conflict_do_nothing(index_elements=[QuizSession.user_id, QuizSession.idempotency_key])
+            .returning(QuizSession.id)
+        ).scalar()
+
+        if quiz_session_id is None:
+            session.rollback()
+            previous = session.query(QuizSession).filter_by(
+                user_id=current_user.id, idempotency_key=idempotency_key
+            ).one()
+            logger.info(f"Résultat déjà enregistré : {current_user.username} (clé {idempotency_key})")
+            return jsonify({
+                "message": "Résultats déjà enregistrés",
+                "score": previous.score,
+                "document_id": previous.document_id,
+                "quiz_session_id": previous.id
+            }), 200
+
+        # Résultats et statistiques : aucun résultat à lire, un seul aller-retour (puis le commit)
+        with pipeline(session):
+            # Tous les résultats individuels en une requête
+            if verified_answers:
+                session.execute(insert(Result).values([
+                    {
+                        "id": new_id(),
+                        "question_id": item["question_id"],
+                        "user_id": current_user.id,
+                        "user_answer": item["user_answer"],
+                        "is_correct": item["is_correct"],
+                        "quiz_session_id": quiz_session_id,
+                    }
+                    for item in verified_answers
+                ]))
+
+            # Statistiques de révision espacée (choix des prochaines questions)
+            record_answers(session, current_user.id, [(a["question_id"], a["is_correct"]) for a in verified_answers])
         session.commit()
 
         logger.info(f"Résultat enregistré : {current_user.username} - score {score}/{len(verified_answers)} (doc {document_id})")
@@ -87,13 +118,10 @@ def save_results():
             "message": "Résultats enregistrés ✅",
             "score": score,
             "document_id": document_id,
-            "quiz_session_id": quiz_session.id
+            "quiz_session_id": quiz_session_id
         }), 201
 
     except Exception as e:
         session.rollback()
         logger.error(f"Erreur sauvegarde résultat par {current_user.username} : {e}")
         return jsonify({"error": str(e)}), 500
-
-    finally:
-        session.close()
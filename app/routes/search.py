@@ -0,0 +1,32 @@
+# app/routes/search.py
+import logging
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from ..db import get_db, read_only
+from ..search import search
+
+logger = logging.getLogger("app.search")
+
+bp = Blueprint("search", __name__, url_prefix="/api/search")
+
+MAX_QUERY_LENGTH = 200
+
+
+@bp.route("", methods=["GET"])
+@login_required
+@read_only
+def search_courses():
+    """
+    Recherche plein texte dans les cours et les questions visibles par l'utilisateur
+    (les siens et ceux des matières partagées dans ses groupes).
+    Paramètres : q (obligatoire), limit (1 à 50, 10 par défaut).
+    """
+    text = (request.args.get("q") or "").strip()
+    if not text:
+        return jsonify({"error": "Le paramètre q est obligatoire"}), 400
+    if len(text) > MAX_QUERY_LENGTH:
+        return jsonify({"error": "Recherche trop longue"}), 400
+
+    limit = request.args.get("limit", 10, type=int)
+    results = search(get_db(), current_user.id, text, limit)
+    return jsonify({"query": text, **results})
@@ -1,11 +1,11 @@
 # app/routes/subjects.py
-import uuid
 import random
 import logging
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from ..db import SessionLocal
-from ..models import Subject, Document
+from ..db import get_db, read_only
+from ..models import Subject, Document, new_id
+from ..read_models import user_subjects
 from sqlalchemy import func
 
 # Logger pour tracer les opérations sur les matières
@@ -32,36 +32,22 @@ COLORS = [
 
 @bp.route("", methods=["GET"])
 @login_required
+@read_only
 def get_subjects():
     """
     Récupère toutes les matières de l'utilisateur connecté avec statistiques.
     """
-    session = SessionLocal()
+    session = get_db()
     try:
-        subjects = session.query(Subject).filter_by(user_id=current_user.id).all()
-        
-        subjects_data = []
-        for subject in subjects:
-            # Compter les documents
-            doc_count = session.query(Document).filter_by(
-                user_id=current_user.id,
-                subject_id=subject.id
-            ).count()
-            
-            subjects_data.append({
-                "id": subject.id,
-                "name": subject.name,
-                "color": subject.color,
-                "document_count": doc_count,
-                "created_at": subject.created_at.isoformat()
-            })
+        subjects_data = [
+            {**subject, "created_at": subject["created_at"].isoformat()}
+            for subject in user_subjects(session, current_user.id)
+        ]
         
         return jsonify(subjects_data), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
 
 
 @bp.route("", methods=["POST"])
@@ -76,7 +62,7 @@ def create_subject():
     if not name:
         return jsonify({"error": "Le nom de la matière est requis"}), 400
     
-    session = SessionLocal()
+    session = get_db()
     try:
         # Vérifier si la matière existe déjà (insensible à la casse)
         existing = session.query(Subject).filter(
@@ -94,7 +80,7 @@ def create_subject():
         color = data.get("color", random.choice(COLORS))
         
         subject = Subject(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             name=name,
             color=color,
             user_id=current_user.id
@@ -116,18 +102,16 @@ def create_subject():
         session.rollback()
         logger.error(f"Erreur création matière par {current_user.username} : {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
 
 
-@bp.route("/<string:subject_id>", methods=["PUT"])
+@bp.route("/<uuid:subject_id>", methods=["PUT"])
 @login_required
 def update_subject(subject_id):
     """
     Modifie une matière (nom ou couleur).
     """
     data = request.get_json()
-    session = SessionLocal()
+    session = get_db()
     
     try:
         subject = session.get(Subject, subject_id)
@@ -146,17 +130,15 @@ def update_subject(subject_id):
     except Exception as e:
         session.rollback()
         return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
 
 
-@bp.route("/<string:subject_id>", methods=["DELETE"])
+@bp.route("/<uuid:subject_id>", methods=["DELETE"])
 @login_required
 def delete_subject(subject_id):
     """
     Supprime une matière uniquement si elle est vide (aucun document associé).
     """
-    session = SessionLocal()
+    session = get_db()
     
     try:
         subject = session.get(Subject, subject_id)
@@ -226,5 +208,3 @@ def delete_subject(subject_id):
         session.rollback()
         logger.error(f"Erreur suppression matière {subject_id} : {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        session.close()
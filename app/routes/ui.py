@@ -1,14 +1,37 @@
 # app/routes/ui.py
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, abort, render_template, jsonify, request, url_for
 from sqlalchemy.orm import joinedload
 from flask_login import login_required, current_user
-from ..db import SessionLocal
-from ..models import Document, Question, QuizSession, Subject
+from ..db import get_db, read_only
+from ..models import Document, QuizSession, parse_uuid
+from ..pagination import InvalidCursor, load_more_response, paginate
+from ..question_sets import document_questions
+from ..read_models import user_subjects
+from ..review import pick_questions
 from sqlalchemy import func
 import os
 
 bp = Blueprint("ui", __name__)
 
+def _document_card(doc):
+    """Données d'une carte de cours (page Mes Cours)."""
+    from ..extract import count_words, get_preview
+    return {
+        'id': doc.id,
+        'title': doc.title,
+        'content': doc.content,
+        'created_at': doc.created_at,
+        'questions': list(doc.questions),
+        'word_count': count_words(doc.content),
+        'preview': get_preview(doc.content, max_chars=150),
+        'subject': {
+            'id': doc.subject.id,
+            'name': doc.subject.name,
+            'color': doc.subject.color
+        } if doc.subject else None
+    }
+
+
 def get_empty_message(current_filter, subjects_with_stats):
     """Génère le message approprié quand il n'y a aucun document"""
     if not current_filter or current_filter == "all":
@@ -44,91 +67,74 @@ def home():
 
 @bp.route("/documents")
 @login_required
+@read_only
 def show_documents():
-    from ..extract import count_words, get_preview
-    
     # Récupérer le filtre de matière depuis l'URL
     subject_filter = request.args.get("subject")  # Peut être None, "all", ou un subject_id
+    # Identifiant illisible (lien modifié à la main) : toutes les matières, comme "all"
+    subject_filter = parse_uuid(subject_filter) if subject_filter != "all" else None
+
+    session = get_db()
+    # Construire la requête des documents
+    query = (
+        session.query(Document)
+        .options(joinedload(Document.questions), joinedload(Document.subject))
+        .filter_by(user_id=current_user.id)
+    )
     
-    with SessionLocal() as session:
-        # Charger les matières avec leurs stats
-        subjects = session.query(Subject).filter_by(user_id=current_user.id).all()
-        subjects_with_stats = []
-        
-        for subject in subjects:
-            doc_count = session.query(Document).filter_by(
-                user_id=current_user.id,
-                subject_id=subject.id
-            ).count()
-            
-            subjects_with_stats.append({
-                'id': subject.id,
-                'name': subject.name,
-                'color': subject.color,
-                'doc_count': doc_count
-            })
-        
-        # Compter le total de documents
-        total_docs = session.query(Document).filter_by(user_id=current_user.id).count()
-        
-        # Construire la requête des documents
-        query = (
-            session.query(Document)
-            .options(joinedload(Document.questions), joinedload(Document.subject))
-            .filter_by(user_id=current_user.id)
-        )
-        
-        # Appliquer le filtre si nécessaire
-        if subject_filter and subject_filter != "all":
-            query = query.filter_by(subject_id=subject_filter)
-        
-        docs = query.order_by(Document.created_at.desc()).all()
-        
-        # Ajouter les métadonnées pour chaque document
-        docs_with_meta = []
-        for doc in docs:
-            doc_dict = {
-                'id': doc.id,
-                'title': doc.title,
-                'content': doc.content,
-                'created_at': doc.created_at,
-                'questions': list(doc.questions),
-                'word_count': count_words(doc.content),
-                'preview': get_preview(doc.content, max_chars=150),
-                'subject': {
-                    'id': doc.subject.id,
-                    'name': doc.subject.name,
-                    'color': doc.subject.color
-                } if doc.subject else None
-            }
-            docs_with_meta.append(doc_dict)
-        
-        # Générer le message pour liste vide
-        empty_message = None if docs_with_meta else get_empty_message(subject_filter, subjects_with_stats)
-        
-        # Trouver la matière sélectionnée
-        selected_subject = None
-        if subject_filter and subject_filter != "all":
-            for subject in subjects_with_stats:
-                if subject['id'] == subject_filter:
-                    selected_subject = subject
-                    break
+    # Appliquer le filtre si nécessaire
+    if subject_filter:
+        query = query.filter_by(subject_id=subject_filter)
+    
+    # Une page de cours (pagination par curseur, "Charger plus")
+    try:
+        page = paginate(query, (Document.created_at, Document.id), request.args.get("cursor"))
+    except InvalidCursor:
+        abort(400)
+    docs_with_meta = [_document_card(doc) for doc in page.items]
 
-    # Calcul du quota restant
-    from ..models import QuizGeneration
-    from datetime import datetime, time
+    # Calcul du quota restant (lecture par clé primaire)
+    from ..quota import generations_today
     from flask import current_app
-    today_start = datetime.combine(datetime.now().date(), time.min)
-    with SessionLocal() as quota_session:
-        daily_count = quota_session.query(QuizGeneration).filter(
-            QuizGeneration.user_id == current_user.id,
-            QuizGeneration.created_at >= today_start
-        ).count()
+    daily_count = generations_today(session, current_user.id)
     daily_limit = current_app.config.get("DAILY_QUIZ_LIMIT", 8)
     quota_remaining = max(0, daily_limit - daily_count)
-
-    from flask import current_app
     quiz_limit_enabled = current_app.config.get("QUIZ_LIMIT_ENABLED", False)
+
+    # "Charger plus" : uniquement les cartes de la page suivante
+    if request.args.get("partial"):
+        return load_more_response(
+            "partials/document_cards.html", page,
+            documents=docs_with_meta,
+            quota_remaining=quota_remaining,
+            quiz_limit_enabled=quiz_limit_enabled,
+        )
+
+    # Charger les matières avec leurs stats
+    subjects_with_stats = [
+        {
+            'id': subject['id'],
+            'name': subject['name'],
+            'color': subject['color'],
+            'doc_count': subject['document_count']
+        }
+        for subject in user_subjects(session, current_user.id)
+    ]
+    
+    # Compter le total de documents
+    total_docs = session.query(Document).filter_by(user_id=current_user.id).count()
+    
+    # Générer le message pour liste vide
+    empty_message = None if docs_with_meta else get_empty_message(subject_filter, subjects_with_stats)
+    
+    # Trouver la matière sélectionnée
+    selected_subject = None
+    if subject_filter:
+        for subject in subjects_with_stats:
+            if subject['id'] == subject_filter:
+                selected_subject = subject
+                break
+
     return render_template(
         "documents.html", 
         documents=docs_with_meta, 
@@ -141,6 +147,8 @@ def show_documents():
         quota_remaining=quota_remaining,
         daily_limit=daily_limit,
         quiz_limit_enabled=quiz_limit_enabled,
+        next_cursor=page.next_cursor,
+        load_more_url=url_for("ui.show_documents", subject=subject_filter),
     )
 
 @bp.route("/upload")
@@ -149,108 +157,114 @@ def upload():
     # Récupérer l'ID de la matière si passée en paramètre
     preselected_subject = request.args.get("subject", "")
     
-    with SessionLocal() as session:
-        # Charger les matières de l'utilisateur
-        subjects = session.query(Subject).filter_by(user_id=current_user.id).all()
-        subjects_list = [{'id': s.id, 'name': s.name, 'color': s.color} for s in subjects]
-    
+    session = get_db()
+    # Charger les matières de l'utilisateur
+    subjects_list = [
+        {'id': s['id'], 'name': s['name'], 'color': s['color']} for s in user_subjects(session, current_user.id)
+    ]
+
     return render_template(
         "upload.html", 
         subjects=subjects_list,
         preselected_subject=preselected_subject
     )
 
-@bp.route("/quizzes/<string:document_id>")
+@bp.route("/quizzes/<uuid:document_id>")
 @login_required
 def show_quiz(document_id):
-    with SessionLocal() as session:
-        document = session.get(Document, document_id)
-        if not document:
-            return render_template("404.html", message="Document introuvable"), 404
-        questions = session.query(Question).filter_by(document_id=document_id).all()
+    session = get_db()
+    document = session.get(Document, document_id)
+    if not document:
+        return render_template("404.html", message="Document introuvable"), 404
+    questions = document_questions(session, document_id)
 
     return render_template("quiz.html", quiz_title=document.title, questions=questions)
 
-@bp.route("/quizzes/play/<string:document_id>")
+@bp.route("/quizzes/play/<uuid:document_id>")
 @login_required
 def play_quiz(document_id):
-    from random import sample
-    session = SessionLocal()
-    try:
-        document = session.get(Document, document_id)
-        if not document:
-            return render_template("404.html", message="Document introuvable"), 404
-
-        questions = session.query(Question).filter_by(document_id=document_id).all()
+    session = get_db()
+    document = session.get(Document, document_id)
+    if not document:
+        return render_template("404.html", message="Document introuvable"), 404
 
-        if not questions:
-            return render_template(
-                "quiz_play.html",
-                title=document.title,
-                document=document,
-                questions=[],
-                message="Aucune question générée pour ce document."
-            )
-
-        if len(questions) > 10:
-            questions = sample(questions, 10)
-
-        # Convertir les questions en dictionnaires simples
-        questions_data = [
-            {
-                "id": q.id,
-                "question": q.question,
-                "type": q.type.value if hasattr(q.type, "value") else q.type,
-                "choices": q.choices,
-                "answer": q.answer,
-                "explanation": q.explanation
-            }
-            for q in questions
-        ]
+    # Questions à réviser et moins maîtrisées en priorité (révision espacée) : seuls les ids
+    # sortent de la base, le contenu vient du jeu de questions en cache
+    question_ids = pick_questions(session, current_user.id, document_id)
+    by_id = {q.id: q for q in document_questions(session, document_id, question_ids)}
+    questions = [by_id[qid] for qid in question_ids]
 
+    if not questions:
         return render_template(
             "quiz_play.html",
             title=document.title,
             document=document,
-            questions=questions_data
+            questions=[],
+            message="Aucune question générée pour ce document."
         )
-    finally:
-        session.close()
+
+    # Convertir les questions en dictionnaires simples
+    questions_data = [
+        {
+            "id": q.id,
+            "question": q.question,
+            "type": q.type.value,
+            "choices": q.choices,
+            "answer": q.answer,
+            "explanation": q.explanation
+        }
+        for q in questions
+    ]
+
+    return render_template(
+        "quiz_play.html",
+        title=document.title,
+        document=document,
+        questions=questions_data
+    )
 
 @bp.route("/results")
 @login_required
+@read_only
 def show_results():
     """
     Page HTML de visualisation des résultats (graphique)
     """
-    with SessionLocal() as session:
-        documents = (
-            session.query(Document)
-            .filter_by(user_id=current_user.id)
-            .order_by(Document.created_at.desc())
-            .all()
-        )
+    session = get_db()
+    query = session.query(Document.id, Document.title, Document.created_at).filter_by(user_id=current_user.id)
+    try:
+        page = paginate(query, (Document.created_at, Document.id), request.args.get("cursor"))
+    except InvalidCursor:
+        abort(400)
 
-    return render_template("results.html", documents=documents)
+    if request.args.get("partial"):
+        return load_more_response("partials/result_document_options.html", page, documents=page.items)
+    return render_template(
+        "results.html",
+        documents=page.items,
+        next_cursor=page.next_cursor,
+        load_more_url=url_for("ui.show_results"),
+    )
 
 
 @bp.route("/api/results/data", methods=["GET"])
 @login_required
+@read_only
 def get_results_data():
     """
     API pour renvoyer les données de score par document (pour le graphique)
     """
-    document_id = request.args.get("document_id")
+    document_id = parse_uuid(request.args.get("document_id"))
     if not document_id:
         return jsonify({"error": "document_id manquant"}), 400
 
-    with SessionLocal() as session:
-        sessions = (
-            session.query(QuizSession)
-            .filter_by(user_id=current_user.id, document_id=document_id)
-            .order_by(QuizSession.played_at.asc())
-            .all()
-        )
+    session = get_db()
+    sessions = (
+        session.query(QuizSession)
+        .filter_by(user_id=current_user.id, document_id=document_id)
+        .order_by(QuizSession.played_at.asc())
+        .all()
+    )
 
     data = [
         {
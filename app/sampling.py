@@ -0,0 +1,96 @@
+# app/sampling.py
+# Tirage aléatoire de questions côté SQL, à coût constant quelle que soit la taille de la banque.
+#
+# Chaque question porte une clé aléatoire fixe (questions.rand_key, tirée à l'insertion) et
+# l'index (document_id, rand_key) : tirer k questions d'un cours revient à lire les k entrées
+# qui suivent un point aléatoire de l'index (et à repartir du début si la fin est atteinte).
+# Seules les lignes tirées sortent de la base.
+#
+# Les quiz d'événement sont stratifiés par cours : chaque cours de la matière est représenté,
+# proportionnellement à son nombre de questions.
+
+import random
+from sqlalchemy import Integer, func, literal, select, true, values, column
+from .models import UUID, Document, Question
+
+
+def count_by_document(session, subject_id):
+    """Nombre de questions de chaque cours d'une matière : {document_id: n}."""
+    rows = session.execute(
+        select(Question.document_id, func.count())
+        .join(Document, Document.id == Question.document_id)
+        .where(Document.subject_id == subject_id)
+        .group_by(Question.document_id)
+    ).all()
+    return dict(rows)
+
+
+def allocate(counts, total):
+    """
+    Répartit `total` tirages entre les cours (`counts` : {document_id: nombre de questions}),
+    au moins un par cours s'il y a assez de tirages, le reste proportionnellement
+    (méthode des plus forts restes). Suppose total <= sum(counts.values()).
+    """
+    floor = 1 if len(counts) <= total else 0
+    quotas = {d: min(floor, n) for d, n in counts.items()}
+    remaining = total - sum(quotas.values())
+    available = sum(counts.values()) - sum(quotas.values())
+    if not remaining or not available:
+        return quotas
+    shares = {d: remaining * (n - quotas[d]) / available for d, n in counts.items()}
+    for d, share in shares.items():
+        quotas[d] += int(share)
+    left = total - sum(quotas.values())
+    for d in sorted(shares, key=lambda d: shares[d] - int(shares[d]), reverse=True)[:left]:
+        quotas[d] += 1
+    return quotas
+
+
+def sample_by_document(session, quotas):
+    """
+    Tire au hasard quotas[document_id] questions de chaque cours, en une requête
+    (LATERAL : une lecture de plage d'index par cours). Retourne {document_id: [question_id, ...]}.
+    """
+    quotas = {d: k for d, k in quotas.items() if k > 0}
+    if not quotas:
+        return {}
+    strata = values(column("document_id", UUID), column("quota", Integer), name="strata").data(list(quotas.items()))
+    pivot = literal(random.random())
+
+    def draw(part, condition):
+        # Les `quota` premières questions du cours dans la portion [pivot, 1) ou [0, pivot) de l'index
+        picked = (
+            select(Question.id, Question.rand_key)
+            .where(Question.document_id == strata.c.document_id, condition)
+            .order_by(Question.rand_key)
+            .limit(strata.c.quota)
+            .lateral()
+        )
+        return (
+            select(strata.c.document_id, picked.c.id, literal(part).label("part"), picked.c.rand_key)
+            .select_from(strata)
+            .join(picked, true())
+        )
+
+    rows = session.execute(
+        draw(0, Question.rand_key >= pivot).union_all(draw(1, Question.rand_key < pivot))
+    ).all()
+
+    # Au-delà du pivot d'abord, puis retour au début de l'index si la fin a été atteinte
+    drawn = {d: [] for d in quotas}
+    for document_id, question_id, _, _ in sorted(rows, key=lambda r: (r.part, r.rand_key)):
+        if len(drawn[document_id]) < quotas[document_id]:
+            drawn[document_id].append(question_id)
+    return drawn
+
+
+def deal(drawn, hands):
+    """
+    Distribue les questions tirées en `hands` quiz de taille égale, chaque cours réparti
+    équitablement entre les quiz (distribution tour à tour), ordre mélangé dans chaque quiz.
+    """
+    ordered = [qid for d in drawn for qid in drawn[d]]
+    quizzes = [ordered[i::hands] for i in range(hands)]
+    for quiz in quizzes:
+        random.shuffle(quiz)
+    return quizzes
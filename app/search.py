@@ -0,0 +1,116 @@
+# app/search.py
+# Recherche plein texte dans les cours et les questions (PostgreSQL).
+#
+# documents.search_vector et questions.search_vector sont des colonnes tsvector générées
+# (configuration fr_unaccent, cf. migration 0010) indexées en GIN : Postgres les recalcule
+# à chaque écriture, la recherche est une lecture d'index (@@), quel que soit le volume.
+#
+# Périmètre : les cours de l'utilisateur et ceux des matières partagées dans ses groupes.
+# Les extraits (ts_headline, coûteux : il relit le texte) ne sont calculés que pour les
+# lignes retournées, après classement et LIMIT.
+
+from markupsafe import escape
+from sqlalchemy import func, literal, or_, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from .models import Document, GroupMember, GroupSubject, Question
+
+SEARCH_CONFIG = "fr_unaccent"
+MAX_RESULTS = 50
+
+# Délimiteurs des termes trouvés dans les extraits : caractères de contrôle (absents du texte),
+# remplacés par <mark> après échappement HTML de l'extrait.
+_START, _STOP = "\x02", "\x03"
+HEADLINE_OPTIONS = (
+    f"StartSel={_START}, StopSel={_STOP}, MaxFragments=2, MaxWords=25, MinWords=10, "
+    'FragmentDelimiter=" … "'
+)
+
+
+def _highlight(snippet):
+    """Extrait ts_headline → HTML sûr, termes trouvés entourés de <mark>."""
+    return str(escape(snippet or "")).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def _visible_documents(user_id):
+    """Condition : cours de l'utilisateur ou d'une matière partagée dans l'un de ses groupes."""
+    shared_subjects = (
+        select(GroupSubject.subject_id)
+        .join(GroupMember, GroupMember.group_id == GroupSubject.group_id)
+        .where(GroupMember.user_id == user_id)
+    )
+    return or_(Document.user_id == user_id, Document.subject_id.in_(shared_subjects))
+
+
+def search_documents(session, user_id, text, limit=10):
+    """Cours correspondant à la recherche, du plus pertinent au moins pertinent."""
+    config = literal(SEARCH_CONFIG, REGCONFIG)
+    query = func.websearch_to_tsquery(config, text)
+    rank = func.ts_rank(Document.search_vector, query)
+    top = (
+        select(Document.id, Document.title, Document.subject_id, Document.user_id, rank.label("rank"))
+        .where(Document.search_vector.op("@@")(query), _visible_documents(user_id))
+        .order_by(rank.desc(), Document.id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = session.execute(
+        select(top, func.ts_headline(config, Document.content, query, HEADLINE_OPTIONS).label("snippet"))
+        .join(Document, Document.id == top.c.id)
+        .order_by(top.c.rank.desc(), top.c.id)
+    ).all()
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "subject_id": row.subject_id,
+            "shared": row.user_id != user_id,
+            "rank": round(row.rank, 4),
+            "snippet": _highlight(row.snippet),
+        }
+        for row in rows
+    ]
+
+
+def search_questions(session, user_id, text, limit=10):
+    """Questions (énoncé et réponse) correspondant à la recherche, dans les cours visibles."""
+    config = literal(SEARCH_CONFIG, REGCONFIG)
+    query = func.websearch_to_tsquery(config, text)
+    rank = func.ts_rank(Question.search_vector, query)
+    top = (
+        select(Question.id, Question.document_id, Document.title.label("document_title"), rank.label("rank"))
+        .join(Document, Document.id == Question.document_id)
+        .where(Question.search_vector.op("@@")(query), _visible_documents(user_id))
+        .order_by(rank.desc(), Question.id)
+        .limit(limit)
+        .subquery()
+    )
+    text_column = Question.question + " — " + func.coalesce(Question.answer, "")
+    rows = session.execute(
+        select(top, Question.question, func.ts_headline(config, text_column, query, HEADLINE_OPTIONS).label("snippet"))
+        .join(Question, Question.id == top.c.id)
+        .order_by(top.c.rank.desc(), top.c.id)
+    ).all()
+    return [
+        {
+            "id": row.id,
+            "document_id": row.document_id,
+            "document_title": row.document_title,
+            "question": row.question,
+            "rank": round(row.rank, 4),
+            "snippet": _highlight(row.snippet),
+        }
+        for row in rows
+    ]
+
+
+def search(session, user_id, text, limit=10):
+    """
+    Cours et questions correspondant à `text` (syntaxe websearch : "expression exacte",
+    -exclu, or), classés par pertinence (titre et énoncé pondérés plus fort que le contenu).
+    Retourne {"documents": [...], "questions": [...]}, extraits surlignés en HTML.
+    """
+    limit = max(1, min(limit, MAX_RESULTS))
+    return {
+        "documents": search_documents(session, user_id, text, limit),
+        "questions": search_questions(session, user_id, text, limit),
+    }
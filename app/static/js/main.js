@@ -203,85 +203,113 @@ document.addEventListener("DOMContentLoaded", () => {
 
   // --- Upload géré plus bas avec la gestion des matières ---
 
+  // --- "Charger plus" (listes paginées par curseur) ---
+  // Le serveur renvoie le fragment HTML de la page suivante, et son curseur
+  // dans l'en-tête X-Next-Cursor (absent quand la liste est terminée).
+  document.addEventListener("click", async (e) => {
+    const btn = e.target.closest("[data-load-more]");
+    if (!btn || btn.disabled) return;
+    const target = document.getElementById(btn.dataset.target);
+    const url = new URL(btn.dataset.loadMore, window.location.origin);
+    url.searchParams.set("cursor", btn.dataset.cursor);
+    url.searchParams.set("partial", "1");
+
+    btn.disabled = true;
+    try {
+      const res = await fetch(url);
+      if (!res.ok) throw new Error();
+      target.insertAdjacentHTML("beforeend", await res.text());
+      const next = res.headers.get("X-Next-Cursor");
+      if (next) {
+        btn.dataset.cursor = next;
+        btn.disabled = false;
+      } else {
+        btn.parentElement.remove();
+      }
+    } catch (err) {
+      btn.disabled = false;
+      btn.textContent = "Réessayer";
+    }
+  });
+
   // --- Delete document ---
-  const deleteButtons = document.querySelectorAll("[data-delete]");
-  deleteButtons.forEach((btn) => {
-    btn.addEventListener("click", async () => {
-      const id = btn.dataset.delete;
-      
-      showModal({
-        type: "warning",
-        title: "Confirmer la suppression",
-        message: "Êtes-vous sûr de vouloir supprimer ce cours ? Cette action est irréversible.",
-        confirmText: "Supprimer",
-        confirmClass: "btn-red",
-        cancelText: "Annuler",
-        onConfirm: async () => {
-          try {
-            const res = await fetch(`/api/documents/${id}`, { method: "DELETE", headers: csrfHeaders() });
-            const data = await res.json();
+  document.addEventListener("click", async (e) => {
+    const btn = e.target.closest("[data-delete]");
+    if (!btn) return;
+    const id = btn.dataset.delete;
+    
+    showModal({
+      type: "warning",
+      title: "Confirmer la suppression",
+      message: "Êtes-vous sûr de vouloir supprimer ce cours ? Cette action est irréversible.",
+      confirmText: "Supprimer",
+      confirmClass: "btn-red",
+      cancelText: "Annuler",
+      onConfirm: async () => {
+        try {
+          const res = await fetch(`/api/documents/${id}`, { method: "DELETE", headers: csrfHeaders() });
+          const data = await res.json();
 
-            if (res.ok) {
-              const card = btn.closest("[data-doc-id]");
-              if (card) {
-                // Récupérer le subject_id réel du document
-                const changeSubjectBtn = card.querySelector('.change-subject-btn');
-                const docSubjectId = changeSubjectBtn ? changeSubjectBtn.dataset.currentSubject : null;
+          if (res.ok) {
+            const card = btn.closest("[data-doc-id]");
+            if (card) {
+              // Récupérer le subject_id réel du document
+              const changeSubjectBtn = card.querySelector('.change-subject-btn');
+              const docSubjectId = changeSubjectBtn ? changeSubjectBtn.dataset.currentSubject : null;
+              
+              // Récupérer les infos avant suppression
+              const container = document.getElementById('documents-container');
+              const currentUrl = new URL(window.location.href);
+              const currentFilter = currentUrl.searchParams.get('subject') || 'all';
+              
+              // Animation de suppression
+              card.style.opacity = "0";
+              card.style.transform = "scale(0.95)";
+              card.style.transition = "all 0.2s ease";
+              
+              setTimeout(() => {
+                card.remove();
                 
-                // Récupérer les infos avant suppression
-                const container = document.getElementById('documents-container');
-                const currentUrl = new URL(window.location.href);
-                const currentFilter = currentUrl.searchParams.get('subject') || 'all';
+                // Mettre à jour le compteur "Tous" (toujours)
+                updateSubjectCount('all', -1);
                 
-                // Animation de suppression
-                card.style.opacity = "0";
-                card.style.transform = "scale(0.95)";
-                card.style.transition = "all 0.2s ease";
+                // Mettre à jour le compteur de la matière spécifique du document
+                if (docSubjectId) {
+                  updateSubjectCount(docSubjectId, -1);
+                }
                 
-                setTimeout(() => {
-                  card.remove();
-                  
-                  // Mettre à jour le compteur "Tous" (toujours)
-                  updateSubjectCount('all', -1);
-                  
-                  // Mettre à jour le compteur de la matière spécifique du document
-                  if (docSubjectId) {
-                    updateSubjectCount(docSubjectId, -1);
-                  }
-                  
-                  // Vérifier si c'était le dernier cours
-                  if (container && container.children.length === 0) {
-                    // Trouver le nom de la matière pour le message
-                    let subjectName = null;
-                    if (currentFilter !== 'all') {
-                      const pill = document.querySelector(`[data-subject-id="${currentFilter}"]`);
-                      if (pill) {
-                        const nameElement = pill.querySelector('a span:nth-child(2)');
-                        subjectName = nameElement ? nameElement.textContent : null;
-                      }
+                // Vérifier si c'était le dernier cours
+                if (container && container.children.length === 0) {
+                  // Trouver le nom de la matière pour le message
+                  let subjectName = null;
+                  if (currentFilter !== 'all') {
+                    const pill = document.querySelector(`[data-subject-id="${currentFilter}"]`);
+                    if (pill) {
+                      const nameElement = pill.querySelector('a span:nth-child(2)');
+                      subjectName = nameElement ? nameElement.textContent : null;
                     }
-                    showEmptyMessage(currentFilter, subjectName);
                   }
-                }, 200);
-              }
-            } else {
-              showModal({
-                type: "error",
-                title: "Erreur",
-                message: data.error || "Impossible de supprimer le cours.",
-                confirmText: "OK"
-              });
+                  showEmptyMessage(currentFilter, subjectName);
+                }
+              }, 200);
             }
-          } catch (err) {
+          } else {
             showModal({
               type: "error",
-              title: "Erreur réseau",
-              message: "Une erreur est survenue lors de la connexion au serveur.",
+              title: "Erreur",
+              message: data.error || "Impossible de supprimer le cours.",
               confirmText: "OK"
             });
           }
+        } catch (err) {
+          showModal({
+            type: "error",
+            title: "Erreur réseau",
+            message: "Une erreur est survenue lors de la connexion au serveur.",
+            confirmText: "OK"
+          });
         }
-      });
+      }
     });
   });
 
@@ -290,7 +318,6 @@ document.addEventListener("DOMContentLoaded", () => {
   const courseModalTitle = document.getElementById("courseModalTitle");
   const courseContent = document.getElementById("courseContent");
   const closeCourseModalBtn = document.getElementById("closeCourseModal");
-  const viewCourseButtons = document.querySelectorAll("[data-view-course]");
 
   // Configurer marked.js pour un rendu propre
   if (typeof marked !== 'undefined') {
@@ -301,44 +328,44 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 
   // Ouvrir la modal
-  viewCourseButtons.forEach((btn) => {
-    btn.addEventListener("click", async () => {
-      const docId = btn.dataset.viewCourse;
-
-      // Afficher un loader dans la modal
-      courseModalTitle.textContent = "Chargement...";
-      courseContent.innerHTML = '<div class="text-center py-8"><div class="inline-block animate-spin rounded-full h-8 w-8 border-b-2 border-blue-600"></div></div>';
-      
-      // Afficher la modal
-      courseModal.classList.remove("hidden");
-      courseModal.classList.add("flex");
-      document.body.style.overflow = "hidden";
+  document.addEventListener("click", async (e) => {
+    const btn = e.target.closest("[data-view-course]");
+    if (!btn) return;
+    const docId = btn.dataset.viewCourse;
+
+    // Afficher un loader dans la modal
+    courseModalTitle.textContent = "Chargement...";
+    courseContent.innerHTML = '<div class="text-center py-8"><div class="inline-block animate-spin rounded-full h-8 w-8 border-b-2 border-blue-600"></div></div>';
+    
+    // Afficher la modal
+    courseModal.classList.remove("hidden");
+    courseModal.classList.add("flex");
+    document.body.style.overflow = "hidden";
 
-      try {
-        // Récupérer le contenu via l'API
-        const res = await fetch(`/api/documents/${docId}/content`);
-        const data = await res.json();
+    try {
+      // Récupérer le contenu via l'API
+      const res = await fetch(`/api/documents/${docId}/content`);
+      const data = await res.json();
 
-        if (res.ok) {
-          // Mettre à jour le titre
-          courseModalTitle.textContent = data.title;
+      if (res.ok) {
+        // Mettre à jour le titre
+        courseModalTitle.textContent = data.title;
 
-          // Convertir Markdown en HTML
-          if (typeof marked !== 'undefined') {
-            const htmlContent = marked.parse(data.content);
-            courseContent.innerHTML = htmlContent;
-          } else {
-            // Fallback si marked.js n'est pas chargé
-            courseContent.innerHTML = `<pre class="whitespace-pre-wrap">${data.content}</pre>`;
-          }
+        // Convertir Markdown en HTML
+        if (typeof marked !== 'undefined') {
+          const htmlContent = marked.parse(data.content);
+          courseContent.innerHTML = htmlContent;
         } else {
-          throw new Error(data.error || "Erreur lors du chargement");
+          // Fallback si marked.js n'est pas chargé
+          courseContent.innerHTML = `<pre class="whitespace-pre-wrap">${data.content}</pre>`;
         }
-      } catch (err) {
-        courseModalTitle.textContent = "Erreur";
-        courseContent.innerHTML = `<p class="text-red-600">❌ ${err.message}</p>`;
+      } else {
+        throw new Error(data.error || "Erreur lors du chargement");
       }
-    });
+    } catch (err) {
+      courseModalTitle.textContent = "Erreur";
+      courseContent.innerHTML = `<p class="text-red-600">❌ ${err.message}</p>`;
+    }
   });
 
   // Fermer la modal
@@ -371,7 +398,6 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 
   // --- Génération de quiz avec modal de progression ---
-  const genButtons = document.querySelectorAll("[data-generate]");
   const progressModal = document.getElementById("progressModal");
   const progressBar = document.getElementById("progressBar");
   const progressPercent = document.getElementById("progressPercent");
@@ -380,116 +406,164 @@ document.addEventListener("DOMContentLoaded", () => {
   const questionsInfo = document.getElementById("questionsInfo");
   const questionCount = document.getElementById("questionCount");
 
-  genButtons.forEach((btn) => {
-    btn.addEventListener("click", async () => {
-      const docId = btn.dataset.generate;
-      const card = btn.closest("[data-doc-id]");
-      const wordCount = parseInt(card.dataset.wordCount);
-      
-      // Afficher la modal
-      progressModal.classList.remove("hidden");
-      progressModal.classList.add("flex");
-      questionsInfo.classList.remove("hidden");
-
-      // Animation de progression simulée (nombre de questions sera mis à jour après le fetch)
-      let nbQuestions = null;
-      let progress = 0;
-      let progressSteps = [
-        { percent: 20, time: 500, info: "Connexion à l'IA...", status: "Préparation de la requête..." },
-        { percent: 40, time: 2000, info: "Analyse du cours...", status: "Extraction des concepts clés..." },
-        { percent: 70, time: 4000, info: "Génération des questions...", status: `Création des questions...` },
-        { percent: 90, time: 1000, info: "Validation...", status: "Vérification de la cohérence..." },
-      ];
-
-      const progressInterval = setInterval(() => {
-        const currentStep = progressSteps.find(step => progress < step.percent);
-        if (currentStep) {
-          progress = Math.min(progress + 1, currentStep.percent);
-          progressBar.style.width = `${progress}%`;
-          progressPercent.textContent = `${progress}%`;
-          progressInfo.textContent = currentStep.info;
-          progressStatus.textContent = currentStep.status.replace("questions...", nbQuestions ? `${nbQuestions} questions...` : "questions...");
-        }
-      }, 100);
+  document.addEventListener("click", async (e) => {
+    const btn = e.target.closest("[data-generate]");
+    if (!btn) return;
+    const docId = btn.dataset.generate;
+    const card = btn.closest("[data-doc-id]");
+    const wordCount = parseInt(card.dataset.wordCount);
+    
+    // Afficher la modal
+    progressModal.classList.remove("hidden");
+    progressModal.classList.add("flex");
+    questionsInfo.classList.remove("hidden");
 
-      try {
-        const res = await fetch(`/api/quizzes/generate?document_id=${docId}`, { method: "POST", headers: csrfHeaders() });
-        const data = await res.json();
+    setProgress(0, "En file d'attente...", "Préparation de la génération...");
+    questionCount.textContent = "0";
 
-        clearInterval(progressInterval);
+    try {
+      // La génération tourne en arrière-plan : la requête répond tout de suite (202)
+      const res = await fetch(`/api/quizzes/jobs?document_id=${docId}`, { method: "POST", headers: csrfHeaders() });
+      const data = await res.json();
 
-        // Mettre à jour le vrai nombre de questions générées
-        nbQuestions = data.total_questions || (data.questions ? data.questions.length : null);
-        questionCount.textContent = nbQuestions;
+      if (data.quota_remaining !== undefined) {
+        updateQuotaDisplay(data.quota_remaining);
+      }
+      if (!res.ok) {
+        throw new Error(data.error || "Erreur pendant la génération");
+      }
 
-        // Compléter la progression
-        progress = 100;
-        progressBar.style.width = "100%";
-        progressPercent.textContent = "100%";
-        progressInfo.textContent = "Terminé !";
-        progressStatus.textContent = `Quiz généré avec succès ! 🎉 (${nbQuestions} questions)`;
+      // 200 : quiz déjà généré ; 202 : progression réelle reçue par le flux SSE
+      const final = res.status === 200 ? null : await followGeneration(data);
+      const nbQuestions = final ? final.questions : null;
 
-        if (res.ok) {
-          // Mettre à jour le compteur de quota
-          if (data.quota_remaining !== undefined) {
-            updateQuotaDisplay(data.quota_remaining);
-          }
+      setProgress(100, "Terminé !", nbQuestions ? `Quiz généré avec succès ! 🎉 (${nbQuestions} questions)` : "Quiz déjà généré");
 
-          // Attendre un peu pour montrer la complétion
-          await new Promise(resolve => setTimeout(resolve, 1000));
-
-          // Mettre à jour les boutons dynamiquement (sans refresh)
-          const playBtn = card.querySelector(".play-btn");
-          const generateBtn = card.querySelector(".generate-btn");
-          const buttonsContainer = generateBtn.parentElement;
-
-          // Si le bouton Jouer est un <button>, on le remplace par un <a> fonctionnel
-          if (playBtn && playBtn.tagName === 'BUTTON') {
-            // Créer un nouveau lien <a> pour "Jouer"
-            const newPlayLink = document.createElement("a");
-            newPlayLink.href = `/quizzes/play/${docId}`;
-            newPlayLink.className = "btn btn-green hover:brightness-105 play-btn";
-            newPlayLink.textContent = "Jouer";
-
-            // Remplacer l'ancien bouton par le nouveau lien
-            playBtn.replaceWith(newPlayLink);
-          } else if (playBtn && playBtn.tagName === 'A') {
-            // Si c'est déjà un lien, on l'active simplement
-            playBtn.classList.remove("opacity-60", "cursor-not-allowed");
-            playBtn.classList.add("hover:brightness-105");
-            playBtn.href = `/quizzes/play/${docId}`;
-            // Retirer l'attribut disabled s'il existe
-            playBtn.removeAttribute("disabled");
-          }
+      // Attendre un peu pour montrer la complétion
+      await new Promise(resolve => setTimeout(resolve, 1000));
 
-          // Désactiver le bouton Générer (puisque le quiz existe)
-          generateBtn.disabled = true;
-          generateBtn.classList.add("opacity-60", "cursor-not-allowed");
-          generateBtn.classList.remove("hover:brightness-105");
-          generateBtn.textContent = "Généré";
-          generateBtn.title = "Quiz déjà généré";
+      markGenerated(card, docId);
 
-          // Fermer la modal
-          progressModal.classList.add("hidden");
-          progressModal.classList.remove("flex");
+      // Fermer la modal
+      progressModal.classList.add("hidden");
+      progressModal.classList.remove("flex");
 
-          // Notification succès
-          showNotification(`✅ Quiz généré avec succès ! (${nbQuestions} questions)`, "success");
-        } else {
-          // Gestion des erreurs spécifiques
-          if (res.status === 429 && data.quota_remaining !== undefined) {
-            updateQuotaDisplay(data.quota_remaining);
+      // Notification succès
+      showNotification(nbQuestions ? `✅ Quiz généré avec succès ! (${nbQuestions} questions)` : `✅ ${data.message}`, "success");
+    } catch (err) {
+      progressModal.classList.add("hidden");
+      progressModal.classList.remove("flex");
+      showNotification("❌ " + (err.message || "Erreur de connexion au serveur"), "error");
+    }
+  });
+
+  function setProgress(percent, info, status) {
+    progressBar.style.width = `${percent}%`;
+    progressPercent.textContent = `${percent}%`;
+    progressInfo.textContent = info;
+    progressStatus.textContent = status;
+  }
+
+  // Suit la génération par Server-Sent Events : un message par étape (queued, running
+  // avec la partie en cours et les questions générées, done ou failed). L'état courant est
+  // relu à chaque (re)connexion du flux (processus de diffusion : aucun état initial) ; flux
+  // refusé (204 : places du worker prises) ou terminé : interrogation de GET /jobs/<id>.
+  // Résolue avec l'état final, rejetée si la génération échoue.
+  function followGeneration(job) {
+    return new Promise((resolve, reject) => {
+      const jobUrl = `/api/quizzes/jobs/${job.id}`;
+      const source = new EventSource(job.events_url);
+      let chunksDone = -1;
+      let finished = false;
+      let polling = null;
+
+      const stop = () => {
+        finished = true;
+        source.close();
+        clearInterval(polling);
+      };
+      const show = (state) => {
+        // Message d'une étape déjà dépassée (état relu entre-temps) : ignoré
+        if (finished || (state.status === "running" && state.chunks_done < chunksDone)) return;
+        chunksDone = state.chunks_done;
+        questionCount.textContent = state.questions;
+        if (state.status === "queued") {
+          setProgress(0, "En file d'attente...", "Préparation de la génération...");
+        } else if (state.status === "running" && state.chunks_total) {
+          const percent = Math.round(100 * state.chunks_done / state.chunks_total);
+          const part = Math.min(state.chunks_done + 1, state.chunks_total);
+          setProgress(percent, `Partie ${part}/${state.chunks_total}`, `Création des questions... (${state.questions} générées)`);
+        } else if (state.status === "done") {
+          stop();
+          resolve(state);
+        } else if (state.status === "failed") {
+          stop();
+          reject(new Error(state.error || "Erreur pendant la génération"));
+        }
+      };
+      const refresh = async () => {
+        try {
+          const res = await fetch(jobUrl);
+          if (res.status === 404 || res.redirected) {  // redirection : session expirée
+            stop();
+            reject(new Error(res.redirected ? "Session expirée, reconnecte-toi" : "Génération introuvable"));
+          } else if (res.ok) {
+            show(await res.json());
           }
-          throw new Error(data.error || "Erreur pendant la génération");
+        } catch (err) {
+          // Coupure réseau : nouvelle tentative au prochain tour
         }
-      } catch (err) {
-        clearInterval(progressInterval);
-        progressModal.classList.add("hidden");
-        progressModal.classList.remove("flex");
-        showNotification("❌ " + (err.message || "Erreur de connexion au serveur"), "error");
-      }
+      };
+      const poll = () => {
+        source.close();
+        if (!finished && !polling) {
+          refresh();
+          polling = setInterval(refresh, 2000);
+        }
+      };
+
+      source.onopen = refresh;
+      source.onmessage = (e) => show(JSON.parse(e.data));
+      source.addEventListener("resync", refresh);  // messages possiblement perdus
+      source.addEventListener("ended", poll);  // jeton du processus de diffusion expiré
+      // Coupure réseau : EventSource se reconnecte seul ; flux refusé (204, 403) : interrogation
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) poll();
+      };
     });
-  });
+  }
+
+  // Met à jour les boutons de la carte une fois le quiz généré (sans refresh)
+  function markGenerated(card, docId) {
+    const playBtn = card.querySelector(".play-btn");
+    const generateBtn = card.querySelector(".generate-btn");
+
+    // Si le bouton Jouer est un <button>, on le remplace par un <a> fonctionnel
+    if (playBtn && playBtn.tagName === 'BUTTON') {
+      // Créer un nouveau lien <a> pour "Jouer"
+      const newPlayLink = document.createElement("a");
+      newPlayLink.href = `/quizzes/play/${docId}`;
+      newPlayLink.className = "btn btn-green hover:brightness-105 play-btn";
+      newPlayLink.textContent = "Jouer";
+
+      // Remplacer l'ancien bouton par le nouveau lien
+      playBtn.replaceWith(newPlayLink);
+    } else if (playBtn && playBtn.tagName === 'A') {
+      // Si c'est déjà un lien, on l'active simplement
+      playBtn.classList.remove("opacity-60", "cursor-not-allowed");
+      playBtn.classList.add("hover:brightness-105");
+      playBtn.href = `/quizzes/play/${docId}`;
+      // Retirer l'attribut disabled s'il existe
+      playBtn.removeAttribute("disabled");
+    }
+
+    // Désactiver le bouton Générer (puisque le quiz existe)
+    generateBtn.disabled = true;
+    generateBtn.classList.add("opacity-60", "cursor-not-allowed");
+    generateBtn.classList.remove("hover:brightness-105");
+    generateBtn.textContent = "Généré";
+    generateBtn.title = "Quiz déjà généré";
+  }
 
   // --- Mise à jour dynamique du quota ---
   function updateQuotaDisplay(remaining) {
@@ -556,6 +630,11 @@ document.addEventListener("DOMContentLoaded", () => {
     let current = 0;
     let score = 0;
     let answered = false;
+    // Une clé par partie : les renvois de la sauvegarde ne créent pas de doublon
+    // (crypto.randomUUID n'existe qu'en HTTPS / localhost)
+    const idempotencyKey = window.crypto?.randomUUID
+      ? crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
 
     function renderQuestion() {
       const q = questions[current];
@@ -642,20 +721,30 @@ document.addEventListener("DOMContentLoaded", () => {
         is_correct: q.is_correct || false,
       }));
 
-      try {
-        const res = await fetch("/api/results/save", {
-          method: "POST",
-          headers: csrfHeaders({ "Content-Type": "application/json" }),
-          body: JSON.stringify({
-            document_id: quizContainer.dataset.documentId || null,
-            score: score,
-            answers: answersData,
-          }),
-        });
-        const data = await res.json();
-        console.log("💾 Sauvegarde :", data);
-      } catch (err) {
-        console.error("❌ Erreur lors de la sauvegarde :", err);
+      const body = JSON.stringify({
+        document_id: quizContainer.dataset.documentId || null,
+        score: score,
+        answers: answersData,
+      });
+
+      // Jusqu'à 3 essais (réseau coupé, erreur serveur) avec la même clé d'idempotence
+      for (let attempt = 1; attempt <= 3; attempt++) {
+        try {
+          const res = await fetch("/api/results/save", {
+            method: "POST",
+            headers: csrfHeaders({
+              "Content-Type": "application/json",
+              "Idempotency-Key": idempotencyKey,
+            }),
+            body,
+          });
+          const data = await res.json();
+          console.log("💾 Sauvegarde :", data);
+          if (res.status < 500) return;
+        } catch (err) {
+          console.error("❌ Erreur lors de la sauvegarde :", err);
+        }
+        await new Promise((resolve) => setTimeout(resolve, 1000 * attempt));
       }
     }
 
@@ -941,18 +1030,17 @@ document.addEventListener("DOMContentLoaded", () => {
   // --- Changement de matière d'un document ---
   const changeSubjectModal = document.getElementById("changeSubjectModal");
   const closeChangeSubjectModalBtn = document.getElementById("closeChangeSubjectModal");
-  const changeSubjectButtons = document.querySelectorAll(".change-subject-btn");
   let currentDocIdForSubjectChange = null;
 
   // Ouvrir la modal
-  changeSubjectButtons.forEach((btn) => {
-    btn.addEventListener("click", (e) => {
-      e.stopPropagation();
-      currentDocIdForSubjectChange = btn.dataset.docId;
-      changeSubjectModal.classList.remove("hidden");
-      changeSubjectModal.classList.add("flex");
-      document.body.style.overflow = "hidden";
-    });
+  document.addEventListener("click", (e) => {
+    const btn = e.target.closest(".change-subject-btn");
+    if (!btn) return;
+    e.stopPropagation();
+    currentDocIdForSubjectChange = btn.dataset.docId;
+    changeSubjectModal.classList.remove("hidden");
+    changeSubjectModal.classList.add("flex");
+    document.body.style.overflow = "hidden";
   });
 
   // Fermer la modal
@@ -0,0 +1,52 @@
+# benchmarks/rate_limit.py
+"""
+Banc d'essai du stockage de rate limiting (RATELIMIT_STORAGE_URI, cf. app/ratelimit.py).
+
+Mesure le coût d'un hit (stratégie fixed-window de Flask-Limiter) sur le stockage donné,
+par défaut la base DATABASE_URL (table rate_limits) ; les clés créées sont supprimées.
+
+Usage : python benchmarks/rate_limit.py [--uri redis://localhost:6379] [--iterations 2000]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from app import db, ratelimit  # noqa: F401 (enregistre le stockage postgresql://)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uri", default=db.DATABASE_URL)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    storage = storage_from_string(args.uri)
+    limiter = FixedWindowRateLimiter(storage)
+    limit = parse("1000000/minute")
+    keys = [f"bench-{i}" for i in range(50)]  # plusieurs clients, comme en production
+
+    durations = []
+    for i in range(args.iterations):
+        start = time.perf_counter()
+        limiter.hit(limit, keys[i % len(keys)])
+        durations.append((time.perf_counter() - start) * 1000)
+    for key in keys:
+        limiter.clear(limit, key)
+
+    p95 = statistics.quantiles(durations, n=20)[-1]
+    print(f"{args.uri.split('@')[-1]} — {args.iterations} hits")
+    print(f"hit fixed-window   médiane {statistics.median(durations):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# benchmarks/write_paths.py
+"""
+Banc d'essai psycopg 3 : requêtes préparées côté serveur et mode pipeline.
+
+Sur la base DATABASE_URL (données de test créées puis supprimées), compare :
+- les lectures chaudes d'une requête (appartenance à un groupe, réponses attendues
+  par liste d'ids, quota du jour), sans puis avec préparation côté serveur ;
+- l'écriture d'un quiz de 10 questions (session, résultats, statistiques de révision,
+  commit), requête par requête puis en mode pipeline.
+
+Usage : python benchmarks/write_paths.py [--iterations 500]
+
+Le gain du pipeline est proportionnel à la latence réseau vers Postgres : à mesurer
+depuis un worker de production vers sa base (sur une base locale, l'écart est faible).
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from contextlib import nullcontext
+from datetime import date
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from sqlalchemy import any_, create_engine, delete, literal
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import sessionmaker
+from app import db
+from app.models import (
+    UUID, User, Group, GroupMember, Document, Question, QuestionType, QuizSession, Result,
+    GenerationQuota, UserQuestionStat, generate_invite_code, new_id,
+)
+from app.review import record_answers
+
+
+def seed(session):
+    user = User(username=f"bench-{new_id()[:8]}", email=f"{new_id()}@bench.local", password_hash="x")
+    session.add(user)
+    session.flush()
+    group = Group(name="Bench", owner_id=user.id, invite_code=generate_invite_code())
+    document = Document(title="Bench", content="x", user_id=user.id)
+    session.add_all([group, document])
+    session.flush()
+    questions = [
+        Question(document_id=document.id, type=QuestionType.ouverte, question=f"Q{i}", answer=f"R{i}")
+        for i in range(10)
+    ]
+    session.add_all(questions + [
+        GroupMember(group_id=group.id, user_id=user.id),
+        GenerationQuota(user_id=user.id, day=date.today(), generations=1, tokens=0),
+    ])
+    session.commit()
+    return user.id, group.id, document.id, [q.id for q in questions]
+
+
+def cleanup(session, user_id, group_id, document_id):
+    session.execute(delete(Result).where(Result.user_id == user_id))
+    session.execute(delete(QuizSession).where(QuizSession.user_id == user_id))
+    session.execute(delete(UserQuestionStat).where(UserQuestionStat.user_id == user_id))
+    session.execute(delete(Question).where(Question.document_id == document_id))
+    session.execute(delete(Document).where(Document.id == document_id))
+    session.execute(delete(GroupMember).where(GroupMember.group_id == group_id))
+    session.execute(delete(Group).where(Group.id == group_id))
+    session.execute(delete(GenerationQuota).where(GenerationQuota.user_id == user_id))
+    session.execute(delete(User).where(User.id == user_id))
+    session.commit()
+
+
+def hot_reads(session, user_id, group_id, question_ids):
+    session.query(GroupMember).filter_by(group_id=group_id, user_id=user_id).first()
+    session.query(Question.id, Question.answer).filter(
+        Question.id == any_(literal(question_ids, ARRAY(UUID)))
+    ).all()
+    session.get(GenerationQuota, (user_id, date.today()))
+
+
+def quiz_write(session, user_id, document_id, question_ids, use_pipeline):
+    quiz_session_id = session.execute(
+        insert(QuizSession)
+        .values(id=new_id(), user_id=user_id, document_id=document_id, score=5, total_questions=10)
+        .returning(QuizSession.id)
+    ).scalar()
+    with db.pipeline(session) if use_pipeline else nullcontext():
+        session.execute(insert(Result).values([
+            {"id": new_id(), "question_id": qid, "user_id": user_id, "user_answer": "x",
+             "is_correct": i % 2 == 0, "quiz_session_id": quiz_session_id}
+            for i, qid in enumerate(question_ids)
+        ]))
+        record_answers(session, user_id, [(qid, i % 2 == 0) for i, qid in enumerate(question_ids)])
+    session.commit()
+
+
+def measure(make_session, iterations, run):
+    """Durées (ms) de `iterations` exécutions, chacune dans une session neuve (comme une requête HTTP)."""
+    durations = []
+    for _ in range(iterations):
+        session = make_session()
+        start = time.perf_counter()
+        run(session)
+        durations.append((time.perf_counter() - start) * 1000)
+        session.close()
+    return durations
+
+
+def report(label, durations):
+    p95 = statistics.quantiles(durations, n=20)[-1]
+    print(f"{label:<38} médiane {statistics.median(durations):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    # Une connexion réutilisée d'une itération à l'autre, comme dans le pool d'un worker
+    engines = {
+        prepared: create_engine(db.DATABASE_URL, pool_size=1, connect_args={"prepare_threshold": 5 if prepared else None})
+        for prepared in (False, True)
+    }
+    sessions = {prepared: sessionmaker(bind=engine, expire_on_commit=False) for prepared, engine in engines.items()}
+
+    setup = sessions[False]()
+    user_id, group_id, document_id, question_ids = seed(setup)
+    try:
+        print(f"{db.engine.url.render_as_string(hide_password=True)} — {args.iterations} itérations\n")
+        for prepared in (False, True):
+            report(
+                f"lectures chaudes, préparées={'oui' if prepared else 'non'}",
+                measure(sessions[prepared], args.iterations, lambda s: hot_reads(s, user_id, group_id, question_ids)),
+            )
+        for use_pipeline in (False, True):
+            report(
+                f"écriture d'un quiz, pipeline={'oui' if use_pipeline else 'non'}",
+                measure(sessions[True], args.iterations, lambda s: quiz_write(s, user_id, document_id, question_ids, use_pipeline)),
+            )
+    finally:
+        cleanup(setup, user_id, group_id, document_id)
+        setup.close()
+        for engine in engines.values():
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
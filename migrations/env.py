@@ -0,0 +1,58 @@
+# migrations/env.py
+# Environnement Alembic : réutilise l'engine et les modèles de l'application.
+# - Lancé par init_db() : la connexion (qui détient déjà le verrou consultatif)
+#   est transmise via config.attributes["connection"].
+# - Lancé en CLI (alembic upgrade head) : on ouvre une connexion directe
+#   (MIGRATION_DATABASE_URL, à défaut DATABASE_URL).
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.db import Base, create_migration_engine
+from app import models  # noqa: F401 — enregistre les tables dans Base.metadata
+
+config = context.config
+target_metadata = Base.metadata
+
+connection = config.attributes.get("connection")
+
+# Logging Alembic uniquement en CLI (en mode app, on garde la config de create_app)
+if connection is None and config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+
+def run_migrations_offline():
+    """Génère le SQL sans se connecter (alembic upgrade head --sql)."""
+    context.configure(
+        url=create_migration_engine().url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run(conn):
+    context.configure(connection=conn, target_metadata=target_metadata, compare_type=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    if connection is not None:
+        _run(connection)
+        return
+    engine = create_migration_engine()
+    try:
+        with engine.connect() as conn:
+            _run(conn)
+    finally:
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,153 @@
+"""Schéma initial (équivalent de l'ancien Base.metadata.create_all)
+
+Les bases créées avant l'introduction d'Alembic sont "stampées" sur cette
+révision par init_db() au lieu d'être recréées.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _id():
+    return sa.Column("id", sa.Text(), primary_key=True)
+
+
+def upgrade():
+    question_type = postgresql.ENUM("qcm", "ouverte", name="questiontype", create_type=False)
+    question_type.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        "users",
+        _id(),
+        sa.Column("username", sa.Text(), nullable=False, unique=True),
+        sa.Column("email", sa.Text(), nullable=False, unique=True),
+        sa.Column("password_hash", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "subjects",
+        _id(),
+        sa.Column("name", sa.Text(), nullable=False),
+        sa.Column("color", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "documents",
+        _id(),
+        sa.Column("title", sa.Text(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("user_id", sa.Text(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("subject_id", sa.Text(), sa.ForeignKey("subjects.id"), nullable=True),
+    )
+    op.create_table(
+        "questions",
+        _id(),
+        sa.Column("document_id", sa.Text(), sa.ForeignKey("documents.id"), nullable=False),
+        sa.Column("type", question_type, nullable=False),
+        sa.Column("question", sa.Text(), nullable=False),
+        sa.Column("choices", sa.JSON(), nullable=True),
+        sa.Column("answer", sa.Text(), nullable=True),
+        sa.Column("explanation", sa.Text(), nullable=True),
+    )
+    op.create_table(
+        "quiz_generations",
+        _id(),
+        sa.Column("user_id", sa.Text(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "quiz_sessions",
+        _id(),
+        sa.Column("user_id", sa.Text(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("document_id", sa.Text(), sa.ForeignKey("documents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("total_questions", sa.Integer(), nullable=False),
+        sa.Column("played_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "results",
+        _id(),
+        sa.Column("question_id", sa.Text(), sa.ForeignKey("questions.id"), nullable=False),
+        sa.Column("user_id", sa.Text(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("user_answer", sa.Text(), nullable=False),
+        sa.Column("is_correct", sa.Boolean(), nullable=True),
+        sa.Column("evaluation", sa.Text(), nullable=True),
+        sa.Column("reviewed_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("quiz_session_id", sa.Text(), sa.ForeignKey("quiz_sessions.id"), nullable=True),
+    )
+    op.create_table(
+        "groups",
+        _id(),
+        sa.Column("name", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("invite_code", sa.Text(), nullable=False, unique=True),
+        sa.Column("owner_id", sa.Text(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "group_members",
+        _id(),
+        sa.Column("group_id", sa.Text(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("user_id", sa.Text(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("joined_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "group_subjects",
+        _id(),
+        sa.Column("group_id", sa.Text(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("subject_id", sa.Text(), sa.ForeignKey("subjects.id"), nullable=False),
+        sa.Column("added_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "events",
+        _id(),
+        sa.Column("name", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("group_id", sa.Text(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("subject_id", sa.Text(), sa.ForeignKey("subjects.id"), nullable=False),
+        sa.Column("start_date", sa.DateTime(), nullable=False),
+        sa.Column("end_date", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "event_quizzes",
+        _id(),
+        sa.Column("event_id", sa.Text(), sa.ForeignKey("events.id"), nullable=False),
+        sa.Column("quiz_number", sa.Integer(), nullable=False),
+        sa.Column("questions", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "event_participations",
+        _id(),
+        sa.Column("event_id", sa.Text(), sa.ForeignKey("events.id"), nullable=False),
+        sa.Column("quiz_id", sa.Text(), sa.ForeignKey("event_quizzes.id"), nullable=False),
+        sa.Column("user_id", sa.Text(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("correct_count", sa.Integer(), nullable=False),
+        sa.Column("total_questions", sa.Integer(), nullable=False),
+        sa.Column("time_spent", sa.Integer(), nullable=True),
+        sa.Column("answers", sa.JSON(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    for table in (
+        "event_participations", "event_quizzes", "events", "group_subjects",
+        "group_members", "groups", "results", "quiz_sessions", "quiz_generations",
+        "questions", "documents", "subjects", "users",
+    ):
+        op.drop_table(table)
+    postgresql.ENUM(name="questiontype").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,77 @@
+"""Index des requêtes chaudes + contraintes d'unicité manquantes
+
+Les index sont créés avec CREATE INDEX CONCURRENTLY (pas de verrou d'écriture
+sur les tables en production). Les contraintes d'unicité sont adossées à un
+index unique construit de la même façon, puis attachées avec
+ADD CONSTRAINT ... USING INDEX.
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0002_hot_path_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_subjects_user_id", "subjects", ["user_id"]),
+    ("ix_documents_user_id_created_at", "documents", ["user_id", "created_at"]),
+    ("ix_documents_subject_id_created_at", "documents", ["subject_id", "created_at"]),
+    ("ix_questions_document_id", "questions", ["document_id"]),
+    ("ix_results_quiz_session_id", "results", ["quiz_session_id"]),
+    ("ix_results_question_id", "results", ["question_id"]),
+    ("ix_quiz_generations_user_id_created_at", "quiz_generations", ["user_id", "created_at"]),
+    ("ix_quiz_sessions_user_document_played_at", "quiz_sessions", ["user_id", "document_id", "played_at"]),
+    ("ix_quiz_sessions_document_id", "quiz_sessions", ["document_id"]),
+    ("ix_group_members_user_id", "group_members", ["user_id"]),
+    ("ix_group_subjects_subject_id", "group_subjects", ["subject_id"]),
+    ("ix_events_group_id_start_date", "events", ["group_id", "start_date"]),
+    ("ix_event_participations_event_id_user_id", "event_participations", ["event_id", "user_id"]),
+]
+
+UNIQUE_CONSTRAINTS = [
+    ("uq_group_members_group_id_user_id", "group_members", ["group_id", "user_id"], "joined_at"),
+    ("uq_group_subjects_group_id_subject_id", "group_subjects", ["group_id", "subject_id"], "added_at"),
+    ("uq_event_quizzes_event_id_quiz_number", "event_quizzes", ["event_id", "quiz_number"], None),
+    ("uq_event_participations_quiz_id_user_id", "event_participations", ["quiz_id", "user_id"], "completed_at"),
+]
+
+
+def upgrade():
+    # Doublons créés par des requêtes concurrentes avant l'ajout des contraintes :
+    # on garde la ligne la plus ancienne.
+    for _name, table, columns, order_col in UNIQUE_CONSTRAINTS:
+        if order_col is None:
+            continue
+        cols = ", ".join(columns)
+        op.execute(f"""
+            DELETE FROM {table} WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (
+                        PARTITION BY {cols} ORDER BY {order_col} NULLS LAST, id
+                    ) AS rn
+                    FROM {table}
+                ) d WHERE d.rn > 1
+            )
+        """)
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, columns, _order_col in UNIQUE_CONSTRAINTS:
+            op.create_index(name, table, columns, unique=True, postgresql_concurrently=True, if_not_exists=True)
+
+    for name, table, _columns, _order_col in UNIQUE_CONSTRAINTS:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+
+def downgrade():
+    for name, table, _columns, _order_col in UNIQUE_CONSTRAINTS:
+        op.drop_constraint(name, table, type_="unique")
+    for name, table, _columns in INDEXES:
+        op.drop_index(name, table_name=table)
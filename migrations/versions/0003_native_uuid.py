@@ -0,0 +1,205 @@
+"""Identifiants : text → uuid natif (migration en ligne)
+
+Convertir directement avec ALTER COLUMN ... TYPE uuid réécrirait chaque table
+sous verrou exclusif. On procède donc en quatre phases :
+
+1. Colonnes "fantômes" <col>__uuid + trigger qui les remplit à chaque écriture
+   (ajout de colonne nullable : opération instantanée).
+2. Hors transaction : remplissage par lots, contraintes CHECK NOT NULL validées
+   et index construits en CONCURRENTLY sur les colonnes fantômes.
+3. Bascule dans une transaction courte : suppression des anciennes colonnes,
+   renommage, PK/UNIQUE rattachées aux index déjà construits, clés étrangères
+   recréées en NOT VALID.
+4. Validation des clés étrangères (sans bloquer les écritures).
+
+Revision ID: 0003_native_uuid
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_native_uuid"
+down_revision = "0002_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+# Colonnes d'identifiant (PK et FK) de chaque table
+UUID_COLUMNS = {
+    "users": ["id"],
+    "subjects": ["id", "user_id"],
+    "documents": ["id", "user_id", "subject_id"],
+    "questions": ["id", "document_id"],
+    "quiz_generations": ["id", "user_id"],
+    "quiz_sessions": ["id", "user_id", "document_id"],
+    "results": ["id", "question_id", "user_id", "quiz_session_id"],
+    "groups": ["id", "owner_id"],
+    "group_members": ["id", "group_id", "user_id"],
+    "group_subjects": ["id", "group_id", "subject_id"],
+    "events": ["id", "group_id", "subject_id"],
+    "event_quizzes": ["id", "event_id"],
+    "event_participations": ["id", "event_id", "quiz_id", "user_id"],
+}
+
+BATCH_SIZE = 5000
+SUFFIX = "__uuid"
+
+
+def _shadow(col):
+    return f"{col}{SUFFIX}"
+
+
+def _fetch_indexes(bind):
+    """Index des tables migrées qui portent sur au moins une colonne d'identifiant."""
+    rows = bind.execute(sa.text("""
+        SELECT t.relname AS table_name, i.relname AS index_name, ix.indisunique,
+               c.contype, array_agg(a.attname ORDER BY k.ord) AS columns
+        FROM pg_index ix
+        JOIN pg_class i ON i.oid = ix.indexrelid
+        JOIN pg_class t ON t.oid = ix.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace AND n.nspname = current_schema()
+        CROSS JOIN LATERAL unnest(ix.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+        LEFT JOIN pg_constraint c
+               ON c.conindid = ix.indexrelid AND c.conrelid = t.oid AND c.contype IN ('p', 'u')
+        WHERE t.relname = ANY(:tables) AND i.relname NOT LIKE 'tmp\\_%'
+        GROUP BY t.relname, i.relname, ix.indisunique, c.contype
+    """), {"tables": list(UUID_COLUMNS)}).all()
+    return [
+        r for r in rows
+        if any(col in UUID_COLUMNS[r.table_name] for col in r.columns)
+    ]
+
+
+def _fetch_foreign_keys(bind):
+    return bind.execute(sa.text("""
+        SELECT t.relname AS table_name, c.conname, pg_get_constraintdef(c.oid) AS definition
+        FROM pg_constraint c
+        JOIN pg_class t ON t.oid = c.conrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace AND n.nspname = current_schema()
+        WHERE c.contype = 'f' AND t.relname = ANY(:tables)
+    """), {"tables": list(UUID_COLUMNS)}).all()
+
+
+def _not_null_columns(bind):
+    rows = bind.execute(sa.text("""
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND is_nullable = 'NO'
+          AND table_name = ANY(:tables)
+    """), {"tables": list(UUID_COLUMNS)}).all()
+    return {(r.table_name, r.column_name) for r in rows}
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # --- Phase 1 : colonnes fantômes + synchronisation des nouvelles écritures ---
+    op.execute("""
+        CREATE OR REPLACE FUNCTION revisia_uuid_shadow_sync() RETURNS trigger AS $$
+        DECLARE
+            col text;
+            patch jsonb := '{}'::jsonb;
+        BEGIN
+            FOREACH col IN ARRAY TG_ARGV LOOP
+                patch := patch || jsonb_build_object(col || '__uuid', to_jsonb(NEW) -> col);
+            END LOOP;
+            NEW := jsonb_populate_record(NEW, patch);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table, cols in UUID_COLUMNS.items():
+        for col in cols:
+            op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {_shadow(col)} uuid")
+        args = ", ".join(f"'{c}'" for c in cols)
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_uuid_shadow ON {table}")
+        op.execute(
+            f"CREATE TRIGGER {table}_uuid_shadow BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION revisia_uuid_shadow_sync({args})"
+        )
+
+    not_null = _not_null_columns(bind)
+    indexes = _fetch_indexes(bind)
+
+    # --- Phase 2 : remplissage par lots, CHECK NOT NULL, index concurrents ---
+    with op.get_context().autocommit_block():
+        for table, cols in UUID_COLUMNS.items():
+            assignments = ", ".join(f"{_shadow(c)} = {c}::uuid" for c in cols)
+            while True:
+                result = bind.execute(sa.text(f"""
+                    UPDATE {table} SET {assignments}
+                    WHERE ctid = ANY(ARRAY(
+                        SELECT ctid FROM {table} WHERE {_shadow('id')} IS NULL LIMIT {BATCH_SIZE}
+                    ))
+                """))
+                if result.rowcount == 0:
+                    break
+
+        for table, cols in UUID_COLUMNS.items():
+            for col in cols:
+                if (table, col) not in not_null:
+                    continue
+                check = f"ck_{table}_{col}_uuid_not_null"
+                bind.execute(sa.text(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {check} "
+                    f"CHECK ({_shadow(col)} IS NOT NULL) NOT VALID"
+                ))
+                bind.execute(sa.text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}"))
+
+        for idx in indexes:
+            cols = ", ".join(
+                _shadow(c) if c in UUID_COLUMNS[idx.table_name] else c for c in idx.columns
+            )
+            unique = "UNIQUE " if idx.indisunique else ""
+            bind.execute(sa.text(
+                f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS tmp_{idx.index_name} "
+                f"ON {idx.table_name} ({cols})"
+            ))
+
+    # --- Phase 3 : bascule (transaction courte, aucune réécriture de table) ---
+    foreign_keys = _fetch_foreign_keys(bind)
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    op.execute(f"LOCK TABLE {', '.join(UUID_COLUMNS)} IN ACCESS EXCLUSIVE MODE")
+
+    for fk in foreign_keys:
+        op.execute(f"ALTER TABLE {fk.table_name} DROP CONSTRAINT {fk.conname}")
+
+    for table, cols in UUID_COLUMNS.items():
+        op.execute(f"DROP TRIGGER {table}_uuid_shadow ON {table}")
+        for col in cols:
+            op.execute(f"ALTER TABLE {table} DROP COLUMN {col} CASCADE")
+            op.execute(f"ALTER TABLE {table} RENAME COLUMN {_shadow(col)} TO {col}")
+            if (table, col) in not_null:
+                # Instantané grâce au CHECK validé en phase 2
+                op.execute(f"ALTER TABLE {table} ALTER COLUMN {col} SET NOT NULL")
+                op.execute(f"ALTER TABLE {table} DROP CONSTRAINT ck_{table}_{col}_uuid_not_null")
+
+    for idx in indexes:
+        op.execute(f"ALTER INDEX tmp_{idx.index_name} RENAME TO {idx.index_name}")
+        if idx.contype == "p":
+            op.execute(f"ALTER TABLE {idx.table_name} ADD CONSTRAINT {idx.index_name} PRIMARY KEY USING INDEX {idx.index_name}")
+        elif idx.contype == "u":
+            op.execute(f"ALTER TABLE {idx.table_name} ADD CONSTRAINT {idx.index_name} UNIQUE USING INDEX {idx.index_name}")
+
+    for fk in foreign_keys:
+        op.execute(f"ALTER TABLE {fk.table_name} ADD CONSTRAINT {fk.conname} {fk.definition} NOT VALID")
+
+    # --- Phase 4 : validation des clés étrangères (verrou SHARE UPDATE EXCLUSIVE seulement) ---
+    with op.get_context().autocommit_block():
+        for fk in foreign_keys:
+            bind.execute(sa.text(f"ALTER TABLE {fk.table_name} VALIDATE CONSTRAINT {fk.conname}"))
+        bind.execute(sa.text("DROP FUNCTION IF EXISTS revisia_uuid_shadow_sync()"))
+
+
+def downgrade():
+    # Retour au texte : réécriture des tables sous verrou (opération hors ligne)
+    bind = op.get_bind()
+    foreign_keys = _fetch_foreign_keys(bind)
+    for fk in foreign_keys:
+        op.execute(f"ALTER TABLE {fk.table_name} DROP CONSTRAINT {fk.conname}")
+    for table, cols in UUID_COLUMNS.items():
+        alters = ", ".join(f"ALTER COLUMN {c} TYPE text USING {c}::text" for c in cols)
+        op.execute(f"ALTER TABLE {table} {alters}")
+    for fk in foreign_keys:
+        op.execute(f"ALTER TABLE {fk.table_name} ADD CONSTRAINT {fk.conname} {fk.definition}")
@@ -0,0 +1,57 @@
+"""Table event_quiz_questions à la place de la liste JSON EventQuiz.questions
+
+Revision ID: 0004_event_quiz_questions
+Revises: 0003_native_uuid
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_event_quiz_questions"
+down_revision = "0003_native_uuid"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "event_quiz_questions",
+        sa.Column("event_quiz_id", sa.Uuid(as_uuid=False), sa.ForeignKey("event_quizzes.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("position", sa.Integer(), primary_key=True),
+        sa.Column("question_id", sa.Uuid(as_uuid=False), sa.ForeignKey("questions.id", ondelete="CASCADE"), nullable=False),
+    )
+
+    # La colonne JSON contient une chaîne json.dumps(...) (double encodage) :
+    # on la décode si besoin, puis on éclate la liste en lignes ordonnées.
+    # Les questions supprimées depuis la création de l'événement sont ignorées.
+    op.execute("""
+        INSERT INTO event_quiz_questions (event_quiz_id, position, question_id)
+        SELECT eq.id, ids.position, ids.question_id::uuid
+        FROM event_quizzes eq
+        CROSS JOIN LATERAL json_array_elements_text(
+            CASE WHEN json_typeof(eq.questions) = 'string'
+                 THEN (eq.questions #>> '{}')::json
+                 ELSE eq.questions
+            END
+        ) WITH ORDINALITY AS ids(question_id, position)
+        WHERE EXISTS (SELECT 1 FROM questions q WHERE q.id = ids.question_id::uuid)
+    """)
+
+    op.create_index("ix_event_quiz_questions_question_id", "event_quiz_questions", ["question_id"])
+    op.drop_column("event_quizzes", "questions")
+
+
+def downgrade():
+    op.add_column("event_quizzes", sa.Column("questions", sa.JSON(), nullable=True))
+    op.execute("""
+        UPDATE event_quizzes eq SET questions = to_json(sub.ids::text)
+        FROM (
+            SELECT event_quiz_id, json_agg(question_id ORDER BY position) AS ids
+            FROM event_quiz_questions GROUP BY event_quiz_id
+        ) sub
+        WHERE sub.event_quiz_id = eq.id
+    """)
+    op.execute("UPDATE event_quizzes SET questions = to_json('[]'::text) WHERE questions IS NULL")
+    op.alter_column("event_quizzes", "questions", nullable=False)
+    op.drop_table("event_quiz_questions")
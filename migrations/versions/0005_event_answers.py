@@ -0,0 +1,68 @@
+"""Table event_answers à la place de la colonne JSON EventParticipation.answers
+
+Revision ID: 0005_event_answers
+Revises: 0004_event_quiz_questions
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_event_answers"
+down_revision = "0004_event_quiz_questions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "event_answers",
+        sa.Column("participation_id", sa.Uuid(as_uuid=False), sa.ForeignKey("event_participations.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("position", sa.Integer(), primary_key=True),
+        sa.Column("event_id", sa.Uuid(as_uuid=False), sa.ForeignKey("events.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("question_id", sa.Uuid(as_uuid=False), sa.ForeignKey("questions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_answer", sa.Text(), nullable=False),
+        sa.Column("is_correct", sa.Boolean(), nullable=False),
+    )
+
+    # Même double encodage que event_quizzes.questions (cf. 0004) : chaîne json.dumps(...)
+    # contenant la liste des réponses détaillées.
+    op.execute("""
+        INSERT INTO event_answers (participation_id, position, event_id, question_id, user_answer, is_correct)
+        SELECT ep.id, a.position, ep.event_id, (a.answer ->> 'question_id')::uuid,
+               coalesce(a.answer ->> 'user_answer', ''),
+               coalesce((a.answer ->> 'is_correct')::boolean, false)
+        FROM event_participations ep
+        CROSS JOIN LATERAL json_array_elements(
+            CASE WHEN json_typeof(ep.answers) = 'string'
+                 THEN (ep.answers #>> '{}')::json
+                 ELSE ep.answers
+            END
+        ) WITH ORDINALITY AS a(answer, position)
+        WHERE EXISTS (SELECT 1 FROM questions q WHERE q.id = (a.answer ->> 'question_id')::uuid)
+    """)
+
+    op.create_index("ix_event_answers_event_id_question_id", "event_answers", ["event_id", "question_id"])
+    op.create_index("ix_event_answers_question_id", "event_answers", ["question_id"])
+    op.drop_column("event_participations", "answers")
+
+
+def downgrade():
+    op.add_column("event_participations", sa.Column("answers", sa.JSON(), nullable=True))
+    op.execute("""
+        UPDATE event_participations ep SET answers = to_json(sub.answers::text)
+        FROM (
+            SELECT a.participation_id, json_agg(json_build_object(
+                'question_id', a.question_id,
+                'user_answer', a.user_answer,
+                'correct_answer', q.answer,
+                'is_correct', a.is_correct
+            ) ORDER BY a.position) AS answers
+            FROM event_answers a JOIN questions q ON q.id = a.question_id
+            GROUP BY a.participation_id
+        ) sub
+        WHERE sub.participation_id = ep.id
+    """)
+    op.execute("UPDATE event_participations SET answers = to_json('[]'::text) WHERE answers IS NULL")
+    op.alter_column("event_participations", "answers", nullable=False)
+    op.drop_table("event_answers")
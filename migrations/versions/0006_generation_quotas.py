@@ -0,0 +1,64 @@
+"""Compteurs journaliers generation_quotas à la place de la table quiz_generations
+
+Revision ID: 0006_generation_quotas
+Revises: 0005_event_answers
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_generation_quotas"
+down_revision = "0005_event_answers"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "generation_quotas",
+        sa.Column("user_id", sa.Uuid(as_uuid=False), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("generations", sa.Integer(), nullable=False),
+        sa.Column("tokens", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "generation_usage_monthly",
+        sa.Column("user_id", sa.Uuid(as_uuid=False), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("generations", sa.Integer(), nullable=False),
+        sa.Column("tokens", sa.BigInteger(), nullable=False),
+    )
+
+    # Une ligne par génération → une ligne par utilisateur et par jour
+    op.execute("""
+        INSERT INTO generation_quotas (user_id, day, generations, tokens)
+        SELECT user_id, created_at::date, count(*), 0
+        FROM quiz_generations
+        WHERE created_at IS NOT NULL
+        GROUP BY user_id, created_at::date
+    """)
+    op.drop_table("quiz_generations")
+
+
+def downgrade():
+    op.create_table(
+        "quiz_generations",
+        sa.Column("id", sa.Uuid(as_uuid=False), primary_key=True),
+        sa.Column("user_id", sa.Uuid(as_uuid=False), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    # Les cumuls mensuels sont rattachés au 1er du mois
+    op.execute("""
+        INSERT INTO quiz_generations (id, user_id, created_at)
+        SELECT gen_random_uuid(), q.user_id, q.day
+        FROM (
+            SELECT user_id, day, generations FROM generation_quotas
+            UNION ALL
+            SELECT user_id, month, generations FROM generation_usage_monthly
+        ) q
+        CROSS JOIN LATERAL generate_series(1, q.generations)
+    """)
+    op.create_index("ix_quiz_generations_user_id_created_at", "quiz_generations", ["user_id", "created_at"])
+    op.drop_table("generation_usage_monthly")
+    op.drop_table("generation_quotas")
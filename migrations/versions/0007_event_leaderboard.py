@@ -0,0 +1,46 @@
+"""Classement des événements maintenu à la soumission (event_leaderboard)
+
+Revision ID: 0007_event_leaderboard
+Revises: 0006_generation_quotas
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_event_leaderboard"
+down_revision = "0006_generation_quotas"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "event_leaderboard",
+        sa.Column("event_id", sa.Uuid(as_uuid=False), sa.ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("user_id", sa.Uuid(as_uuid=False), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("total_correct", sa.Integer(), nullable=False),
+        sa.Column("total_questions", sa.Integer(), nullable=False),
+        sa.Column("total_time", sa.Integer(), nullable=False),
+        sa.Column("quiz_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    op.execute("""
+        INSERT INTO event_leaderboard
+            (event_id, user_id, total_correct, total_questions, total_time, quiz_count, updated_at)
+        SELECT event_id, user_id, sum(correct_count), sum(total_questions),
+               sum(coalesce(time_spent, 0)), count(*), max(completed_at)
+        FROM event_participations
+        GROUP BY event_id, user_id
+    """)
+
+    op.create_index(
+        "ix_event_leaderboard_ranking",
+        "event_leaderboard",
+        ["event_id", sa.text("(- total_correct)"), "total_time", "user_id"],
+    )
+
+
+def downgrade():
+    op.drop_table("event_leaderboard")
@@ -0,0 +1,35 @@
+"""Compteurs dénormalisés : groups.member_count et subjects.document_count
+
+Revision ID: 0008_denormalized_counters
+Revises: 0007_event_leaderboard
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_denormalized_counters"
+down_revision = "0007_event_leaderboard"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("groups", sa.Column("member_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("subjects", sa.Column("document_count", sa.Integer(), nullable=False, server_default="0"))
+
+    op.execute("""
+        UPDATE groups g SET member_count = m.n
+        FROM (SELECT group_id, count(*) AS n FROM group_members GROUP BY group_id) m
+        WHERE m.group_id = g.id
+    """)
+    op.execute("""
+        UPDATE subjects s SET document_count = d.n
+        FROM (SELECT subject_id, count(*) AS n FROM documents WHERE subject_id IS NOT NULL GROUP BY subject_id) d
+        WHERE d.subject_id = s.id
+    """)
+
+
+def downgrade():
+    op.drop_column("subjects", "document_count")
+    op.drop_column("groups", "member_count")
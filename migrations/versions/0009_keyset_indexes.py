@@ -0,0 +1,39 @@
+"""Index de pagination par curseur : (filtre, tri, id)
+
+Les listes de cours et d'événements sont paginées par curseur sur (date, id) :
+l'id est ajouté aux index existants pour que chaque page soit une lecture par plage.
+Index créés puis supprimés avec CONCURRENTLY (pas de verrou d'écriture).
+
+Revision ID: 0009_keyset_indexes
+Revises: 0008_denormalized_counters
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0009_keyset_indexes"
+down_revision = "0008_denormalized_counters"
+branch_labels = None
+depends_on = None
+
+
+# (nouvel index, ancien index, table, colonnes du nouvel index)
+INDEXES = [
+    ("ix_documents_user_id_created_at_id", "ix_documents_user_id_created_at", "documents", ["user_id", "created_at", "id"]),
+    ("ix_documents_subject_id_created_at_id", "ix_documents_subject_id_created_at", "documents", ["subject_id", "created_at", "id"]),
+    ("ix_events_group_id_start_date_id", "ix_events_group_id_start_date", "events", ["group_id", "start_date", "id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, old_name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(old_name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, old_name, table, columns in INDEXES:
+            op.create_index(old_name, table, columns[:-1], postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
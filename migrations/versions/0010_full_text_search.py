@@ -0,0 +1,85 @@
+"""Recherche plein texte : colonnes tsvector générées + index GIN
+
+Configuration de recherche fr_unaccent : français (racinisation, mots vides) et,
+si l'extension unaccent est disponible sur le serveur, insensible aux accents.
+Sans unaccent, fr_unaccent est une simple copie de french ; après installation de
+l'extension, appliquer :
+    CREATE EXTENSION unaccent;
+    ALTER TEXT SEARCH CONFIGURATION fr_unaccent
+        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+    UPDATE documents SET title = title; UPDATE questions SET question = question;
+(les colonnes générées ne sont recalculées qu'à l'écriture de la ligne).
+
+Les colonnes STORED réécrivent les tables documents et questions (verrou le temps
+de la migration) ; les index GIN sont ensuite créés avec CONCURRENTLY.
+
+Revision ID: 0010_full_text_search
+Revises: 0009_keyset_indexes
+Create Date: 2026-10-19
+"""
+
+import logging
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision = "0010_full_text_search"
+down_revision = "0009_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+DOCUMENT_VECTOR = (
+    "setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(content, '')), 'B')"
+)
+QUESTION_VECTOR = (
+    "setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(question, '')), 'A') || "
+    "setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(answer, '')), 'B')"
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    has_unaccent = bind.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'unaccent'")
+    ).scalar()
+    if has_unaccent:
+        op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    else:
+        logger.warning("Extension unaccent indisponible : recherche sensible aux accents (fr_unaccent = french)")
+
+    op.execute("""
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'fr_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION fr_unaccent (COPY = french);
+            END IF;
+        END $$
+    """)
+    if has_unaccent:
+        op.execute(
+            "ALTER TEXT SEARCH CONFIGURATION fr_unaccent "
+            "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem"
+        )
+
+    op.add_column("documents", sa.Column("search_vector", TSVECTOR(), sa.Computed(DOCUMENT_VECTOR, persisted=True)))
+    op.add_column("questions", sa.Column("search_vector", TSVECTOR(), sa.Computed(QUESTION_VECTOR, persisted=True)))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_documents_search_vector", "documents", ["search_vector"],
+            postgresql_using="gin", postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_questions_search_vector", "questions", ["search_vector"],
+            postgresql_using="gin", postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_questions_search_vector", table_name="questions")
+    op.drop_index("ix_documents_search_vector", table_name="documents")
+    op.drop_column("questions", "search_vector")
+    op.drop_column("documents", "search_vector")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS fr_unaccent")
@@ -0,0 +1,58 @@
+"""Statistiques de révision par (utilisateur, question) : user_question_stats
+
+Mises à jour par upsert à l'enregistrement des résultats (app/review.py) ;
+initialisées ici depuis l'historique de la table results.
+
+Revision ID: 0011_user_question_stats
+Revises: 0010_full_text_search
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_user_question_stats"
+down_revision = "0010_full_text_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_question_stats",
+        sa.Column("user_id", sa.Uuid(as_uuid=False), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("question_id", sa.Uuid(as_uuid=False), sa.ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("correct_count", sa.Integer(), nullable=False),
+        sa.Column("correct_streak", sa.Integer(), nullable=False),
+        sa.Column("last_seen", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("next_due", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+    # Série = bonnes réponses postérieures à la dernière erreur ;
+    # échéance = dernière réponse + intervalle de la série (cf. REVIEW_INTERVALS)
+    op.execute("""
+        INSERT INTO user_question_stats
+            (user_id, question_id, attempts, correct_count, correct_streak, last_seen, next_due)
+        SELECT user_id, question_id, attempts, correct_count, correct_streak, last_seen,
+               last_seen + (ARRAY[0, 1, 3, 7, 16, 35])[least(correct_streak, 5) + 1] * interval '1 day'
+        FROM (
+            SELECT user_id, question_id,
+                   count(*) AS attempts,
+                   count(*) FILTER (WHERE is_correct) AS correct_count,
+                   count(*) FILTER (WHERE is_correct AND reviewed_at > coalesce(last_wrong, '-infinity')) AS correct_streak,
+                   coalesce(max(reviewed_at), now()) AS last_seen
+            FROM (
+                SELECT user_id, question_id, is_correct, reviewed_at,
+                       max(reviewed_at) FILTER (WHERE is_correct IS NOT TRUE)
+                           OVER (PARTITION BY user_id, question_id) AS last_wrong
+                FROM results
+                WHERE user_id IS NOT NULL
+            ) r
+            GROUP BY user_id, question_id
+        ) s
+    """)
+
+
+def downgrade():
+    op.drop_table("user_question_stats")
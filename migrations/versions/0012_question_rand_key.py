@@ -0,0 +1,42 @@
+"""Clé aléatoire des questions (rand_key) pour l'échantillonnage par index
+
+Chaque question reçoit une valeur random() fixe ; l'index (document_id, rand_key)
+remplace ix_questions_document_id (même préfixe) et permet de tirer k questions
+d'un cours par une lecture de plage à partir d'un point aléatoire.
+
+Revision ID: 0012_question_rand_key
+Revises: 0011_user_question_stats
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012_question_rand_key"
+down_revision = "0011_user_question_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Défaut volatil : la table est réécrite une fois, chaque ligne reçoit sa propre valeur
+    op.add_column(
+        "questions",
+        sa.Column("rand_key", sa.Float(), server_default=sa.func.random(), nullable=False),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_questions_document_id_rand_key", "questions", ["document_id", "rand_key"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index("ix_questions_document_id", table_name="questions", postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_questions_document_id", "questions", ["document_id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index("ix_questions_document_id_rand_key", table_name="questions", postgresql_concurrently=True, if_exists=True)
+    op.drop_column("questions", "rand_key")
@@ -0,0 +1,33 @@
+"""Clé d'idempotence des sessions de quiz (renvoi d'un même résultat par le client)
+
+Revision ID: 0013_quiz_session_idempotency
+Revises: 0012_question_rand_key
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013_quiz_session_idempotency"
+down_revision = "0012_question_rand_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("quiz_sessions", sa.Column("idempotency_key", sa.Text(), nullable=True))
+    # Les sessions existantes n'ont pas de clé (NULL) : l'unicité ne porte que sur les nouvelles
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_quiz_sessions_user_id_idempotency_key", "quiz_sessions", ["user_id", "idempotency_key"],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_quiz_sessions_user_id_idempotency_key", table_name="quiz_sessions",
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column("quiz_sessions", "idempotency_key")
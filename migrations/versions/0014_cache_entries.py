@@ -0,0 +1,32 @@
+"""Tier partagé des caches de lecture : table UNLOGGED cache_entries
+
+Utilisée quand CACHE_URL pointe vers PostgreSQL (cf. app/cache.py). UNLOGGED : écritures
+sans WAL, table vidée après un crash et non répliquée, ce qui convient à un cache.
+
+Revision ID: 0014_cache_entries
+Revises: 0013_quiz_session_idempotency
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0014_cache_entries"
+down_revision = "0013_quiz_session_idempotency"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "cache_entries",
+        sa.Column("key", sa.Text(), primary_key=True),
+        sa.Column("value", sa.LargeBinary(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index("ix_cache_entries_expires_at", "cache_entries", ["expires_at"])
+
+
+def downgrade():
+    op.drop_table("cache_entries")
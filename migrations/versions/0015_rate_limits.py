@@ -0,0 +1,31 @@
+"""Compteurs de rate limiting partagés : table UNLOGGED rate_limits
+
+Utilisée quand RATELIMIT_STORAGE_URI pointe vers PostgreSQL (cf. app/ratelimit.py).
+
+Revision ID: 0015_rate_limits
+Revises: 0014_cache_entries
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0015_rate_limits"
+down_revision = "0014_cache_entries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "rate_limits",
+        sa.Column("key", sa.Text(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index("ix_rate_limits_expires_at", "rate_limits", ["expires_at"])
+
+
+def downgrade():
+    op.drop_table("rate_limits")
@@ -0,0 +1,43 @@
+"""Générations de quiz en arrière-plan : table generation_jobs
+
+État et progression d'une génération (parties traitées, questions enregistrées), suivis
+en direct par le flux SSE GET /api/quizzes/jobs/<id>/events (cf. app/generation.py).
+
+Revision ID: 0016_generation_jobs
+Revises: 0015_rate_limits
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0016_generation_jobs"
+down_revision = "0015_rate_limits"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "generation_jobs",
+        sa.Column("id", sa.Uuid(as_uuid=False), primary_key=True),
+        sa.Column("user_id", sa.Uuid(as_uuid=False), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("document_id", sa.Uuid(as_uuid=False), sa.ForeignKey("documents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("chunks_done", sa.Integer(), nullable=False),
+        sa.Column("chunks_total", sa.Integer(), nullable=True),
+        sa.Column("questions_count", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("quota_day", sa.Date(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index(
+        "uq_generation_jobs_document_id_active", "generation_jobs", ["document_id"], unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+    op.create_index("ix_generation_jobs_user_id_created_at", "generation_jobs", ["user_id", "created_at"])
+
+
+def downgrade():
+    op.drop_table("generation_jobs")
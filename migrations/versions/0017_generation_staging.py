@@ -0,0 +1,29 @@
+"""Générations de quiz : questions mises de côté jusqu'à la fin de la génération
+
+Les questions de chaque partie restent dans la ligne generation_jobs (staged_questions) et
+ne rejoignent la table questions qu'avec le statut « done » : un cours en cours de génération
+n'est ni jouable ni considéré comme déjà généré, et un échec ne touche à aucune question.
+
+Revision ID: 0017_generation_staging
+Revises: 0016_generation_jobs
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0017_generation_staging"
+down_revision = "0016_generation_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "generation_jobs",
+        sa.Column("staged_questions", sa.JSON(), nullable=False, server_default="[]"),
+    )
+
+
+def downgrade():
+    op.drop_column("generation_jobs", "staged_questions")
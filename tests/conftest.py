@@ -8,9 +8,14 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT_DIR))
 
+import asyncio
+import socket
+import threading
 import pytest
+from contextlib import ExitStack, contextmanager
 from flask import Flask
 from app.db import Base, SessionLocal, init_db
+from app.querystats import track_queries
 from app.routes.documents import bp as documents_bp
 from app.routes.quizzes import bp as quizzes_bp
 
@@ -33,6 +38,38 @@ def test_app():
     yield app
 
 
+# --- Application complète (create_app) ---
+@pytest.fixture(scope="session")
+def full_app():
+    """Application complète (tous les blueprints et extensions), sans CSRF ni rate limiting."""
+    os.environ.setdefault("SECRET_KEY", "test")
+    from app import create_app
+    from app.extensions import limiter
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, TESTING=True)
+    limiter.enabled = False
+    yield app
+    limiter.enabled = True
+
+
+@pytest.fixture
+def login(full_app):
+    """
+    Client de full_app connecté avec un compte existant :
+        client = login("eleve@test.fr")
+    Le cache d'identité est vidé : la requête suivante relit l'utilisateur (budgets SQL).
+    """
+    from app.routes.auth import user_cache
+
+    def log_in(email, password="pw"):
+        client = full_app.test_client()
+        client.post("/auth/login", data={"email": email, "password": password})
+        user_cache.clear()
+        return client
+    return log_in
+
+
 # --- Client HTTP Flask ---
 @pytest.fixture
 def client(test_app):
@@ -57,9 +94,96 @@ def clean_db(request):
     if "no_db" in request.keywords:
         yield
         return
+    # Base migrée (init_db) avant le premier nettoyage, quel que soit l'ordre des tests
+    request.getfixturevalue("test_app")
     session = SessionLocal()
     for table in reversed(Base.metadata.sorted_tables):
         session.execute(table.delete())
     session.commit()
     session.close()
-    yield
\ No newline at end of file
+    yield
+
+# --- Budget de requêtes SQL ---
+@pytest.fixture
+def query_budget():
+    """
+    Échoue si le bloc exécute plus de `max_queries` requêtes SQL (régressions N+1) :
+        with query_budget(3):
+            client.get("/groups/")
+    """
+    @contextmanager
+    def budget(max_queries):
+        with track_queries(record=True) as stats:
+            yield stats
+        assert stats.count <= max_queries, (
+            f"{stats.count} requêtes SQL pour un budget de {max_queries} :\n"
+            + "\n".join(stats.statements)
+        )
+    return budget
+
+
+# --- Mode pipeline (app/db.py) ---
+@pytest.fixture
+def pool_after_pipeline(monkeypatch):
+    """
+    Remplace pipeline() dans les modules donnés : à la sortie de chaque bloc, toutes les
+    connexions libres du pool sont empruntées (comme par d'autres requêtes à cet instant)
+    et doivent répondre. Renvoie la liste des vérifications faites :
+        checks = pool_after_pipeline(results_routes)
+    """
+    from app import db
+    from sqlalchemy import text
+
+    checks = []
+
+    @contextmanager
+    def checked_pipeline(session):
+        with db.pipeline(session):
+            yield
+            with ExitStack() as stack:
+                others = [stack.enter_context(db.engine.connect()) for _ in range(db.engine.pool.checkedin() or 1)]
+                checks.append(all(other.execute(text("SELECT 1")).scalar() == 1 for other in others))
+
+    def patch(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, "pipeline", checked_pipeline)
+        return checks
+    return patch
+
+
+# --- Processus de diffusion des flux SSE (app/fanout.py) ---
+@pytest.fixture
+def fanout_get():
+    """
+    Processus de diffusion lancé dans un thread (asyncio.run, comme flask fanout), jetons
+    signés avec la clé "test" ; renvoie une fonction qui y ouvre une requête GET :
+        stream = fanout_get(f"/jobs/{job_id}/events?token=...")
+    """
+    from app import fanout
+
+    started = threading.Event()
+    state = {}
+
+    async def main():
+        state["loop"], state["task"] = asyncio.get_running_loop(), asyncio.current_task()
+        await fanout.serve("test", "127.0.0.1", 0, started=lambda server: (
+            state.update(port=server.sockets[0].getsockname()[1]), started.set()
+        ))
+
+    def run():
+        try:
+            asyncio.run(main())
+        except asyncio.CancelledError:
+            pass
+
+    def get(path):
+        conn = socket.create_connection(("127.0.0.1", state["port"]), timeout=5)
+        conn.sendall(f"GET {path} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        return conn.makefile("rb")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(timeout=5)
+    yield get
+    state["loop"].call_soon_threadsafe(state["task"].cancel)
+    thread.join(timeout=5)
@@ -0,0 +1,97 @@
+# tests/test_counters.py
+"""
+Compteurs dénormalisés (app/counters.py) : groups.member_count et subjects.document_count,
+mis à jour par les écritures (uniquement pour les matières de l'utilisateur) et recalculés
+par repair_counters.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import io
+import pytest
+from sqlalchemy import update
+from app.counters import adjust_document_count, adjust_member_count, move_document, repair_counters
+from app.models import User, Subject, Document, Group, GroupMember, generate_invite_code, new_id
+
+
+@pytest.fixture
+def owner(db_session):
+    user = User(username="owner", email="owner@test.fr", password_hash="x")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def test_document_counts_follow_create_move_delete(db_session, owner):
+    maths = Subject(name="Maths", user_id=owner.id)
+    physique = Subject(name="Physique", user_id=owner.id)
+    db_session.add_all([maths, physique])
+    db_session.flush()
+
+    docs = [Document(title=f"Cours {i}", content="x", user_id=owner.id, subject_id=maths.id) for i in range(3)]
+    for doc in docs:
+        db_session.add(doc)
+        adjust_document_count(db_session, doc.subject_id, 1)
+    db_session.flush()
+    move_document(db_session, docs[0], physique.id)
+    move_document(db_session, docs[1], None)
+    db_session.delete(docs[2])
+    adjust_document_count(db_session, docs[2].subject_id, -1)
+    db_session.commit()
+
+    db_session.refresh(maths)
+    db_session.refresh(physique)
+    assert (maths.document_count, physique.document_count) == (0, 1)
+
+
+def test_repair_recomputes_drifted_counters(db_session, owner):
+    group = Group(name="Classe", owner_id=owner.id, invite_code=generate_invite_code())
+    subject = Subject(name="Maths", user_id=owner.id)
+    db_session.add_all([group, subject])
+    db_session.flush()
+    db_session.add(GroupMember(group_id=group.id, user_id=owner.id))
+    adjust_member_count(db_session, group.id, 1)
+    db_session.add(Document(title="Cours", content="x", user_id=owner.id, subject_id=subject.id))
+    db_session.commit()
+
+    # Dérive : écriture hors des chemins applicatifs
+    db_session.execute(update(Group).values(member_count=7))
+    db_session.commit()
+
+    assert repair_counters(db_session) == {"groups": 1, "subjects": 1}
+    db_session.commit()
+    db_session.refresh(group)
+    db_session.refresh(subject)
+    assert (group.member_count, subject.document_count) == (1, 1)
+    assert repair_counters(db_session) == {"groups": 0, "subjects": 0}
+
+
+def test_routes_only_count_into_own_subjects(db_session, owner, login):
+    eleve = User(username="eleve", email="eleve@test.fr")
+    eleve.set_password("pw")
+    theirs = Subject(name="Maths", user_id=owner.id)
+    db_session.add_all([eleve, theirs])
+    db_session.flush()
+    course = Document(title="Cours", content="x", user_id=eleve.id)
+    db_session.add(course)
+    db_session.commit()
+    client = login("eleve@test.fr")
+
+    # Matière d'un autre utilisateur ou inexistante : 404, ni cours ni compteur touchés
+    for subject_id in (theirs.id, new_id()):
+        upload = client.post("/api/documents/upload", content_type="multipart/form-data", data={
+            "file": (io.BytesIO(b"docx"), "cours.docx"), "subject_id": subject_id,
+        })
+        assert upload.status_code == 404
+        assert client.put(f"/api/documents/{course.id}/subject", json={"subject_id": subject_id}).status_code == 404
+
+    db_session.refresh(theirs)
+    db_session.refresh(course)
+    assert theirs.document_count == 0 and course.subject_id is None
+    assert db_session.query(Document).count() == 1
@@ -0,0 +1,86 @@
+# tests/test_engine_profile.py
+"""
+Tests du profil d'engine SQLAlchemy (app/db.py) et de l'export des métriques du pool.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+from app import db, metrics
+
+pytestmark = pytest.mark.no_db
+
+
+def test_pool_sized_from_threads(monkeypatch):
+    monkeypatch.setattr(db, "DB_PGBOUNCER", False)
+    monkeypatch.setattr(db, "DB_POOL_SIZE", 8)
+    monkeypatch.setattr(db, "DB_MAX_OVERFLOW", 4)
+    monkeypatch.setattr(db, "DB_MAX_CONNECTIONS", 0)
+    options = db.engine_options()
+    assert options["poolclass"] is db.TimedQueuePool
+    assert (options["pool_size"], options["max_overflow"]) == (8, 4)
+    assert options["pool_pre_ping"] is db.DB_POOL_PRE_PING
+
+
+def test_pool_capped_by_max_connections(monkeypatch):
+    monkeypatch.setattr(db, "DB_PGBOUNCER", False)
+    monkeypatch.setattr(db, "DB_POOL_SIZE", 8)
+    monkeypatch.setattr(db, "DB_MAX_OVERFLOW", 4)
+    monkeypatch.setattr(db, "DB_MAX_CONNECTIONS", 20)
+    monkeypatch.setattr(db, "WEB_CONCURRENCY", 2)
+    options = db.engine_options()
+    # 20 connexions / 2 workers = 10 par worker
+    assert options["pool_size"] + options["max_overflow"] == 10
+
+
+def test_pgbouncer_mode_disables_local_pool(monkeypatch):
+    monkeypatch.setattr(db, "DB_PGBOUNCER", True)
+    monkeypatch.setattr(db, "DB_PREPARE_THRESHOLD", -1)
+    options = db.engine_options()
+    assert options["poolclass"] is NullPool
+    # Ni paramètres de démarrage (options=-c ...) ni requêtes préparées à travers PgBouncer
+    assert "options" not in options["connect_args"]
+    assert options["connect_args"]["prepare_threshold"] is None
+
+
+def test_urls_use_psycopg3():
+    for url in (
+        "postgres://u:p@h/db",
+        "postgresql://u:p@h/db",
+        "postgresql+psycopg2://u:p@h/db",
+        "postgresql+psycopg://u:p@h/db",
+    ):
+        assert db.psycopg_url(url) == "postgresql+psycopg://u:p@h/db"
+    assert db.engine.dialect.driver == "psycopg"
+
+
+def test_prepared_statements_enabled(monkeypatch):
+    monkeypatch.setattr(db, "DB_PGBOUNCER", False)
+    monkeypatch.setattr(db, "DB_PREPARE_THRESHOLD", 5)
+    assert db.engine_options()["connect_args"]["prepare_threshold"] == 5
+
+
+def test_statement_timeout_applied():
+    with db.engine.connect() as conn:
+        timeout = conn.execute(text("SHOW statement_timeout")).scalar()
+    expected = f"{db.DB_STATEMENT_TIMEOUT_MS // 1000}s" if db.DB_STATEMENT_TIMEOUT_MS else "0"
+    assert timeout == expected
+
+
+def test_metrics_export_pool_stats():
+    before = metrics.POOL_CHECKOUT_SECONDS.count
+    with db.engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        exported = metrics.render()
+    assert metrics.POOL_CHECKOUT_SECONDS.count > before
+    assert "revisia_db_pool_checkout_seconds_bucket" in exported
+    assert "revisia_db_pool_checked_out{" in exported
+    assert "revisia_db_pool_utilization{" in exported
@@ -0,0 +1,225 @@
+# tests/test_generation_jobs.py
+"""
+Générations de quiz en arrière-plan (app/generation.py) : découpage du cours, progression
+publiée par NOTIFY et relayée par le flux SSE (worker, places limitées, ou processus de
+diffusion app/fanout.py), échec sans questions partielles ni quota consommé, une seule
+génération en cours par cours.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import json
+import threading
+from datetime import date, timedelta
+import pytest
+
+from app import fanout, generation, notify
+from app.llm import split_course
+from app.models import Document, GenerationJob, Question, User
+from app.quota import generations_today, reserve_generation
+
+# Cours de 3 paragraphes de 30 mots : 3 parties avec GENERATION_CHUNK_WORDS = 40
+COURSE = "\n".join(" ".join(f"mot{p}_{i}" for i in range(30)) for p in range(3))
+
+
+def fake_llm(fail_on_call=None):
+    calls = []
+
+    def generate(text, total_questions):
+        calls.append(total_questions)
+        if len(calls) == fail_on_call:
+            return [], "quota_exceeded"
+        return [
+            {"type": "qcm", "question": f"Q{len(calls)}.{i}", "choices": ["a", "b", "c", "d"], "answer": "a"}
+            for i in range(total_questions)
+        ], None
+
+    return generate, calls
+
+
+@pytest.fixture
+def document(db_session, monkeypatch):
+    monkeypatch.setattr(generation, "GENERATION_CHUNK_WORDS", 40)
+    user = User(username="prof", email="prof@test.fr")
+    user.set_password("pw")
+    db_session.add(user)
+    db_session.flush()
+    document = Document(title="Cours", content=COURSE, user_id=user.id)
+    db_session.add(document)
+    db_session.commit()
+    return document
+
+
+@pytest.fixture
+def client(login, document):
+    return login("prof@test.fr")
+
+
+@pytest.mark.no_db
+def test_course_split_and_question_share():
+    assert [len(p.split()) for p in split_course(COURSE, 40)] == [30, 30, 30]
+    assert split_course(COURSE, 1000) == [COURSE]
+    assert generation.split_questions(30, [30, 30, 30]) == [10, 10, 10]
+    assert sum(generation.split_questions(40, [700, 200, 100])) == 40
+
+
+def test_job_streams_progress_until_done(client, document, db_session, monkeypatch):
+    generate, calls = fake_llm()
+    monkeypatch.setattr(generation, "generate_quiz_from_text", generate)
+
+    response = client.post(f"/api/quizzes/jobs?document_id={document.id}")
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job["status"] == "queued"
+
+    stream = client.get(job["events_url"])
+    assert stream.mimetype == "text/event-stream"
+    states = [json.loads(line[6:]) for line in stream.get_data(as_text=True).splitlines() if line.startswith("data: ")]
+    # Chaque message est une étape plus avancée que la précédente, jusqu'à la fin
+    progress = [(s["chunks_done"], s["questions"]) for s in states]
+    assert progress == sorted(progress)
+    assert states[-1] == {
+        "id": job["id"], "status": "done", "chunks_done": 3, "chunks_total": 3, "questions": 30, "error": None,
+    }
+    assert calls == [10, 10, 10]
+    assert db_session.query(Question).filter_by(document_id=document.id).count() == 30
+
+    # Flux d'une génération terminée : l'état final, puis fin du flux
+    assert client.get(job["events_url"]).get_data(as_text=True).count("data: ") == 1
+
+
+def test_failed_job_keeps_no_questions_nor_quota(document, db_session, monkeypatch):
+    generate, _ = fake_llm(fail_on_call=2)
+    monkeypatch.setattr(generation, "generate_quiz_from_text", generate)
+    reserve_generation(db_session, document.user_id)
+    job = generation.create_job(db_session, document.user_id, document.id, date.today())
+    db_session.commit()
+
+    generation.run_job(job.id)
+
+    db_session.expire_all()
+    job = db_session.get(GenerationJob, job.id)
+    assert (job.status, job.chunks_done, job.error) == ("failed", 1, generation.ERROR_MESSAGES["quota_exceeded"])
+    assert db_session.query(Question).filter_by(document_id=document.id).count() == 0
+    assert generations_today(db_session, document.user_id) == 0
+
+
+def test_questions_hidden_until_done(document, db_session, monkeypatch):
+    generate, calls = fake_llm()
+    visible = []
+
+    def generate_and_look(text, total_questions):
+        visible.append(db_session.query(Question).filter_by(document_id=document.id).count())
+        return generate(text, total_questions)
+
+    monkeypatch.setattr(generation, "generate_quiz_from_text", generate_and_look)
+    job = generation.create_job(db_session, document.user_id, document.id, date.today())
+    db_session.commit()
+
+    generation.run_job(job.id)
+
+    # Parties déjà générées mises de côté : rien de jouable avant la fin
+    assert visible == [0, 0, 0]
+    db_session.expire_all()
+    assert db_session.query(Question).filter_by(document_id=document.id).count() == 30
+    assert db_session.get(GenerationJob, job.id).staged_questions == []
+
+
+def test_job_declared_failed_mid_run_writes_nothing(document, db_session, monkeypatch):
+    generate, calls = fake_llm()
+    reserve_generation(db_session, document.user_id)
+    job = generation.create_job(db_session, document.user_id, document.id, date.today())
+    db_session.commit()
+
+    def generate_then_expire(text, total_questions):
+        # Pendant l'appel au modèle, une autre requête déclare la génération échouée (active_job)
+        if len(calls) == 1:
+            db_session.query(GenerationJob).update({"updated_at": GenerationJob.updated_at - timedelta(hours=1)})
+            db_session.commit()
+            assert generation.active_job(db_session, document.id) is None
+            db_session.commit()
+        return generate(text, total_questions)
+
+    monkeypatch.setattr(generation, "generate_quiz_from_text", generate_then_expire)
+
+    generation.run_job(job.id)
+
+    db_session.expire_all()
+    job = db_session.get(GenerationJob, job.id)
+    assert (job.status, job.chunks_done, job.staged_questions) == ("failed", 1, [])
+    assert db_session.query(Question).filter_by(document_id=document.id).count() == 0
+    assert generations_today(db_session, document.user_id) == 0
+
+
+def test_one_active_job_per_document(client, document, db_session, monkeypatch):
+    started = []
+    monkeypatch.setattr(generation, "start", started.append)
+
+    first = client.post(f"/api/quizzes/jobs?document_id={document.id}").get_json()
+    second = client.post(f"/api/quizzes/jobs?document_id={document.id}").get_json()
+    assert second["id"] == first["id"] and started == [first["id"]]
+    assert generations_today(db_session, document.user_id) == 1
+    # Ni génération synchrone par-dessus : ses questions seraient mêlées à celles mises de côté
+    assert client.post(f"/api/quizzes/generate?document_id={document.id}").status_code == 409
+
+    # Génération abandonnée (worker arrêté) : déclarée échouée, une nouvelle peut partir
+    db_session.query(GenerationJob).update({"updated_at": GenerationJob.updated_at - timedelta(hours=1)})
+    db_session.commit()
+    third = client.post(f"/api/quizzes/jobs?document_id={document.id}").get_json()
+    assert third["id"] != first["id"] and started == [first["id"], third["id"]]
+    assert db_session.get(GenerationJob, first["id"]).status == "failed"
+
+
+def test_worker_stream_places_are_capped(client, document, monkeypatch):
+    monkeypatch.setattr(generation, "start", lambda job_id: None)
+    monkeypatch.setattr(notify, "_streams", threading.BoundedSemaphore(1))
+    job = client.post(f"/api/quizzes/jobs?document_id={document.id}").get_json()
+
+    # Places de flux du worker prises (classement, autre génération) : 204, le client interroge
+    assert notify.acquire_stream()
+    assert client.get(job["events_url"]).status_code == 204
+    assert client.get(f"/api/quizzes/jobs/{job['id']}").get_json()["status"] == "queued"
+    notify.release_stream()
+
+    # Flux servi : sa place est rendue à sa fermeture
+    client.get(job["events_url"], buffered=False).close()
+    assert notify.acquire_stream()
+    notify.release_stream()
+
+
+def test_fanout_relays_job_progress(client, document, db_session, full_app, fanout_get, monkeypatch):
+    generate, _ = fake_llm()
+    monkeypatch.setattr(generation, "generate_quiz_from_text", generate)
+    monkeypatch.setattr(generation, "start", lambda job_id: None)
+    monkeypatch.setattr(fanout, "FANOUT_URL", "http://diffusion")
+
+    # Processus de diffusion déployé : la réponse pointe vers lui, avec un jeton de la génération
+    job = client.post(f"/api/quizzes/jobs?document_id={document.id}").get_json()
+    prefix = f"http://diffusion/jobs/{job['id']}/events?token="
+    assert job["events_url"].startswith(prefix)
+    assert fanout.read_token(full_app.secret_key, job["events_url"][len(prefix):], fanout.JOB_TOKEN_SALT)["job"] == job["id"]
+
+    path = f"/jobs/{job['id']}/events"
+    other = fanout.job_token("test", "autre-generation")
+    event_token = fanout.stream_token("test", job["id"], db_session.get(GenerationJob, job["id"]).created_at)
+    assert fanout_get(f"{path}?token={other}").readline().startswith(b"HTTP/1.1 403")
+    assert fanout_get(f"{path}?token={event_token}").readline().startswith(b"HTTP/1.1 403")
+
+    stream = fanout_get(f"{path}?token={fanout.job_token('test', job['id'])}")
+    assert stream.readline().startswith(b"HTTP/1.1 200")
+    lines = iter(stream.readline, b"")
+    assert ": connecté\n".encode() in lines  # en-têtes, puis abonné
+
+    generation.run_job(job["id"])
+
+    # Une étape par message, flux fermé par le processus après l'état final
+    states = [json.loads(line[6:]) for line in lines if line.startswith(b"data: ")]
+    assert [s["status"] for s in states] == ["running", "running", "running", "running", "done"]
+    assert states[-1]["questions"] == 30 and "key" not in states[-1]
+    stream.close()
@@ -0,0 +1,230 @@
+# tests/test_leaderboard.py
+"""
+Classement des événements (app/leaderboard.py) : rangs calculés sur une tranche
+autour de l'utilisateur, comparés à un classement complet calculé en Python ;
+soumission concurrente d'un même quiz ; participations publiées en direct (NOTIFY, flux
+SSE du classement servi par un worker ou par le processus de diffusion app/fanout.py).
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import json
+import random
+import threading
+from datetime import datetime, timedelta
+import pytest
+
+from app import fanout, notify
+from app.models import (
+    User, Subject, Group, Event, EventLeaderboard, EventParticipation, EventQuiz, generate_invite_code,
+)
+from sqlalchemy import event as sa_event
+from app.db import SessionLocal, engine
+from app.leaderboard import CHANNEL, leaderboard_page, publish_participation, record_participation
+from app.routes import events as events_routes
+from app.routes.events import _group_events_for_user
+
+
+@pytest.fixture
+def event_with_scores(db_session):
+    owner = User(username="owner", email="owner@test.fr", password_hash="x")
+    db_session.add(owner)
+    db_session.flush()
+    subject = Subject(name="Histoire", color="#000000", user_id=owner.id)
+    group = Group(name="Classe", owner_id=owner.id, invite_code=generate_invite_code())
+    db_session.add_all([subject, group])
+    db_session.flush()
+    event = Event(
+        name="Défi", group_id=group.id, subject_id=subject.id,
+        start_date=datetime.now() - timedelta(days=1), end_date=datetime.now() + timedelta(days=1),
+    )
+    db_session.add(event)
+    db_session.flush()
+
+    rng = random.Random(42)
+    users = [User(username=f"u{i}", email=f"u{i}@test.fr", password_hash="x") for i in range(40)]
+    db_session.add_all(users)
+    db_session.flush()
+    for user in users:
+        # Peu de valeurs distinctes → beaucoup d'égalités
+        for _ in range(rng.randint(1, 2)):
+            record_participation(db_session, event.id, user.id, rng.randint(5, 8), 20, rng.choice([60, 90]))
+    db_session.commit()
+    return event, users
+
+
+def expected_ranks(db_session, event_id):
+    rows = db_session.query(EventLeaderboard).filter_by(event_id=event_id).all()
+    return {
+        r.user_id: 1 + sum(
+            1 for o in rows
+            if (o.total_correct, -o.total_time) > (r.total_correct, -r.total_time)
+        )
+        for r in rows
+    }
+
+
+def test_ranks_match_full_ranking(db_session, event_with_scores):
+    event, users = event_with_scores
+    expected = expected_ranks(db_session, event.id)
+    for user in users:
+        page = leaderboard_page(db_session, event.id, user.id, window=3)
+        assert page["total_participants"] == len(users)
+        assert page["me"]["rank"] == expected[user.id]
+        for row in page["podium"] + page["rows"]:
+            assert row["rank"] == expected[row["user"]["id"]]
+        assert len(page["rows"]) <= 7
+
+
+def test_page_without_participation_starts_at_top(db_session, event_with_scores):
+    event, users = event_with_scores
+    page = leaderboard_page(db_session, event.id, event.group.owner_id, window=3)
+    assert page["me"] is None and page["podium"] == []
+    assert [r["rank"] for r in page["rows"]][0] == 1
+    assert page["has_more_below"]
+
+
+def test_group_events_list_is_one_query(db_session, event_with_scores):
+    event, users = event_with_scores
+    for i in range(5):
+        db_session.add(Event(
+            name=f"Défi {i}", group_id=event.group_id, subject_id=event.subject_id,
+            start_date=datetime.now() + timedelta(days=i), end_date=datetime.now() + timedelta(days=i + 1),
+        ))
+    db_session.commit()
+    db_session.expunge_all()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    sa_event.listen(engine, "before_cursor_execute", listener)
+    try:
+        events = _group_events_for_user(db_session, event.group_id, users[0].id).items
+        subjects = [e.subject.name for e in events]
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert len(events) == 6 and subjects == ["Histoire"] * 6
+    played = next(e for e in events if e.id == event.id)
+    assert played.participants_count == len(users)
+    assert played.status_label == "En cours" and played.user_progress >= 1
+
+
+def _participate(db_session, event_id, user_id, correct, total, time_spent):
+    record_participation(db_session, event_id, user_id, correct, total, time_spent)
+    publish_participation(db_session, event_id, user_id, correct, total, time_spent)
+
+
+def test_participation_is_published_with_rank(db_session, event_with_scores):
+    event, users = event_with_scores
+    with notify.subscribe(CHANNEL, event.id) as messages:
+        _participate(db_session, event.id, users[0].id, 12, 20, 30)
+        db_session.rollback()  # transaction annulée : rien n'est publié
+        _participate(db_session, event.id, users[0].id, 12, 20, 30)
+        db_session.commit()
+        delta = messages.get(timeout=5)
+        assert messages.empty()
+
+    row = db_session.get(EventLeaderboard, (event.id, users[0].id))
+    assert delta["user_id"] == users[0].id and delta["username"] == "u0"
+    assert (delta["total_correct"], delta["total_time"], delta["quiz_count"]) == (row.total_correct, row.total_time, row.quiz_count)
+    assert delta["gained"] == {"correct": 12, "questions": 20, "time": 30}
+    assert delta["rank"] == expected_ranks(db_session, event.id)[users[0].id] == 1
+    assert delta["total_participants"] == len(users)
+
+
+def test_leaderboard_stream(db_session, event_with_scores, full_app, monkeypatch):
+    event, users = event_with_scores
+    monkeypatch.setattr(notify, "_streams", threading.BoundedSemaphore(1))
+    client = full_app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session["_user_id"] = event.group.owner_id
+    response = client.get(f"/events/{event.id}/leaderboard/stream", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b":")  # abonné
+
+    _participate(db_session, event.id, users[1].id, 20, 20, 10)
+    db_session.commit()
+    delta = json.loads(next(chunks).decode().removeprefix("data: "))
+    assert delta["user_id"] == users[1].id and delta["rank"] == 1 and "key" not in delta
+
+    # Places de flux du worker épuisées : 204, la page reste statique
+    assert client.get(f"/events/{event.id}/leaderboard/stream").status_code == 204
+    response.close()
+    assert notify.acquire_stream()
+    notify.release_stream()
+
+
+def test_concurrent_submit_is_rejected_cleanly(db_session, event_with_scores, full_app, monkeypatch, caplog):
+    event, _ = event_with_scores
+    quiz = EventQuiz(event_id=event.id, quiz_number=1)
+    db_session.add(quiz)
+    db_session.commit()
+    owner_id = event.group.owner_id
+
+    def questions_after_other_tab(session, quiz_id):
+        # Second onglet : sa participation est enregistrée après la vérification de celui-ci
+        other = SessionLocal()
+        other.add(EventParticipation(
+            event_id=event.id, quiz_id=quiz_id, user_id=owner_id, correct_count=0, total_questions=0,
+        ))
+        other.commit()
+        other.close()
+        return []
+
+    monkeypatch.setattr(events_routes, "event_quiz_questions", questions_after_other_tab)
+    client = full_app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session["_user_id"] = owner_id
+    response = client.post(f"/events/{event.id}/submit/1", json={"answers": {}, "time_spent": 5})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Quiz déjà complété"}
+    assert db_session.query(EventParticipation).filter_by(user_id=owner_id).count() == 1
+    # Lot interrompu par la violation : pipeline refermé sans erreur ignorée
+    assert not [r for r in caplog.records if r.name == "psycopg"]
+
+
+def test_submit_returns_connection_out_of_pipeline_mode(db_session, event_with_scores, full_app, monkeypatch,
+                                                         pool_after_pipeline):
+    event, _ = event_with_scores
+    db_session.add(EventQuiz(event_id=event.id, quiz_number=1))
+    db_session.commit()
+    owner_id = event.group.owner_id
+    monkeypatch.setattr(events_routes, "event_quiz_questions", lambda session, quiz_id: [])
+    checks = pool_after_pipeline(events_routes)
+
+    client = full_app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session["_user_id"] = owner_id
+    response = client.post(f"/events/{event.id}/submit/1", json={"answers": {}, "time_spent": 5})
+    assert response.status_code == 200
+    # Connexions du pool utilisables par une autre requête dès la fin du lot
+    assert checks == [True]
+    assert db_session.query(EventParticipation).filter_by(user_id=owner_id).count() == 1
+
+
+def test_fanout_relays_participations(db_session, event_with_scores, fanout_get):
+    event, users = event_with_scores
+    path = f"/events/{event.id}/leaderboard/stream"
+    other = fanout.stream_token("test", "autre-evenement", event.end_date)
+    assert fanout_get(f"{path}?token={other}").readline().startswith(b"HTTP/1.1 403")
+    assert fanout_get(f"{path}?token=falsifie").readline().startswith(b"HTTP/1.1 403")
+
+    stream = fanout_get(f"{path}?token={fanout.stream_token('test', event.id, event.end_date)}")
+    assert stream.readline().startswith(b"HTTP/1.1 200")
+    lines = iter(stream.readline, b"")
+    assert ": connecté\n".encode() in lines  # en-têtes, puis abonné
+
+    _participate(db_session, event.id, users[2].id, 20, 20, 5)
+    db_session.commit()
+    data = next(line for line in lines if line.startswith(b"data: "))
+    delta = json.loads(data[6:])
+    assert delta["user_id"] == users[2].id and delta["rank"] == 1 and "key" not in delta
+    stream.close()
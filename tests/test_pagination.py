@@ -0,0 +1,77 @@
+# tests/test_pagination.py
+"""
+Pagination par curseur (app/pagination.py) : parcours complet sans doublon ni trou,
+y compris avec des dates égales, et curseurs invalides.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from datetime import datetime, timedelta
+import pytest
+from app.models import User, Document, new_id
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor, page_size, paginate
+
+KEY = (Document.created_at, Document.id)
+
+
+@pytest.fixture
+def documents(db_session):
+    user = User(username="pages", email="pages@test.fr", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    base = datetime(2026, 1, 1)
+    # Trois cours par date : les égalités sont départagées par l'id
+    docs = [
+        Document(title=f"Cours {i}", content="x", user_id=user.id, created_at=base + timedelta(days=i // 3))
+        for i in range(25)
+    ]
+    db_session.add_all(docs)
+    db_session.commit()
+    return user, docs
+
+
+def test_pages_cover_list_once_in_order(db_session, documents):
+    user, docs = documents
+    query = db_session.query(Document).filter_by(user_id=user.id)
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = paginate(query, KEY, cursor, limit=7)
+        seen.extend(page.items)
+        pages += 1
+        if not page.has_more:
+            break
+        cursor = page.next_cursor
+
+    assert pages == 4
+    assert [d.id for d in seen] == [d.id for d in sorted(docs, key=lambda d: (d.created_at, d.id), reverse=True)]
+
+
+def test_exact_last_page_has_no_cursor(db_session, documents):
+    user, _ = documents
+    page = paginate(db_session.query(Document).filter_by(user_id=user.id), KEY, limit=25)
+    assert len(page.items) == 25 and page.next_cursor is None
+
+
+def test_cursor_round_trip_and_invalid_cursors():
+    now = datetime(2026, 10, 19, 8, 30)
+    doc_id = new_id()
+    assert decode_cursor(encode_cursor((now, doc_id)), KEY) == (now, doc_id)
+    for bad in (
+        "%%%", encode_cursor((doc_id,)), encode_cursor(("pas une date", doc_id)),
+        encode_cursor((now, "pas un uuid")),  # refusé avant d'atteindre la colonne uuid
+    ):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(bad, KEY)
+
+
+def test_page_size_bounds():
+    assert page_size(None) == 20
+    assert page_size("5") == 5
+    assert page_size("0") == 1
+    assert page_size("10000") == 100
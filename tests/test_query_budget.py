@@ -0,0 +1,79 @@
+# tests/test_query_budget.py
+"""
+Budget de requêtes SQL par route (fixture query_budget, app/querystats.py) :
+le nombre de requêtes des pages de liste ne doit pas dépendre du nombre de lignes affichées.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from datetime import datetime, timedelta
+import pytest
+
+from app.counters import adjust_document_count, adjust_member_count
+from app.models import (
+    User, Subject, Document, Group, GroupMember, GroupSubject, Event, generate_invite_code,
+)
+from app.querystats import track_queries
+
+ROWS = 8
+
+
+@pytest.fixture
+def seeded(db_session):
+    """Un utilisateur avec ROWS matières, cours, groupes et événements."""
+    user = User(username="budget", email="budget@test.fr")
+    user.set_password("pw")
+    db_session.add(user)
+    db_session.flush()
+    subjects = [Subject(name=f"Matière {i}", user_id=user.id) for i in range(ROWS)]
+    groups = [Group(name=f"Groupe {i}", owner_id=user.id, invite_code=generate_invite_code()) for i in range(ROWS)]
+    db_session.add_all(subjects + groups)
+    db_session.flush()
+    for subject, group in zip(subjects, groups):
+        db_session.add(Document(title="Cours", content="x", user_id=user.id, subject_id=subject.id))
+        adjust_document_count(db_session, subject.id, 1)
+        db_session.add(GroupMember(group_id=group.id, user_id=user.id))
+        adjust_member_count(db_session, group.id, 1)
+        db_session.add(GroupSubject(group_id=groups[0].id, subject_id=subject.id))
+        db_session.add(Event(
+            name=f"Défi {subject.name}", group_id=groups[0].id, subject_id=subject.id,
+            start_date=datetime.now() - timedelta(days=1), end_date=datetime.now() + timedelta(days=1),
+        ))
+    db_session.commit()
+    return user, groups[0]
+
+
+@pytest.fixture
+def logged_in(full_app, login, seeded, monkeypatch):
+    monkeypatch.setitem(full_app.config, "SQL_STATS_HEADER", True)
+    # Budgets mesurés cache d'identité vide : load_user compte pour une requête
+    return login("budget@test.fr"), seeded[1]
+
+
+@pytest.mark.parametrize("path, budget", [
+    ("/groups/", 3),
+    ("/api/subjects", 2),
+    ("/documents", 5),
+    ("/groups/{group}", 5),
+    ("/events/group/{group}", 3),
+])
+def test_routes_stay_within_budget(logged_in, query_budget, path, budget):
+    client, group = logged_in
+    with query_budget(budget):
+        assert client.get(path.format(group=group.id)).status_code == 200
+
+
+def test_stats_headers_and_nested_tracking(logged_in):
+    client, _ = logged_in
+    with track_queries() as outer:
+        with track_queries() as inner:
+            response = client.get("/api/subjects")
+    assert inner.count == outer.count == int(response.headers["X-DB-Queries"])
+    assert inner.slowest_statement is not None
+    assert "db;dur=" in response.headers["Server-Timing"]
@@ -0,0 +1,118 @@
+# tests/test_query_plans.py
+"""
+Vérifie via EXPLAIN que les requêtes chaudes utilisent un index.
+
+On désactive les Seq Scan (enable_seqscan = off) le temps de la transaction :
+si le planner en choisit malgré tout un, c'est qu'aucun index ne couvre le filtre.
+Le test échoue alors, avant que la régression n'arrive en production.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import uuid
+from datetime import date, datetime
+import pytest
+from sqlalchemy import and_, func, literal_column, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from app.models import (
+    Document, Event, Question, Result, QuizSession, GenerationQuota, EventParticipation, GroupMember,
+    EventQuizQuestion, EventAnswer, EventLeaderboard, UserQuestionStat,
+)
+
+USER_ID = str(uuid.uuid4())
+DOC_ID = str(uuid.uuid4())
+
+
+def _seq_scans(plan, found=None):
+    """Parcourt récursivement un plan EXPLAIN (FORMAT JSON) et liste les tables lues en Seq Scan."""
+    found = [] if found is None else found
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        _seq_scans(child, found)
+    return found
+
+
+def explain(session, stmt):
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    session.rollback()
+    return plan[0]["Plan"]
+
+
+HOT_QUERIES = {
+    "questions_by_document": select(Question).where(Question.document_id == DOC_ID),
+    "results_by_quiz_session": select(Result).where(Result.quiz_session_id == str(uuid.uuid4())),
+    "quiz_sessions_history": (
+        select(QuizSession)
+        .where(QuizSession.user_id == USER_ID, QuizSession.document_id == DOC_ID)
+        .order_by(QuizSession.played_at.asc())
+    ),
+    "event_progress": select(EventParticipation).where(
+        EventParticipation.event_id == str(uuid.uuid4()),
+        EventParticipation.user_id == USER_ID,
+    ),
+    "group_membership": select(GroupMember).where(
+        GroupMember.group_id == str(uuid.uuid4()),
+        GroupMember.user_id == USER_ID,
+    ),
+    "question_in_event": select(EventQuizQuestion).where(
+        EventQuizQuestion.question_id == str(uuid.uuid4()),
+    ),
+    "event_question_stats": select(EventAnswer).where(
+        EventAnswer.event_id == str(uuid.uuid4()),
+    ),
+    "leaderboard_slice": (
+        select(EventLeaderboard)
+        .where(
+            EventLeaderboard.event_id == str(uuid.uuid4()),
+            tuple_(-EventLeaderboard.total_correct, EventLeaderboard.total_time, EventLeaderboard.user_id)
+            < tuple_(-10, 300, USER_ID),
+        )
+        .order_by(-EventLeaderboard.total_correct, EventLeaderboard.total_time, EventLeaderboard.user_id)
+        .limit(10)
+    ),
+    "documents_page": (
+        select(Document)
+        .where(Document.user_id == USER_ID, tuple_(Document.created_at, Document.id) < tuple_(datetime(2026, 1, 1), DOC_ID))
+        .order_by(Document.created_at.desc(), Document.id.desc())
+        .limit(20)
+    ),
+    "group_events_page": (
+        select(Event)
+        .where(Event.group_id == str(uuid.uuid4()), tuple_(Event.start_date, Event.id) < tuple_(datetime(2026, 1, 1), DOC_ID))
+        .order_by(Event.start_date.desc(), Event.id.desc())
+        .limit(20)
+    ),
+    "full_text_search": select(Document.id).where(
+        Document.search_vector.op("@@")(func.websearch_to_tsquery(literal_column("'fr_unaccent'::regconfig"), "révolution"))
+    ),
+    "question_sample": (
+        select(Question.id)
+        .where(Question.document_id == DOC_ID, Question.rand_key >= 0.5)
+        .order_by(Question.rand_key)
+        .limit(20)
+    ),
+    "quiz_question_pick": (
+        select(Question)
+        .outerjoin(UserQuestionStat, and_(UserQuestionStat.question_id == Question.id, UserQuestionStat.user_id == USER_ID))
+        .where(Question.document_id == DOC_ID)
+    ),
+    "daily_quota": select(GenerationQuota).where(
+        GenerationQuota.user_id == USER_ID,
+        GenerationQuota.day == date.today(),
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_index(db_session, name):
+    plan = explain(db_session, HOT_QUERIES[name])
+    assert _seq_scans(plan) == [], f"{name} : Seq Scan détecté → index manquant"
@@ -0,0 +1,97 @@
+# tests/test_question_cache.py
+"""
+Jeux de questions en cache (app/question_sets.py) : servis sans requête une fois chargés,
+retirés à l'ajout d'une question ou à la suppression du cours, relus s'il manque une question.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from datetime import datetime, timedelta
+import pytest
+from app.models import (
+    User, Group, Subject, Document, Question, QuestionType, Event, EventQuiz, EventQuizQuestion,
+    generate_invite_code,
+)
+from app.question_sets import CachedQuestion, document_questions, event_quiz_questions, question_cache
+
+
+@pytest.fixture
+def course(db_session):
+    question_cache.clear()
+    user = User(username="cache", email="cache@test.fr", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    document = Document(title="Cours", content="x", user_id=user.id)
+    db_session.add(document)
+    db_session.flush()
+    questions = [
+        Question(document_id=document.id, type=QuestionType.qcm, question=f"Q{i}",
+                 choices=["A", "B"], answer=" A ")
+        for i in range(3)
+    ]
+    db_session.add_all(questions)
+    db_session.commit()
+    return user, document, questions
+
+
+def test_document_set_is_served_from_cache(db_session, course, query_budget):
+    _, document, questions = course
+    first = document_questions(db_session, document.id)
+    assert {q.id for q in first} == {q.id for q in questions}
+    assert first[0].choices == ("A", "B")
+    assert first[0].is_correct("a") and not first[0].is_correct("B")
+
+    with query_budget(0):
+        assert document_questions(db_session, document.id) is first
+
+
+def test_new_question_and_deleted_document_invalidate(db_session, course):
+    _, document, questions = course
+    document_questions(db_session, document.id)
+
+    added = Question(document_id=document.id, type=QuestionType.ouverte, question="Q+", answer="r")
+    db_session.add(added)
+    db_session.commit()
+    assert added.id in {q.id for q in document_questions(db_session, document.id)}
+
+    db_session.delete(document)
+    db_session.commit()
+    assert question_cache.get(("document", document.id)) is None
+    assert document_questions(db_session, document.id) == ()
+
+
+def test_missing_question_reloads_stale_set(db_session, course):
+    _, document, questions = course
+    # Jeu chargé par un autre worker avant la génération de la dernière question
+    question_cache.set(("document", document.id), (CachedQuestion.from_model(questions[0]),))
+
+    reloaded = document_questions(db_session, document.id, [questions[-1].id])
+    assert {q.id for q in reloaded} == {q.id for q in questions}
+
+
+def test_event_quiz_set_keeps_quiz_order(db_session, course):
+    user, document, questions = course
+    subject = Subject(name="Maths", user_id=user.id)
+    group = Group(name="Classe", owner_id=user.id, invite_code=generate_invite_code())
+    db_session.add_all([subject, group])
+    db_session.flush()
+    now = datetime.now()
+    event = Event(name="Défi", group_id=group.id, subject_id=subject.id,
+                  start_date=now, end_date=now + timedelta(days=1))
+    db_session.add(event)
+    db_session.flush()
+    quiz = EventQuiz(event_id=event.id, quiz_number=1)
+    quiz.question_links = [
+        EventQuizQuestion(position=position, question_id=q.id)
+        for position, q in enumerate(reversed(questions), 1)
+    ]
+    db_session.add(quiz)
+    db_session.commit()
+
+    assert [q.id for q in event_quiz_questions(db_session, quiz.id)] == [q.id for q in reversed(questions)]
@@ -0,0 +1,80 @@
+# tests/test_quota.py
+"""
+Quota journalier de générations (app/quota.py) : réservation atomique,
+annulation, tokens et cumul mensuel des anciens compteurs.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import pytest
+from app.db import SessionLocal
+from app.models import User, GenerationQuota, GenerationUsageMonthly
+from app.quota import (
+    generations_today, reserve_generation, release_generation, record_tokens, rollup_quotas,
+)
+
+
+@pytest.fixture
+def user_id(db_session):
+    user = User(username="quota", email="quota@test.fr", password_hash="x")
+    db_session.add(user)
+    db_session.commit()
+    return user.id
+
+
+def test_reserve_stops_at_limit(db_session, user_id):
+    assert [reserve_generation(db_session, user_id, limit=2) for _ in range(3)] == [1, 2, None]
+    db_session.commit()
+    assert generations_today(db_session, user_id) == 2
+
+
+def test_concurrent_reservations_never_exceed_limit(user_id):
+    def reserve(_):
+        session = SessionLocal()
+        try:
+            result = reserve_generation(session, user_id, limit=3)
+            session.commit()
+            return result
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(reserve, range(8)))
+    assert sorted(r for r in results if r is not None) == [1, 2, 3]
+
+
+def test_release_and_tokens(db_session, user_id):
+    today = date.today()
+    reserve_generation(db_session, user_id, day=today)
+    record_tokens(db_session, user_id, today, 1200)
+    reserve_generation(db_session, user_id, day=today)
+    release_generation(db_session, user_id, today)
+    db_session.commit()
+    quota = db_session.get(GenerationQuota, (user_id, today))
+    db_session.refresh(quota)
+    assert (quota.generations, quota.tokens) == (1, 1200)
+
+
+def test_rollup_moves_old_days_to_month(db_session, user_id):
+    old = date.today() - timedelta(days=200)
+    old = old.replace(day=1)
+    for offset in (0, 1):
+        reserve_generation(db_session, user_id, day=old + timedelta(days=offset))
+        record_tokens(db_session, user_id, old + timedelta(days=offset), 10)
+    reserve_generation(db_session, user_id)
+    db_session.commit()
+
+    assert rollup_quotas(db_session, keep_days=90) == 1
+    db_session.commit()
+
+    assert db_session.query(GenerationQuota).count() == 1
+    monthly = db_session.get(GenerationUsageMonthly, (user_id, old))
+    assert (monthly.generations, monthly.tokens) == (2, 20)
@@ -0,0 +1,111 @@
+# tests/test_ratelimit.py
+"""
+Rate limiting (app/ratelimit.py) : stockage PostgreSQL partagé entre instances (workers),
+exact sous accès concurrents, fenêtre remise à zéro à l'expiration ; clés par compte et
+plafonds relevés pour les réseaux NAT d'établissement.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import ipaddress
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from flask_login import login_user
+from sqlalchemy import func
+from app import db, ratelimit
+from app.models import RateLimit
+from app.ratelimit import PostgresStorage, purge_expired_limits
+from app.routes.auth import CachedUser
+
+
+@pytest.fixture
+def workers():
+    """Deux stockages indépendants sur la même base, comme deux workers gunicorn."""
+    storages = [storage_from_string(db.DATABASE_URL) for _ in range(2)]
+    yield storages
+    for storage in storages:
+        storage.engine.dispose()
+
+
+def test_counters_are_shared_and_exact(workers):
+    first, second = workers
+    assert isinstance(first, PostgresStorage) and first.check()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: workers[i % 2].incr("k", 60), range(40)))
+    assert first.get("k") == second.get("k") == 40
+    assert time.time() + 55 < second.get_expiry("k") <= time.time() + 60
+
+    limiter = FixedWindowRateLimiter(second)
+    limit = parse("2/minute")
+    assert [limiter.hit(limit, "eleve") for _ in range(3)] == [True, True, False]
+
+
+def test_expired_window_restarts(workers, db_session):
+    storage, _ = workers
+    storage.incr("k", 60, amount=5)
+    db_session.query(RateLimit).update({"expires_at": func.localtimestamp() - timedelta(seconds=1)})
+    db_session.commit()
+
+    assert storage.get("k") == 0
+    assert purge_expired_limits(db_session) == 1
+    db_session.commit()
+    assert storage.incr("k", 60) == 1
+
+    storage.clear("k")
+    assert storage.get("k") == 0
+
+
+# --- Clés et limites des routes ---
+@pytest.fixture
+def limited_app(full_app, monkeypatch):
+    from app.extensions import limiter
+
+    monkeypatch.setattr(ratelimit, "NAT_RANGES", [ipaddress.ip_network("203.0.113.0/24")])
+    monkeypatch.setattr(limiter, "enabled", True)
+    limiter.reset()
+    yield full_app
+    limiter.reset()
+
+
+def _login(client, email, ip):
+    response = client.post(
+        "/auth/login", data={"email": email, "password": "x"}, environ_base={"REMOTE_ADDR": ip}
+    )
+    return response.status_code
+
+
+def test_login_is_limited_per_account_behind_one_ip(limited_app):
+    client = limited_app.test_client()
+    assert [_login(client, "a@test.fr", "198.51.100.7") for _ in range(6)] == [302] * 5 + [429]
+    # Même IP, autre élève : budget intact
+    assert _login(client, "b@test.fr", "198.51.100.7") == 302
+    assert client.get("/auth/login", environ_base={"REMOTE_ADDR": "198.51.100.7"}).status_code == 200
+
+
+def test_nat_ranges_raise_the_per_ip_ceiling(limited_app):
+    client = limited_app.test_client()
+    outside = [_login(client, f"e{i}@test.fr", "198.51.100.8") for i in range(31)]
+    assert outside[-1] == 429 and 429 not in outside[:30]
+    assert 429 not in [_login(client, f"e{i}@test.fr", "203.0.113.9") for i in range(31)]
+
+
+def test_default_limit_follows_the_account(limited_app):
+    user = CachedUser(id="u1", username="eleve", email="eleve@test.fr")
+    with limited_app.test_request_context(environ_base={"REMOTE_ADDR": "203.0.113.9"}):
+        assert ratelimit.user_or_ip_key() == "ip:203.0.113.9"
+        assert ratelimit.default_limit() == "1200 per 1 minute"
+        login_user(user)
+        assert ratelimit.user_or_ip_key() == "user:u1"
+        assert ratelimit.default_limit() == ratelimit.DEFAULT_LIMIT
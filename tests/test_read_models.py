@@ -0,0 +1,115 @@
+# tests/test_read_models.py
+"""
+Modèles de lecture en cache (app/read_models.py, app/cache.py) : droits sur un groupe,
+matières d'un utilisateur, métadonnées d'événement ; invalidation par les écritures,
+tier partagé PostgreSQL (table cache_entries) et compteurs de hits.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from datetime import datetime, timedelta
+import pytest
+from app import cache, db, metrics
+from app.cache import LayeredCache, PostgresStore, purge_expired
+from app.models import CacheEntry, Event, Group, GroupMember, Subject, User, generate_invite_code
+from app.read_models import (
+    GroupAccess, event_info, group_access, subjects_changed, user_subjects, events_cache,
+    group_access_cache, subjects_cache,
+)
+
+
+@pytest.fixture
+def group(db_session):
+    for c in (group_access_cache, subjects_cache, events_cache):
+        c.clear()
+    owner = User(username="prof", email="prof@test.fr", password_hash="x")
+    student = User(username="eleve", email="eleve@test.fr", password_hash="x")
+    db_session.add_all([owner, student])
+    db_session.flush()
+    group = Group(name="Classe", owner_id=owner.id, invite_code=generate_invite_code())
+    db_session.add(group)
+    db_session.commit()
+    return owner, student, group
+
+
+def test_group_access_is_cached_and_follows_membership(db_session, group, query_budget):
+    owner, student, group = group
+    assert group_access(db_session, group.id, owner.id) == GroupAccess(True, True, True)
+    assert group_access(db_session, group.id, student.id) == GroupAccess(True, False, False)
+    with query_budget(0):
+        assert not group_access(db_session, group.id, student.id).is_member
+
+    # Adhésion puis départ : l'entrée est retirée à chaque écriture
+    membership = GroupMember(group_id=group.id, user_id=student.id)
+    db_session.add(membership)
+    db_session.commit()
+    assert group_access(db_session, group.id, student.id).is_member
+    db_session.delete(membership)
+    db_session.commit()
+    assert not group_access(db_session, group.id, student.id).is_member
+
+
+def test_subjects_invalidated_by_writes(db_session, group):
+    owner, _, _ = group
+    assert user_subjects(db_session, owner.id) == []
+    subject = Subject(name="Maths", user_id=owner.id)
+    db_session.add(subject)
+    db_session.commit()
+    assert [s["name"] for s in user_subjects(db_session, owner.id)] == ["Maths"]
+
+    # Compteur modifié par UPDATE (sans événement du mapper) : invalidation explicite
+    db_session.query(Subject).filter_by(id=subject.id).update({"document_count": 3})
+    subjects_changed(db_session, owner.id)
+    db_session.commit()
+    assert user_subjects(db_session, owner.id)[0]["document_count"] == 3
+
+
+def test_event_info_and_hit_metrics(db_session, group):
+    owner, _, group = group
+    subject = Subject(name="Maths", user_id=owner.id)
+    db_session.add(subject)
+    db_session.flush()
+    now = datetime.now()
+    event = Event(name="Défi", group_id=group.id, subject_id=subject.id,
+                  start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1))
+    db_session.add(event)
+    db_session.commit()
+
+    hits = metrics.CACHE_REQUESTS.values.get(("events", "local"), 0)
+    assert event_info(db_session, event.id).get_status() == "active"
+    assert event_info(db_session, event.id).group_id == group.id
+    assert metrics.CACHE_REQUESTS.values[("events", "local")] == hits + 1
+    assert 'revisia_cache_requests_total{pid="' in metrics.render()
+
+    db_session.delete(event)
+    db_session.commit()
+    assert event_info(db_session, event.id) is None
+
+
+def test_postgres_shared_tier(db_session, monkeypatch):
+    store = PostgresStore(db.DATABASE_URL)
+    monkeypatch.setattr(cache, "store", store)
+    try:
+        # Deux workers : le second lit la valeur chargée par le premier dans le tier partagé
+        first, second = LayeredCache("test", ttl=60), LayeredCache("test", ttl=60)
+        assert first.get_or_load("k", lambda: GroupAccess(True, False, True)).is_member
+        assert second.get_or_load("k", lambda: pytest.fail("aurait dû venir du tier partagé")).is_member
+        assert metrics.CACHE_REQUESTS.values[("test", "shared")] >= 1
+
+        first.invalidate("k")
+        assert store.get("test:k") is None
+
+        # Entrée expirée : ignorée à la lecture, supprimée par purge-cache
+        store.set("test:old", "x", ttl=-1)
+        assert store.get("test:old") is None
+        assert purge_expired(db_session) == 1
+        db_session.commit()
+        assert db_session.query(CacheEntry).count() == 0
+    finally:
+        store.engine.dispose()
@@ -0,0 +1,107 @@
+# tests/test_replica_routing.py
+"""
+Routage lecture/écriture (app/db.py) : SELECT des routes @read_only vers un réplica,
+écritures sur le primaire, lectures sur le primaire juste après une écriture de l'utilisateur.
+Le « réplica » est ici un second engine vers la base de test.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import time
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.pool import NullPool
+
+from app import db
+from app.models import User, Subject
+from app.read_models import subjects_cache
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Engine « réplica » qui compte les requêtes reçues."""
+    replica_engine = create_engine(db.DATABASE_URL, poolclass=NullPool)
+    statements = []
+    event.listen(replica_engine, "before_cursor_execute", lambda conn, cursor, sql, *a: statements.append(sql))
+    monkeypatch.setattr(db, "replica_engines", [replica_engine])
+    yield statements
+    replica_engine.dispose()
+
+
+@pytest.fixture
+def client(db_session, login):
+    user = User(username="lecteur", email="lecteur@test.fr")
+    user.set_password("pw")
+    db_session.add(user)
+    db_session.commit()
+    return login("lecteur@test.fr")
+
+
+def test_get_bind_routes_selects_only(replica):
+    session = db.SessionLocal()
+    try:
+        session.info["read_only"] = True
+        assert session.get_bind(clause=select(User)) is db.replica_engines[0]
+        assert "wrote" not in session.info
+        # Verrou ou écriture : primaire, et la session est marquée comme ayant écrit
+        assert session.get_bind(clause=select(User).with_for_update()) is db.engine
+        assert session.get_bind(clause=insert(Subject)) is db.engine
+        assert session.info["wrote"] is True
+        # Sans marque de lecture seule, tout va au primaire
+        other = db.SessionLocal()
+        assert other.get_bind(clause=select(User)) is db.engine
+        other.close()
+    finally:
+        session.close()
+
+
+def test_read_only_routes_use_replica_until_own_write(client, replica, monkeypatch):
+    assert client.get("/api/subjects").status_code == 200
+    assert replica, "la liste des matières aurait dû être lue sur le réplica"
+
+    # Écriture de l'utilisateur : ses lectures restent sur le primaire pendant le délai
+    replica.clear()
+    assert client.post("/api/subjects", json={"name": "Chimie"}).status_code == 201
+    response = client.get("/api/subjects")
+    assert [s["name"] for s in response.get_json()] == ["Chimie"]
+    assert replica == []
+
+    # Délai écoulé : retour sur le réplica (liste hors du cache des matières)
+    with client.session_transaction() as flask_session:
+        flask_session[db.PRIMARY_UNTIL_KEY] = 0
+    subjects_cache.clear()
+    client.get("/api/subjects")
+    assert replica
+
+
+def test_write_routes_stay_on_primary(client, replica):
+    client.post("/api/subjects", json={"name": "Physique"})
+    assert replica == []
+
+
+def test_write_committed_at_end_of_request_keeps_reads_on_primary(db_session, replica):
+    user = User(username="auteur", email="auteur@test.fr", password_hash="x")
+    db_session.add(user)
+    db_session.commit()
+    app = Flask(__name__)
+    app.secret_key = "test"
+    db.init_db(app)
+
+    @app.post("/subjects")
+    def add_subject():
+        # Pas de commit dans la route : celui de fin de requête, avant l'envoi du cookie
+        db.get_db().add(Subject(name="Géographie", user_id=user.id))
+        return "", 204
+
+    client = app.test_client()
+    assert client.post("/subjects").status_code == 204
+    assert db_session.query(Subject).filter_by(name="Géographie").count() == 1
+    with client.session_transaction() as flask_session:
+        assert flask_session[db.PRIMARY_UNTIL_KEY] > time.time()
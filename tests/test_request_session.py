@@ -0,0 +1,65 @@
+# tests/test_request_session.py
+"""
+Session SQLAlchemy par requête (app.db.get_db / close_db) :
+une seule connexion empruntée au pool, commit ou rollback en fin de requête.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, select
+from app.db import engine, get_db, init_db
+from app.models import User
+
+
+@pytest.fixture
+def session_app():
+    app = Flask(__name__)
+    init_db(app)
+
+    @app.route("/twice")
+    def twice():
+        get_db().execute(select(1))
+        get_db().execute(select(1))
+        return "ok"
+
+    @app.route("/create/<name>")
+    def create(name):
+        get_db().add(User(username=name, email=f"{name}@test.fr", password_hash="x"))
+        if name == "boom":
+            raise RuntimeError("échec après l'ajout")
+        return "ok"
+
+    return app
+
+
+def test_single_checkout_per_request(session_app):
+    checkouts = []
+
+    def on_checkout(*args):
+        checkouts.append(1)
+
+    event.listen(engine, "checkout", on_checkout)
+    try:
+        assert session_app.test_client().get("/twice").status_code == 200
+    finally:
+        event.remove(engine, "checkout", on_checkout)
+    assert len(checkouts) == 1
+
+
+def test_pending_changes_committed_at_teardown(session_app, db_session):
+    session_app.test_client().get("/create/alice")
+    assert db_session.query(User).filter_by(username="alice").count() == 1
+
+
+def test_failed_request_rolled_back(session_app, db_session):
+    session_app.testing = False
+    session_app.test_client().get("/create/boom")
+    assert db_session.query(User).filter_by(username="boom").count() == 0
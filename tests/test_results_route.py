@@ -0,0 +1,114 @@
+# tests/test_results_route.py
+"""
+Enregistrement des résultats d'un quiz (/api/results/save) : écriture groupée,
+score recalculé côté serveur sur le jeu de questions en cache (un id inconnu envoyé par
+le client ne provoque pas de relecture), renvoi idempotent avec l'en-tête Idempotency-Key,
+connexion rendue au pool hors du mode pipeline.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import pytest
+
+from app.models import User, Document, Question, QuestionType, QuizSession, Result, UserQuestionStat, new_id
+from app.routes import results as results_routes
+
+
+@pytest.fixture
+def quiz(login, db_session):
+    user = User(username="eleve", email="eleve@test.fr")
+    user.set_password("pw")
+    db_session.add(user)
+    db_session.flush()
+    document = Document(title="Cours", content="x", user_id=user.id)
+    db_session.add(document)
+    db_session.flush()
+    questions = [
+        Question(document_id=document.id, type=QuestionType.ouverte, question=f"Q{i}", answer=f"R{i}")
+        for i in range(10)
+    ]
+    db_session.add_all(questions)
+    db_session.commit()
+
+    client = login("eleve@test.fr")
+    payload = {
+        "document_id": document.id,
+        "answers": [
+            {"question_id": q.id, "user_answer": q.answer if i % 2 else "faux"}
+            for i, q in enumerate(questions)
+        ],
+    }
+    return client, payload
+
+
+def test_save_is_bulk_and_recomputes_score(db_session, quiz, query_budget):
+    client, payload = quiz
+    # load_user, questions, session, résultats, statistiques (+ commit)
+    with query_budget(5):
+        response = client.post("/api/results/save", json=payload)
+    assert response.status_code == 201
+    assert response.get_json()["score"] == 5
+    assert db_session.query(Result).count() == 10
+    assert db_session.query(UserQuestionStat).count() == 10
+
+
+def test_retry_with_same_key_does_not_duplicate(db_session, quiz):
+    client, payload = quiz
+    headers = {"Idempotency-Key": "partie-1"}
+    first = client.post("/api/results/save", json=payload, headers=headers)
+    retry = client.post("/api/results/save", json=payload, headers=headers)
+
+    assert (first.status_code, retry.status_code) == (201, 200)
+    assert retry.get_json()["quiz_session_id"] == first.get_json()["quiz_session_id"]
+    assert db_session.query(QuizSession).count() == 1
+    assert db_session.query(Result).count() == 10
+    assert db_session.query(UserQuestionStat).filter_by(attempts=1).count() == 10
+
+    # Sans clé (ou avec une autre clé), chaque envoi est une nouvelle partie
+    client.post("/api/results/save", json=payload)
+    client.post("/api/results/save", json=payload, headers={"Idempotency-Key": "partie-2"})
+    assert db_session.query(QuizSession).count() == 3
+
+
+def test_malformed_ids_are_rejected_at_the_route(quiz):
+    client, payload = quiz
+    # Corps JSON : 400 en JSON, sans requête sur la colonne uuid
+    response = client.post("/api/results/save", json={**payload, "document_id": "pas-un-uuid"})
+    assert response.status_code == 400 and response.is_json
+    # Chemin : aucune route ne correspond
+    assert client.get("/quizzes/pas-un-uuid").status_code == 404
+    assert client.get(f"/quizzes/{payload['document_id'].upper()}").status_code == 200
+
+
+def test_malformed_subject_filter_lists_all_courses(quiz):
+    client, payload = quiz
+    # Filtre de matière illisible : toutes les matières (pas d'erreur SQL sur la colonne uuid)
+    response = client.get("/documents?subject=pas-un-uuid")
+    assert response.status_code == 200
+    assert payload["document_id"] in response.get_data(as_text=True)
+    assert client.get(f"/documents?subject={new_id()}").status_code == 200
+
+
+def test_unknown_question_ids_do_not_reload_the_set(quiz, query_budget):
+    client, payload = quiz
+    client.post("/api/results/save", json=payload)  # jeu du cours mis en cache
+    forged = {**payload, "answers": payload["answers"] + [{"question_id": new_id(), "user_answer": "x"}]}
+    with query_budget(4) as stats:  # load_user, session, résultats, statistiques
+        response = client.post("/api/results/save", json=forged)
+    assert response.get_json()["score"] == 5
+    assert not any("FROM questions" in sql for sql in stats.statements)
+
+
+def test_connection_leaves_pipeline_mode_before_returning_to_pool(db_session, quiz, pool_after_pipeline):
+    client, payload = quiz
+    checks = pool_after_pipeline(results_routes)
+    assert client.post("/api/results/save", json=payload).status_code == 201
+    # Connexions du pool utilisables par une autre requête dès la fin du lot
+    assert checks == [True]
+    assert db_session.query(Result).count() == 10
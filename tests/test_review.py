@@ -0,0 +1,75 @@
+# tests/test_review.py
+"""
+Révision espacée (app/review.py) : statistiques mises à jour par upsert,
+questions à réviser et jamais vues choisies en priorité.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from datetime import datetime, timedelta
+import pytest
+from app.models import User, Document, Question, QuestionType, UserQuestionStat
+from app.review import pick_questions, record_answers
+
+
+@pytest.fixture
+def quiz(db_session):
+    user = User(username="revise", email="revise@test.fr", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    document = Document(title="Cours", content="x", user_id=user.id)
+    db_session.add(document)
+    db_session.flush()
+    questions = [
+        Question(document_id=document.id, type=QuestionType.ouverte, question=f"Q{i}", answer="r")
+        for i in range(6)
+    ]
+    db_session.add_all(questions)
+    db_session.commit()
+    return user, document, questions
+
+
+def _stat(db_session, user, question):
+    db_session.expire_all()
+    return db_session.get(UserQuestionStat, (user.id, question.id))
+
+
+def test_streak_grows_and_resets(db_session, quiz):
+    user, _, questions = quiz
+    q = questions[0]
+
+    record_answers(db_session, user.id, [(q.id, True)])
+    record_answers(db_session, user.id, [(q.id, True)])
+    stat = _stat(db_session, user, q)
+    assert (stat.attempts, stat.correct_count, stat.correct_streak) == (2, 2, 2)
+    assert stat.next_due - stat.last_seen == timedelta(days=3)
+
+    # Doublon dans le même envoi : seule la dernière réponse compte
+    record_answers(db_session, user.id, [(q.id, True), (q.id, False)])
+    stat = _stat(db_session, user, q)
+    assert (stat.attempts, stat.correct_count, stat.correct_streak) == (3, 2, 0)
+    assert stat.next_due == stat.last_seen
+
+
+def test_due_then_new_then_mastered(db_session, quiz):
+    user, document, questions = quiz
+    mastered, due, weak_due = questions[:3]
+    record_answers(db_session, user.id, [(mastered.id, True), (due.id, True), (weak_due.id, False)])
+    # La révision de `due` est échue ; `weak_due` (échouée) l'est aussi
+    db_session.query(UserQuestionStat).filter_by(question_id=due.id).update(
+        {"next_due": datetime.now() - timedelta(days=1)}
+    )
+    db_session.commit()
+
+    picked = pick_questions(db_session, user.id, document.id, limit=5)
+    assert set(picked) == {q.id for q in questions} - {mastered.id}
+    assert mastered.id in pick_questions(db_session, user.id, document.id, limit=6)
+
+    # Les deux questions à réviser passent avant les jamais vues
+    assert set(pick_questions(db_session, user.id, document.id, limit=2)) == {due.id, weak_due.id}
@@ -0,0 +1,76 @@
+# tests/test_sampling.py
+"""
+Tirage de questions côté SQL (app/sampling.py) : répartition stratifiée par cours,
+tirage sans doublon (y compris en repartant du début de l'index), distribution en quiz.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import pytest
+from app.models import User, Subject, Document, Question, QuestionType
+from app.sampling import allocate, count_by_document, deal, sample_by_document
+
+SIZES = (60, 30, 8, 2)
+
+
+@pytest.fixture
+def bank(db_session):
+    """Une matière de quatre cours de tailles inégales."""
+    user = User(username="tirage", email="tirage@test.fr", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    subject = Subject(name="Biologie", user_id=user.id)
+    db_session.add(subject)
+    db_session.flush()
+    documents = [Document(title=f"Cours {n}", content="x", user_id=user.id, subject_id=subject.id) for n in SIZES]
+    db_session.add_all(documents)
+    db_session.flush()
+    for document, n in zip(documents, SIZES):
+        db_session.add_all(
+            Question(document_id=document.id, type=QuestionType.ouverte, question=f"Q{i}", answer="r")
+            for i in range(n)
+        )
+    db_session.commit()
+    return subject, documents
+
+
+def test_allocate_is_proportional_with_every_course():
+    quotas = allocate({"a": 60, "b": 30, "c": 8, "d": 2}, 50)
+    assert sum(quotas.values()) == 50
+    assert all(quotas[d] >= 1 for d in "abcd")
+    assert quotas["a"] > quotas["b"] > quotas["c"]
+    assert allocate({"a": 3, "b": 1}, 4) == {"a": 3, "b": 1}
+    # Plus de cours que de tirages : pas de minimum par cours
+    assert sum(allocate({d: 5 for d in "abcdef"}, 4).values()) == 4
+
+
+def test_sample_is_stratified_and_distinct(db_session, bank):
+    subject, documents = bank
+    counts = count_by_document(db_session, subject.id)
+    assert sorted(counts.values()) == sorted(SIZES)
+
+    quotas = allocate(counts, 100)
+    drawn = sample_by_document(db_session, quotas)
+    for document in documents:
+        ids = drawn[document.id]
+        assert len(ids) == len(set(ids)) == quotas[document.id]
+        owners = {q.document_id for q in db_session.query(Question).filter(Question.id.in_(ids))}
+        assert owners == {document.id}
+
+    quizzes = deal(drawn, 5)
+    assert [len(q) for q in quizzes] == [20] * 5
+    assert len({qid for quiz in quizzes for qid in quiz}) == 100
+
+
+def test_sample_wraps_around_the_index(db_session, bank, monkeypatch):
+    _, documents = bank
+    # Pivot au-delà de toutes les clés : tout le tirage vient du retour au début de l'index
+    monkeypatch.setattr("app.sampling.random.random", lambda: 1.0)
+    drawn = sample_by_document(db_session, {documents[2].id: 8})
+    assert len(set(drawn[documents[2].id])) == 8
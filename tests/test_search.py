@@ -0,0 +1,78 @@
+# tests/test_search.py
+"""
+Recherche plein texte (app/search.py, /api/search) : classement, périmètre (cours
+personnels et matières partagées en groupe), extraits échappés et surlignés.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import pytest
+
+from app.models import User, Subject, Document, Question, QuestionType, Group, GroupMember, GroupSubject, generate_invite_code
+from app.search import _highlight, search
+
+
+@pytest.fixture
+def corpus(db_session):
+    """Alice (cours perso + matière partagée par Bob dans leur groupe), Carol hors groupe."""
+    alice, bob, carol = (User(username=n, email=f"{n}@search.fr") for n in ("alice", "bob", "carol"))
+    for user in (alice, bob, carol):
+        user.set_password("pw")
+    db_session.add_all([alice, bob, carol])
+    db_session.flush()
+    shared = Subject(name="Histoire", user_id=bob.id)
+    group = Group(name="Classe", owner_id=bob.id, invite_code=generate_invite_code())
+    db_session.add_all([shared, group])
+    db_session.flush()
+    db_session.add_all([
+        GroupMember(group_id=group.id, user_id=alice.id),
+        GroupMember(group_id=group.id, user_id=bob.id),
+        GroupSubject(group_id=group.id, subject_id=shared.id),
+    ])
+    titled = Document(title="La Révolution française", content="Prise de la Bastille en 1789.", user_id=alice.id)
+    mentioned = Document(title="Chronologie", content="R&D : la révolution industrielle.", user_id=alice.id)
+    bobs = Document(title="Cours partagé", content="Causes de la révolution.", user_id=bob.id, subject_id=shared.id)
+    private = Document(title="Révolution russe", content="1917.", user_id=carol.id)
+    db_session.add_all([titled, mentioned, bobs, private])
+    db_session.flush()
+    db_session.add(Question(
+        document_id=bobs.id, type=QuestionType.qcm, question="En quelle année a eu lieu la révolution ?",
+        answer="1789", choices=["1789", "1815", "1848", "1917"],
+    ))
+    db_session.commit()
+    return alice, titled, mentioned, bobs
+
+
+def test_ranked_and_scoped(db_session, corpus):
+    alice, titled, mentioned, bobs = corpus
+    results = search(db_session, alice.id, "révolutions")
+
+    ids = [d["id"] for d in results["documents"]]
+    # Le titre (poids A) passe devant le contenu (poids B) ; le cours de Carol est exclu
+    assert ids[0] == titled.id
+    assert set(ids) == {titled.id, mentioned.id, bobs.id}
+    assert {d["id"]: d["shared"] for d in results["documents"]}[bobs.id] is True
+    assert [q["document_id"] for q in results["questions"]] == [bobs.id]
+
+
+def test_snippets_are_escaped_and_highlighted(db_session, corpus):
+    alice, _, mentioned, _ = corpus
+    results = search(db_session, alice.id, "industrielle")
+    [doc] = results["documents"]
+    assert doc["id"] == mentioned.id
+    assert doc["snippet"].endswith("révolution <mark>industrielle</mark>")
+    # Le texte du cours est échappé, seuls les <mark> de la recherche sont du HTML
+    assert _highlight("<b>R&D</b> \x02industrielle\x03") == "&lt;b&gt;R&amp;D&lt;/b&gt; <mark>industrielle</mark>"
+
+
+def test_search_api(corpus, login):
+    client = login("alice@search.fr")
+    assert client.get("/api/search?q=").status_code == 400
+    data = client.get("/api/search?q=bastille&limit=5").get_json()
+    assert [d["title"] for d in data["documents"]] == ["La Révolution française"]
@@ -0,0 +1,72 @@
+# tests/test_user_cache.py
+"""
+Cache d'identité de l'utilisateur connecté (auth.load_user) et cache TTL/LRU (app/cache.py).
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# --- Rendre le package "app" importable ---
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import pytest
+from sqlalchemy import event
+from app.cache import TTLCache
+from app.db import engine
+from app.models import User
+from app.routes.auth import load_user, user_cache
+
+
+@pytest.fixture
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def user(db_session):
+    user_cache.clear()
+    user = User(username="alice", email="alice@test.fr", password_hash="x")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def test_ttl_cache_expiry_and_lru():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" devient la plus récente
+    cache.set("c", 3)
+    assert cache.get("b") is None  # "b" évincée
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_load_user_hits_database_once(test_app, user, count_queries):
+    with test_app.test_request_context():
+        first = load_user(user.id)
+    with test_app.test_request_context():
+        second = load_user(user.id)
+    assert first.username == second.username == "alice"
+    assert first.get_id() == user.id
+    assert len(count_queries) == 1
+
+
+def test_user_update_invalidates_cache(test_app, user, db_session):
+    with test_app.test_request_context():
+        load_user(user.id)
+    user.username = "alice2"
+    db_session.commit()
+    with test_app.test_request_context():
+        assert load_user(user.id).username == "alice2"